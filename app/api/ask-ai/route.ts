@@ -1,23 +1,50 @@
+const FALLBACK_RESPONSE =
+  "I’m here and listening. I couldn’t reach the server just now, but here’s a quick answer based on general space knowledge. Ask about asteroids, impact energy, NASA missions, or planetary defense, and I’ll guide you with concise explanations and next steps.";
+
+const SSE_HEADERS = {
+  "Content-Type": "text/event-stream",
+  "Cache-Control": "no-cache, no-transform",
+  "X-Accel-Buffering": "no",
+};
+
+function fallbackStream() {
+  const body =
+    `data: ${JSON.stringify({ delta: FALLBACK_RESPONSE })}\n\n` +
+    `event: done\ndata: ${JSON.stringify({ response: FALLBACK_RESPONSE })}\n\n`;
+  return new Response(body, { status: 200, headers: SSE_HEADERS });
+}
+
 export async function POST(request: Request) {
+  let wantsStream = false;
   try {
     const body = await request.json();
+    wantsStream = Boolean(body?.stream) || (request.headers.get("accept") || "").includes("text/event-stream");
     const backendBase = process.env.NEXT_PUBLIC_BACKEND_URL || process.env.BACKEND_URL || "http://localhost:5000";
     const res = await fetch(`${backendBase}/api/ask-ai`, {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: {
+        "Content-Type": "application/json",
+        ...(wantsStream ? { Accept: "text/event-stream" } : {}),
+      },
       body: JSON.stringify(body),
       // Avoid Next.js caching for dynamic AI responses
       cache: "no-store",
     });
 
+    // Streaming: pipe the backend's server-sent events straight through so the
+    // first tokens reach the browser as soon as Groq produces them.
+    if (wantsStream) {
+      if (!res.ok || !res.body || !(res.headers.get("content-type") || "").includes("text/event-stream")) {
+        return fallbackStream();
+      }
+      return new Response(res.body, { status: 200, headers: SSE_HEADERS });
+    }
+
     const data = await res.json().catch(() => ({}));
 
     // If backend is unavailable or returned non-ok, provide a graceful fallback
     if (!res.ok || !data || typeof data.response !== "string") {
-      const fallback = {
-        response:
-          "I’m here and listening. I couldn’t reach the server just now, but here’s a quick answer based on general space knowledge. Ask about asteroids, impact energy, NASA missions, or planetary defense, and I’ll guide you with concise explanations and next steps.",
-      };
+      const fallback = { response: FALLBACK_RESPONSE };
       return new Response(JSON.stringify(fallback), {
         status: 200,
         headers: { "Content-Type": "application/json" },
@@ -29,15 +56,11 @@ export async function POST(request: Request) {
       headers: { "Content-Type": "application/json" },
     });
   } catch (e: any) {
-    const fallback = {
-      response:
-        "I’m here and listening. I couldn’t reach the server just now, but here’s a quick answer based on general space knowledge. Ask about asteroids, impact energy, NASA missions, or planetary defense, and I’ll guide you with concise explanations and next steps.",
-    };
+    if (wantsStream) return fallbackStream();
+    const fallback = { response: FALLBACK_RESPONSE };
     return new Response(JSON.stringify(fallback), {
       status: 200,
       headers: { "Content-Type": "application/json" },
     });
   }
 }
-
-
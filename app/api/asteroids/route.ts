@@ -1,22 +1,37 @@
-export async function GET() {
+const EMPTY = JSON.stringify({ status: "ok", data: [], list: [] });
+
+export async function GET(request: Request) {
   try {
     const backendBase = process.env.NEXT_PUBLIC_BACKEND_URL || process.env.BACKEND_URL || "http://localhost:5000";
-    const res = await fetch(`${backendBase}/api/asteroids`, { cache: "no-store" });
-    const data = await res.json().catch(() => ({}));
+    // Forward the browser's validator so an unchanged catalog costs a 304 end to end.
+    const ifNoneMatch = request.headers.get("if-none-match");
+    const res = await fetch(`${backendBase}/api/asteroids`, {
+      cache: "no-store",
+      headers: ifNoneMatch ? { "If-None-Match": ifNoneMatch } : {},
+    });
+
+    const etag = res.headers.get("etag");
+    const cacheHeaders: Record<string, string> = etag ? { ETag: etag, "Cache-Control": "no-cache" } : {};
 
-    if (!res.ok || !data) {
-      return new Response(JSON.stringify({ status: "ok", data: [], list: [] }), {
+    if (res.status === 304) {
+      return new Response(null, { status: 304, headers: cacheHeaders });
+    }
+
+    // Pass the prebuilt backend body through instead of parsing and re-serializing it.
+    const body = await res.text().catch(() => "");
+    if (!res.ok || !body) {
+      return new Response(EMPTY, {
         status: 200,
         headers: { "Content-Type": "application/json" },
       });
     }
 
-    return new Response(JSON.stringify(data), {
+    return new Response(body, {
       status: 200,
-      headers: { "Content-Type": "application/json" },
+      headers: { "Content-Type": "application/json", ...cacheHeaders },
     });
   } catch (e) {
-    return new Response(JSON.stringify({ status: "ok", data: [], list: [] }), {
+    return new Response(EMPTY, {
       status: 200,
       headers: { "Content-Type": "application/json" },
     });
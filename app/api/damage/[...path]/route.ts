@@ -0,0 +1,45 @@
+const backendBase = () => process.env.NEXT_PUBLIC_BACKEND_URL || process.env.BACKEND_URL || "http://localhost:5000";
+
+function backendUrl(request: Request, path: string[]) {
+  return `${backendBase()}/api/damage/${path.map(encodeURIComponent).join("/")}${new URL(request.url).search}`;
+}
+
+function unavailable() {
+  return new Response(JSON.stringify({ status: "error", message: "Backend unavailable" }), {
+    status: 502,
+    headers: { "Content-Type": "application/json" },
+  });
+}
+
+// Tiles: pass the PNG and its caching headers through so browsers and CDNs can revalidate.
+export async function GET(request: Request, { params }: { params: { path: string[] } }) {
+  try {
+    const ifNoneMatch = request.headers.get("if-none-match");
+    const res = await fetch(backendUrl(request, params.path), {
+      headers: ifNoneMatch ? { "If-None-Match": ifNoneMatch } : {},
+      cache: "no-store",
+    });
+    const headers: Record<string, string> = {};
+    for (const name of ["content-type", "etag", "cache-control"]) {
+      const value = res.headers.get(name);
+      if (value) headers[name] = value;
+    }
+    return new Response(res.status === 304 ? null : res.body, { status: res.status, headers });
+  } catch (error) {
+    return unavailable();
+  }
+}
+
+export async function POST(request: Request, { params }: { params: { path: string[] } }) {
+  try {
+    const res = await fetch(backendUrl(request, params.path), {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: await request.text(),
+    });
+    const data = await res.json();
+    return new Response(JSON.stringify(data), { status: res.status, headers: { "Content-Type": "application/json" } });
+  } catch (error) {
+    return unavailable();
+  }
+}
@@ -0,0 +1,40 @@
+export async function GET(request: Request) {
+  try {
+    const backendBase = process.env.NEXT_PUBLIC_BACKEND_URL || process.env.BACKEND_URL || "http://localhost:5000";
+    const query = new URL(request.url).search;
+    // Forward the browser's validator so an unchanged ephemeris costs a 304 end to end.
+    const ifNoneMatch = request.headers.get("if-none-match");
+    const res = await fetch(`${backendBase}/api/ephemeris${query}`, {
+      cache: "no-store",
+      headers: ifNoneMatch ? { "If-None-Match": ifNoneMatch } : {},
+    });
+
+    const etag = res.headers.get("etag");
+    const cacheHeaders: Record<string, string> = etag
+      ? { ETag: etag, "Cache-Control": res.headers.get("cache-control") || "no-cache" }
+      : {};
+
+    if (res.status === 304) {
+      return new Response(null, { status: 304, headers: cacheHeaders });
+    }
+
+    if (!res.ok || !res.body) {
+      const data = await res.json().catch(() => ({ status: "error", message: "Backend unavailable" }));
+      return new Response(JSON.stringify(data), {
+        status: res.ok ? 502 : res.status,
+        headers: { "Content-Type": "application/json" },
+      });
+    }
+
+    // Stream the binary (or JSON) ephemeris through untouched.
+    return new Response(res.body, {
+      status: 200,
+      headers: { "Content-Type": res.headers.get("content-type") || "application/octet-stream", ...cacheHeaders },
+    });
+  } catch (error) {
+    return new Response(JSON.stringify({ status: "error", message: "Backend unavailable" }), {
+      status: 502,
+      headers: { "Content-Type": "application/json" },
+    });
+  }
+}
@@ -11,6 +11,18 @@ export async function POST(request: Request) {
         velocity_kms: payload?.velocity_kms,
         mass_kg: payload?.mass_kg,
         diameter_m: payload?.diameter_m,
+        // Monte Carlo uncertainty mode (percentiles and histograms instead of single values)
+        ...(payload?.mode === 'uncertainty'
+          ? {
+              mode: 'uncertainty',
+              samples: payload?.samples,
+              seed: payload?.seed,
+              time_budget_s: payload?.time_budget_s,
+              diameter_min_m: payload?.diameter_min_m,
+              diameter_max_m: payload?.diameter_max_m,
+              density_kg_m3: payload?.density_kg_m3,
+            }
+          : {}),
       }),
       cache: 'no-store',
     });
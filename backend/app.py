@@ -1,9 +1,27 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
 import os
 import math
 import json
-import requests
+import datetime
+import threading
+import time
+from collections import OrderedDict
+
+from asteroid_cache import AsteroidCache
+from asteroid_index import AsteroidIndex
+from bulkhead import Bulkhead
+import impact_physics as physics
+import metrics
+from neo_store import NeoStore
+from prepared_payload import PreparedPayload
+from profiling import SlowRequestProfiler
+from response_cache import ResponseCache
+from upstream import LatencyHistogram, UpstreamUnavailable, get_upstream, upstream_stats
+
+# Modules that load NumPy (catalog_columns, damage_tiles, ephemeris, impact_batch,
+# impact_uncertainty, screening) are imported inside the functions that use them,
+# so a gunicorn worker boots without them and pays for each on first use.
 
 app = Flask(__name__)
 CORS(app)
@@ -13,6 +31,71 @@ CORS(app)
 # Content-Security-Policy and to validate postMessage targets when proxying/handling messages.
 GAME_ORIGIN = os.environ.get("GAME_ORIGIN", "https://sameersj008.github.io")
 
+# Per-process Prometheus metrics, served on /metrics.
+metrics_registry = metrics.Registry("neotrack")
+http_requests = metrics_registry.counter(
+    "http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status"))
+http_latency = metrics_registry.histogram(
+    "http_request_duration_seconds", "Time to build the response (streamed bodies excluded).", ("route", "method"))
+http_request_bytes = metrics_registry.histogram(
+    "http_request_size_bytes", "Request body sizes.", ("route",), metrics.SIZE_BUCKETS)
+http_response_bytes = metrics_registry.histogram(
+    "http_response_size_bytes", "Response body sizes (streamed bodies excluded).", ("route",), metrics.SIZE_BUCKETS)
+fallbacks = metrics_registry.counter(
+    "fallbacks_total", "Requests answered from an offline or degraded path.", ("path",))
+load_failures = metrics_registry.counter(
+    "load_failures_total", "Failed data loads that were recovered from.", ("source",))
+
+# Opt-in: profile PROFILE_SAMPLE_RATE of requests and keep those slower than PROFILE_SLOW_MS.
+PROFILE_SLOW_MS = os.environ.get("PROFILE_SLOW_MS")
+profiler = SlowRequestProfiler(
+    threshold_s=float(PROFILE_SLOW_MS) / 1000.0,
+    sample_rate=float(os.environ.get("PROFILE_SAMPLE_RATE", 0.05)),
+    keep=int(os.environ.get("PROFILE_KEEP", 20)),
+    directory=os.environ.get("PROFILE_DIR") or None,
+) if PROFILE_SLOW_MS else None
+
+
+def route_label():
+    # The URL rule, not the path, so /api/damage/tiles/3/4/2.png is one series.
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    if profiler is not None:
+        g.profile = profiler.start()
+
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop("request_started", None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    route = route_label()
+    http_requests.inc(route, request.method, response.status_code)
+    http_latency.observe(elapsed, route, request.method)
+    if request.content_length:
+        http_request_bytes.observe(request.content_length, route)
+    if not response.is_streamed and response.content_length is not None:
+        http_response_bytes.observe(response.content_length, route)
+    profile = g.pop("profile", None)
+    if profile is not None:
+        profile_id = profiler.finish(profile, elapsed, f"{request.method} {request.full_path.rstrip('?')}")
+        if profile_id is not None:
+            response.headers["X-Profile-Id"] = str(profile_id)
+    return response
+
+
+@app.teardown_request
+def release_profiler(exc):
+    # after_request is skipped when the response itself fails; never leave the profiler running.
+    profile = g.pop("profile", None)
+    if profile is not None:
+        profiler.finish(profile, 0.0, "aborted")
+
 
 @app.after_request
 def set_security_headers(response):
@@ -32,47 +115,81 @@ def set_security_headers(response):
     response.headers.setdefault('Referrer-Policy', 'no-referrer')
     return response
 
+# Upstream endpoints; overridable so tests and load tests can point at local stubs.
+GROQ_CHAT_URL = os.environ.get("GROQ_CHAT_URL", "https://api.groq.com/openai/v1/chat/completions")
+GROQ_EXPLAIN_URL = os.environ.get("GROQ_EXPLAIN_URL", "https://api.groq.ai/v1/engines/default/completions")
+NASA_NEOWS_URL = os.environ.get("NASA_NEOWS_URL", "https://api.nasa.gov/neo/rest/v1")
+
+nasa_upstream = get_upstream("nasa")
+groq_upstream = get_upstream("groq")
+groq_explain_upstream = get_upstream("groq_explain")
+
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 ASTEROIDS_FILE = os.path.join(DATA_DIR, "asteroids.json")
+# Last-known-good NASA catalog, shared by all gunicorn workers on this host.
+ASTEROIDS_CACHE_FILE = os.environ.get("ASTEROIDS_CACHE_FILE", os.path.join(DATA_DIR, "asteroids_cache.json"))
+ASTEROIDS_CACHE_TTL = float(os.environ.get("ASTEROIDS_CACHE_TTL", 600))
+# Largest batch returned as one columnar JSON body; bigger batches are streamed as NDJSON.
+BATCH_MAX_COLUMNS = int(os.environ.get("BATCH_MAX_COLUMNS", 200_000))
+BATCH_MAX_SCENARIOS = int(os.environ.get("BATCH_MAX_SCENARIOS", 5_000_000))
+# Full NeoWs catalog written by `python neo_ingest.py full`; preferred over live NASA calls when present.
+NEO_DB_PATH = os.environ.get("NEO_DB_PATH", os.path.join(DATA_DIR, "neo.sqlite3"))
+# Memory-mapped column file for the ingested catalog, shared by the workers; set empty to disable.
+CATALOG_COLUMNS_FILE = os.environ.get("CATALOG_COLUMNS_FILE", os.path.join(DATA_DIR, "catalog.cols"))
+# Ephemeris size limits: timesteps per object and total positions (objects x steps) per response.
+EPHEMERIS_MAX_STEPS = int(os.environ.get("EPHEMERIS_MAX_STEPS", 2000))
+EPHEMERIS_MAX_POINTS = int(os.environ.get("EPHEMERIS_MAX_POINTS", 5_000_000))
+# format=json is built in memory as Python floats (~30x the binary size), so it gets a much lower cap.
+EPHEMERIS_MAX_JSON_POINTS = int(os.environ.get("EPHEMERIS_MAX_JSON_POINTS", 100_000))
+# Encoded ephemeris bodies kept per catalog version; larger binary bodies are streamed uncached.
+EPHEMERIS_CACHE_BYTES = int(os.environ.get("EPHEMERIS_CACHE_MB", 64)) * 1024 * 1024
+SCREENING_MAX_DAYS = float(os.environ.get("SCREENING_MAX_DAYS", 366))
+# Monte Carlo uncertainty runs: sample cap, default/maximum wall-clock budget, pool size, concurrent runs per process.
+MC_MAX_SAMPLES = int(os.environ.get("MC_MAX_SAMPLES", 5_000_000))
+MC_TIME_BUDGET = float(os.environ.get("MC_TIME_BUDGET", 10))
+MC_MAX_TIME_BUDGET = float(os.environ.get("MC_MAX_TIME_BUDGET", 30))
+MC_WORKERS = int(os.environ.get("MC_WORKERS", os.cpu_count() or 1))
+MC_PROGRESS_INTERVAL = 0.5
 
 
-def load_asteroids():
-    # Priority: if NASA_API_KEY is set, attempt to fetch recent NEO browse data from NASA API.
+def fetch_nasa_asteroids():
+    """Fetch a page of NEOs from the NASA NeoWs browse endpoint.
+
+    Returns None when NASA_API_KEY is not set; raises on network/HTTP errors.
+    """
     nasa_key = os.environ.get("NASA_API_KEY")
-    if nasa_key:
-        try:
-            import requests
-
-            # Use the NeoWs 'browse' endpoint to fetch a sample page of NEOs.
-            url = f"https://api.nasa.gov/neo/rest/v1/neo/browse?api_key={nasa_key}&size=20"
-            r = requests.get(url, timeout=6)
-            r.raise_for_status()
-            payload = r.json()
-            items = payload.get("near_earth_objects") or payload.get("near_earth_objects", []) or payload.get("neos") or []
-            out = []
-            for i, n in enumerate(items):
-                # Map NASA structure to our simplified asteroid format
-                est_dia = None
-                if n.get("estimated_diameter"):
-                    meters = n["estimated_diameter"].get("meters")
-                    if meters:
-                        est_dia = (meters.get("estimated_diameter_min", 0) + meters.get("estimated_diameter_max", 0)) / 2
-                out.append({
-                    "id": n.get("neo_reference_id") or i,
-                    "label": n.get("name") or f"NEO {i}",
-                    "r": 4.8 + (i % 6) * 0.15,
-                    "theta": (i / max(1, len(items))) * 2 * math.pi,
-                    "y": 0,
-                    "size": est_dia and max(0.02, est_dia / 1000) or 0.08,
-                    "velocity_kms": None,
-                    "close_approach": any([ca.get("miss_distance") for ca in n.get("close_approach_data", [])]),
-                })
-            if out:
-                return out
-        except Exception:
-            # On any failure, fall through to local file/fallback generation
-            pass
+    if not nasa_key:
+        return None
+
+    # Use the NeoWs 'browse' endpoint to fetch a sample page of NEOs.
+    url = f"{NASA_NEOWS_URL}/neo/browse?api_key={nasa_key}&size=20"
+    r = nasa_upstream.request("GET", url, timeout=6)
+    r.raise_for_status()
+    payload = r.json()
+    items = payload.get("near_earth_objects") or payload.get("near_earth_objects", []) or payload.get("neos") or []
+    out = []
+    for i, n in enumerate(items):
+        # Map NASA structure to our simplified asteroid format
+        est_dia = None
+        if n.get("estimated_diameter"):
+            meters = n["estimated_diameter"].get("meters")
+            if meters:
+                est_dia = (meters.get("estimated_diameter_min", 0) + meters.get("estimated_diameter_max", 0)) / 2
+        out.append({
+            "id": n.get("neo_reference_id") or i,
+            "label": n.get("name") or f"NEO {i}",
+            "r": 4.8 + (i % 6) * 0.15,
+            "theta": (i / max(1, len(items))) * 2 * math.pi,
+            "y": 0,
+            "size": est_dia and max(0.02, est_dia / 1000) or 0.08,
+            "velocity_kms": None,
+            "close_approach": any([ca.get("miss_distance") for ca in n.get("close_approach_data", [])]),
+        })
+    return out
 
+
+def load_local_asteroids():
+    fallbacks.inc("catalog_local")
     try:
         with open(ASTEROIDS_FILE, "r", encoding="utf-8") as f:
             data = json.load(f)
@@ -93,12 +210,12 @@ def load_asteroids():
             return out
     except Exception:
         # Fallback: generate simple sample data #simple
+        load_failures.inc("local_file")
+        fallbacks.inc("catalog_sample")
         sample = []
         for i in range(20):
             diameter_m = 50 + (i % 7) * 20
-            rho = 3000.0
-            r = diameter_m / 2.0
-            mass_est = (4.0 / 3.0) * math.pi * (r ** 3) * rho
+            mass_est = physics.sphere_mass(diameter_m)
             sample.append({
                 "id": i + 1,
                 "name": f"Asteroid {i+1}",
@@ -112,39 +229,203 @@ def load_asteroids():
         return sample
 
 
+_neo_store = None
+
+
+def get_neo_store():
+    """The ingested catalog store, or None until neo_ingest.py has created it."""
+    global _neo_store
+    if _neo_store is None and os.path.exists(NEO_DB_PATH):
+        _neo_store = NeoStore(NEO_DB_PATH)
+    return _neo_store
+
+
+def fetch_catalog():
+    store = get_neo_store()
+    if store is not None:
+        data = store.load_columns(CATALOG_COLUMNS_FILE or None)
+        if data:
+            return data
+    return fetch_nasa_asteroids()
+
+
+def as_catalog_columns(data):
+    from catalog_columns import CatalogColumns
+
+    return CatalogColumns.of(data)
+
+
+def encode_catalog_snapshot(catalog):
+    # Store catalogs carry their version; workers map CATALOG_COLUMNS_FILE
+    # instead of parsing a JSON copy, so only NASA fetches are snapshotted.
+    if CATALOG_COLUMNS_FILE and catalog.meta.get("version") is not None:
+        return None
+    return catalog.encode_json()
+
+
+# Priority: the ingested SQLite catalog, then NASA NeoWs when NASA_API_KEY is set
+# (both cached, refreshed in the background), otherwise the local file / generated sample.
+# Whatever the source, the cache holds it as array-backed CatalogColumns.
+asteroid_cache = AsteroidCache(
+    fetch=fetch_catalog,
+    fallback=load_local_asteroids,
+    ttl=ASTEROIDS_CACHE_TTL,
+    snapshot_path=ASTEROIDS_CACHE_FILE,
+    prepare=as_catalog_columns,
+    encode=encode_catalog_snapshot,
+)
+
+
+def load_asteroids():
+    return asteroid_cache.get()
+
+
+_index_lock = threading.Lock()
+_index_source = None
+_index = None
+
+
+def get_asteroid_index():
+    """Name/ID index for the current catalog, rebuilt only when the catalog changes."""
+    global _index, _index_source
+    data = load_asteroids()
+    with _index_lock:
+        if _index is None or _index_source is not data:
+            _index = AsteroidIndex(data, version=asteroid_cache.version)
+            _index_source = data
+        return _index
+
+
+_elements_lock = threading.Lock()
+_elements_source = None
+_elements = None
+
+
+def get_orbit_elements():
+    """Orbital element arrays for the current catalog, rebuilt only when the catalog changes."""
+    import ephemeris
+
+    global _elements, _elements_source
+    data = load_asteroids()
+    with _elements_lock:
+        if _elements is None or _elements_source is not data:
+            _elements = ephemeris.OrbitElements.from_catalog(data)
+            _elements_source = data
+        return _elements
+
+
+def simplify_asteroids(data):
+    """Simplified list for dropdowns (name, mass, velocity, diameter), as CatalogColumns."""
+    import catalog_columns
+
+    return catalog_columns.simplify(catalog_columns.CatalogColumns.of(data))
+
+
+ASTEROIDS_FORMATS = ("json", "columns", "bin")
+
+_payload_lock = threading.Lock()
+_payload_source = None
+_asteroids_payloads = {}
+
+
+def build_asteroids_payload(catalog, fmt):
+    """PreparedPayload of the /api/asteroids body in one format, encoded straight from the columns."""
+    listing = simplify_asteroids(catalog)
+    if fmt == "bin":
+        return PreparedPayload(catalog.to_bytes(), content_type="application/octet-stream")
+    if fmt == "columns":
+        body = b'{"status":"ok","count":%d,"columns":%s,"list":%s}' % (
+            len(catalog), catalog.encode_columns_json(), listing.encode_columns_json())
+    else:
+        body = b'{"status":"ok","data":%s,"list":%s}' % (catalog.encode_json(), listing.encode_json())
+    return PreparedPayload(body)
+
+
+def get_asteroids_payload(fmt="json"):
+    """Serialized /api/asteroids body (plus ETag and compressed variants), rebuilt only when the catalog changes."""
+    global _payload_source
+    data = load_asteroids()
+    with _payload_lock:
+        if _payload_source is not data:
+            _asteroids_payloads.clear()
+            _payload_source = data
+        payload = _asteroids_payloads.get(fmt)
+        if payload is None:
+            payload = _asteroids_payloads[fmt] = build_asteroids_payload(as_catalog_columns(data), fmt)
+        return payload
+
+
 @app.route("/api/asteroids", methods=["GET"])
 def api_asteroids():
     """Return asteroid array used by frontend simulation.
 
     Each asteroid: {id, label, r, theta, y, size, velocity_kms, close_approach}
+    Query param format: "json" (default, rows) | "columns" ({status, count, columns: {field: [...]},
+    list: {...}}, nested objects as nested column objects) | "bin" (the catalog_columns "CAT1"
+    layout: typed little-endian arrays with interned strings, see catalog_columns.py).
+    Each body is prebuilt per catalog version and carries a strong ETag; a
+    matching If-None-Match gets 304, and gzip/br variants are served when accepted.
     """
+    fmt = request.args.get("format", "json")
+    if fmt not in ASTEROIDS_FORMATS:
+        return jsonify({"status": "error", "message": "format must be json, columns or bin"}), 400
     try:
-        data = load_asteroids()
-        # Provide a simplified list for dropdowns (name, mass, velocity, diameter)
-        simplified = []
-        for n in data:
-            name = n.get("label") or n.get("name") or str(n.get("id"))
-            # diameter_m: if size exists, interpret as approximate meters; else try estimated_diameter
-            diameter_m = n.get("diameter_m") or n.get("size") or None
-            # if our 'size' is a small fraction, assume it's meters already; otherwise default
-            if diameter_m and diameter_m < 1:  # if <1 assume it's in km fraction, scale up
-                diameter_m = diameter_m * 100
-            # velocity
-            velocity = n.get("velocity_kms") or n.get("velocity") or None
-            # mass estimate from diameter and default density
-            mass = None
-            try:
-                if diameter_m:
-                    rho = 3000.0
-                    r = float(diameter_m) / 2.0
-                    mass = (4.0 / 3.0) * math.pi * (r ** 3) * rho
-            except Exception:
-                mass = None
-            simplified.append({"name": name, "mass": mass, "velocity": velocity, "diameter": diameter_m})
-        return jsonify({"status": "ok", "data": data, "list": simplified})
+        payload = get_asteroids_payload(fmt)
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+    headers = {
+        "ETag": payload.etag,
+        # Let browsers and the Next.js proxy keep a copy but revalidate each time.
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if payload.not_modified(request.headers.get("If-None-Match")):
+        return Response(status=304, headers=headers)
+
+    encoding, body = payload.negotiate(request.headers.get("Accept-Encoding"))
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(body, mimetype=payload.content_type, headers=headers)
+
+
+@app.route("/api/asteroids/search", methods=["GET"])
+def api_asteroids_search():
+    """Autocomplete over asteroid names: prefix matches first, then fuzzy matches.
+
+    Query params: q (required), limit (default 10, max 50)
+    """
+    q = request.args.get("q", "")
+    try:
+        limit = max(1, min(50, int(request.args.get("limit", 10))))
+    except ValueError:
+        return jsonify({"status": "error", "message": "Invalid limit"}), 400
+    matches = get_asteroid_index().search(q, limit=limit)
+    results = [
+        {"id": a.get("id"), "name": a.get("label") or a.get("name"), "neo_reference_id": a.get("neo_reference_id")}
+        for a in matches
+    ]
+    return jsonify({"status": "ok", "query": q, "results": results})
+
+
+@app.route("/api/stats", methods=["GET"])
+def api_stats():
+    """Cache and upstream counters for monitoring."""
+    store = get_neo_store()
+    return jsonify({
+        "status": "ok",
+        "asteroid_cache": asteroid_cache.stats(),
+        "impact_memo": physics.memo_stats(),
+        "upstreams": upstream_stats(),
+        "ask_ai_latency": {k: h.snapshot() for k, h in list(ask_ai_latency.items())},
+        "ai_cache": ai_cache.stats(),
+        "ai_bulkhead": ai_bulkhead.stats(),
+        "neo_store": store.stats() if store is not None else None,
+        "screening_cache": screening_cache.stats() if screening_cache is not None else None,
+        "mc_bulkhead": mc_bulkhead.stats(),
+        "tile_cache": tile_cache.stats() if tile_cache is not None else None,
+    })
+
 
 @app.route("/api/impact", methods=["POST"])
 def api_impact():
@@ -156,115 +437,271 @@ def api_impact():
     except Exception:
         return jsonify({"status": "error", "message": "Invalid numeric input"}), 400
 
-    # Conversions
-    v_ms = v_kms * 1000.0
-
-    # Momentum
-    momentum = mass_kg * v_ms
-
-    # Impact energy (J)
-    energy_j = 0.5 * mass_kg * v_ms * v_ms
-
-    # Equivalent megatons of TNT (1 Mt = 4.184e15 J)
-    energy_mt = energy_j / 4.184e15
-
-    # Hiroshima equivalents (approx 15 kt = 0.015 Mt)
-    hiroshima_equiv = energy_mt / 0.015
-
-    # Crater depth heuristic (very rough scaling): depth ~ 0.1 * (diameter_m)^(0.3) * (energy_j/1e15)^(0.1)
-    # This is a placeholder approximate formula for demo only.
-    crater_depth_m = 0.1 * (diameter_m ** 0.3) * ((energy_j / 1e15) ** 0.1) * 10
+    m = physics.impact_metrics(v_kms, mass_kg, diameter_m)
+    energy_j = m["impact_energy_j"]
 
     response = {
         "status": "ok",
         "input": {"velocity_kms": v_kms, "mass_kg": mass_kg, "diameter_m": diameter_m},
         "impact_energy_j": energy_j,
-        "impact_energy_mt": energy_mt,
-        "momentum": momentum,
-        "crater_depth_m": crater_depth_m,
-        "hiroshima_equivalent": hiroshima_equiv,
+        "impact_energy_mt": m["impact_energy_mt"],
+        "momentum": m["momentum"],
+        "crater_depth_m": physics.crater_depth_m(diameter_m, energy_j, physics.CRATER_DEPTH_QUICK),
+        "hiroshima_equivalent": m["hiroshima_equivalent"],
     }
     return jsonify(response)
 
 
 
-@app.route("/api/ask-ai", methods=["POST"])
-def api_ask_ai():
-    """Proxy chat endpoint backed by Groq (llama-3.1-8b-instant).
+@app.route("/api/impact/batch", methods=["POST"])
+def api_impact_batch():
+    """Evaluate many impact scenarios in one vectorized pass.
 
-    Request JSON: { query: string, language?: 'en'|'hi'|'es'|'fr' }
-    Response JSON: { response: string }
+    Request JSON, one of:
+      { scenarios: {velocity_kms: [...], diameter_m: [...], mass_kg?: [...], density_kg_m3?: [...]} }
+          arrays are zipped; single values are broadcast
+      { grid: {velocity_kms: [...] | {start, stop, num}, diameter_m: ..., density_kg_m3?: ...} }
+          cartesian product of the axes
+    plus optional format: "columns" (default) | "ndjson" (also via ?format= or Accept: application/x-ndjson).
+    Columnar response: { status, count, columns: {velocity_kms: [...], impact_energy_j: [...], ...} }
     """
-    payload = request.get_json(force=True) or {}
-    query = str(payload.get("query", "")).strip()
-    language = (payload.get("language") or "en").lower()
+    from impact_batch import Batch, BatchError
 
-    # Use provided key; do not hardcode defaults to avoid leaking secrets
-    groq_api_key = os.getenv("GROQ_API_KEY")
+    payload = request.get_json(silent=True) or {}
+    try:
+        batch = Batch.from_payload(payload, BATCH_MAX_SCENARIOS)
+    except BatchError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
 
-    headers = {
-        "Authorization": f"Bearer {groq_api_key}",
-        "Content-Type": "application/json",
-    }
+    fmt = payload.get("format") or request.args.get("format")
+    if not fmt:
+        wants_ndjson = "application/x-ndjson" in request.headers.get("Accept", "")
+        fmt = "ndjson" if wants_ndjson or batch.count > BATCH_MAX_COLUMNS else "columns"
+    if fmt not in ("columns", "ndjson"):
+        return jsonify({"status": "error", "message": "format must be 'columns' or 'ndjson'"}), 400
+    limit = BATCH_MAX_COLUMNS if fmt == "columns" else BATCH_MAX_SCENARIOS
+    if batch.count > limit:
+        return jsonify({"status": "error", "message": f"Batch of {batch.count} scenarios exceeds the {fmt} limit of {limit}"}), 413
 
-    def groq_chat(prompt: str) -> str:
-        body = {
-            "model": "llama-3.1-8b-instant",
-            "messages": [{"role": "user", "content": prompt}],
-        }
-        try:
-            res = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers=headers,
-                json=body,
-                timeout=30,
-            )
-            data = res.json()
-            return (
-                ((data.get("choices") or [{}])[0].get("message") or {}).get("content")
-                or ""
-            ).strip()
-        except Exception as e:
-            return ""
+    if fmt == "ndjson":
+        return Response(batch.iter_ndjson(), mimetype="application/x-ndjson", headers={"X-Scenario-Count": str(batch.count)})
+    return jsonify({"status": "ok", "count": batch.count, "columns": batch.columns()})
 
-    # Translate to English if needed for understanding
-    internal_query = query
-    if language != "en" and query:
-        internal_query = groq_chat(
-            f"Translate this to English for understanding: {query}"
-        ) or query
-
-    # Compose assistant instruction
-    system_prompt = (
-        "You are Space AI, an intelligent assistant for Neotrack.earth — a planetary defense web platform built for the NASA Space Apps Challenge by Sathwik Sastry.\n"
-        "\n"
-        "MISSION:\n"
-        "Educate and assist users in understanding asteroid behavior, orbital dynamics, and planetary defense. Provide accurate, scientifically grounded insights about space technology, impact prediction, and AI’s role in data analysis.\n"
-        "\n"
-        "TECH CONTEXT:\n"
-        "Neotrack.earth runs on a dual-tier system:\n"
-        "- Frontend: Next.js (Vercel) for dynamic rendering and visualization.\n"
-        "- Backend: Python Flask (Render) for computing impact physics and managing AI communication.\n"
-        "- AI Engine: Groq’s Llama-3.1-8B-instant model, integrated via REST API.\n"
-        "- Data Sources: NASA’s NEO API (when available) or preloaded JSON fallback.\n"
-        "\n"
-        "DATA SCIENCE LOGIC:\n"
-        "Neotrack.earth calculates:\n"
-        "- **Impact Energy (E):** ½ × mass × velocity² (in joules, converted to TNT equivalent).\n"
-        "- **Crater Diameter:** Empirical scaling equations based on energy and surface gravity.\n"
-        "- **Seismic Magnitude:** Logarithmic energy conversion using Richter scale relations.\n"
-        "- **Risk Level:** Derived from energy, size, and impact velocity thresholds.\n"
-        "\n"
-        "USER EXPERIENCE:\n"
-        "You answer questions about:\n"
-        "- Asteroid composition, orbit, and hazard potential.\n"
-        "- How AI and ML models assist in asteroid detection.\n"
-        "- The scientific basis of each Neotrack dashboard metric.\n"
-        "- The significance of each data visualization (Energy Graph, 3D Impact Scene, etc.).\n"
-        "- The purpose and educational vision of Neotrack.earth — to raise global awareness about planetary defense.\n"
-        "\n"
-        "TONE:\n"
-        "Be inspiring, factual, concise, short and clear. The responses should just answer the user's question and not add any extra information which overwhelms the user\n"
+
+_ephemeris_lock = threading.Lock()
+_ephemeris_source = None
+_ephemeris_payloads = OrderedDict()
+_ephemeris_bytes = 0
+
+
+def build_ephemeris_payload(elements, jd, frame, fmt):
+    import ephemeris
+
+    if fmt == "json":
+        pos = ephemeris.positions(elements, jd, frame).round(6).tolist() if len(elements) else []
+        body = json.dumps({"status": "ok", **ephemeris.header(elements, jd, frame), "positions": pos},
+                          separators=(",", ":")).encode("utf-8")
+        return PreparedPayload(body)
+    # float32 positions barely compress, so the binary body is kept as is.
+    return PreparedPayload(b"".join(ephemeris.iter_binary(elements, jd, frame)),
+                           content_type="application/octet-stream", min_compress_size=float("inf"))
+
+
+def get_ephemeris_payload(catalog_elements, key, build):
+    """Encoded ephemeris body for one request, in an LRU bounded by EPHEMERIS_CACHE_BYTES
+    and cleared when the catalog changes."""
+    global _ephemeris_source, _ephemeris_bytes
+    with _ephemeris_lock:
+        if _ephemeris_source is not catalog_elements:
+            _ephemeris_payloads.clear()
+            _ephemeris_bytes = 0
+            _ephemeris_source = catalog_elements
+        payload = _ephemeris_payloads.get(key)
+        if payload is not None:
+            _ephemeris_payloads.move_to_end(key)
+            return payload
+    payload = build()
+    size = sum(len(body) for body in payload.variants.values())
+    with _ephemeris_lock:
+        if _ephemeris_source is catalog_elements and key not in _ephemeris_payloads and size <= EPHEMERIS_CACHE_BYTES:
+            _ephemeris_payloads[key] = payload
+            _ephemeris_bytes += size
+            while _ephemeris_bytes > EPHEMERIS_CACHE_BYTES:
+                _, old = _ephemeris_payloads.popitem(last=False)
+                _ephemeris_bytes -= sum(len(body) for body in old.variants.values())
+    return payload
+
+
+@app.route("/api/ephemeris", methods=["GET"])
+def api_ephemeris():
+    """Propagated positions for catalog objects with orbital elements.
+
+    Query params: start (YYYY-MM-DD, default today UTC), days (default 365), steps (default 180),
+    frame ("geo" default | "helio"), ids (comma-separated, optional), limit (max objects),
+    format ("bin" default | "json", capped at EPHEMERIS_MAX_JSON_POINTS positions).
+    Binary body: b"EPH1", uint32 LE header length, JSON header (ids, names, start_jd,
+    step_days, ...), then float32 LE positions in AU laid out [object][step][x, y, z].
+    Bodies are cached per catalog version and parameters and carry a strong ETag; a
+    matching If-None-Match gets 304.
+    """
+    import ephemeris
+
+    args = request.args
+    try:
+        start = args.get("start")
+        start = datetime.date.fromisoformat(start) if start else datetime.datetime.now(datetime.timezone.utc).date()
+        days = float(args.get("days", 365))
+        steps = int(args.get("steps", 180))
+        limit = int(args["limit"]) if args.get("limit") else None
+    except ValueError:
+        return jsonify({"status": "error", "message": "Invalid start, days, steps or limit"}), 400
+    frame = args.get("frame", "geo")
+    fmt = args.get("format", "bin")
+    if frame not in ("geo", "helio") or fmt not in ("bin", "json"):
+        return jsonify({"status": "error", "message": "frame must be geo|helio and format bin|json"}), 400
+    if not (1 <= steps <= EPHEMERIS_MAX_STEPS) or not (0 < days <= 36500):
+        return jsonify({"status": "error", "message": f"steps must be 1..{EPHEMERIS_MAX_STEPS} and days 0..36500"}), 400
+
+    catalog_elements = elements = get_orbit_elements()
+    if args.get("ids"):
+        wanted = set(args["ids"].split(","))
+        elements = elements.subset([k for k, i in enumerate(elements.ids) if str(i) in wanted])
+    if limit is not None:
+        elements = elements.subset(range(min(max(limit, 0), len(elements))))
+    if len(elements) * steps > EPHEMERIS_MAX_POINTS:
+        return jsonify({
+            "status": "error",
+            "message": f"{len(elements)} objects x {steps} steps exceeds {EPHEMERIS_MAX_POINTS} positions; lower limit or steps",
+        }), 413
+    if fmt == "json" and len(elements) * steps > EPHEMERIS_MAX_JSON_POINTS:
+        return jsonify({
+            "status": "error",
+            "message": f"{len(elements)} objects x {steps} steps exceeds {EPHEMERIS_MAX_JSON_POINTS} positions "
+                       "for format=json; use format=bin or lower limit or steps",
+        }), 413
+
+    jd = ephemeris.time_grid(ephemeris.date_to_jd(start), days, steps)
+    headers = {"X-Ephemeris-Count": str(len(elements)), "X-Ephemeris-Steps": str(steps)}
+    if fmt == "bin" and len(elements) * steps * 12 > EPHEMERIS_CACHE_BYTES:
+        return Response(stream_with_context(ephemeris.iter_binary(elements, jd, frame)),
+                        mimetype="application/octet-stream", headers=headers)
+
+    key = (start.isoformat(), days, steps, frame, args.get("ids", ""), limit, fmt)
+    payload = get_ephemeris_payload(catalog_elements, key, lambda: build_ephemeris_payload(elements, jd, frame, fmt))
+    headers.update({"ETag": payload.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"})
+    if payload.not_modified(request.headers.get("If-None-Match")):
+        return Response(status=304, headers=headers)
+    encoding, body = payload.negotiate(request.headers.get("Accept-Encoding"))
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(body, mimetype=payload.content_type, headers=headers)
+
+
+screening_cache = None
+
+
+def get_screening_cache():
+    global screening_cache
+    if screening_cache is None:
+        from screening import ScreeningCache
+
+        screening_cache = ScreeningCache(int(os.environ.get("SCREENING_CACHE_WINDOWS", 8)),
+                                         int(os.environ.get("SCREENING_CACHE_MB", 256)) * 1024 * 1024)
+    return screening_cache
+
+
+def get_screening_window(start_jd, days):
+    """Screening index for one time window, built once per catalog version and window."""
+    from screening import ScreeningWindow
+
+    elements = get_orbit_elements()
+
+    def build():
+        by_id = {a.get("id"): a for a in load_asteroids()}
+        diameters = [(by_id.get(i) or {}).get("diameter_m") for i in elements.ids]
+        return ScreeningWindow(elements, start_jd, days, diameters)
+
+    return get_screening_cache().get(elements, start_jd, days, build)
+
+
+@app.route("/api/close-approaches", methods=["GET"])
+def api_close_approaches():
+    """Catalog objects passing within a threshold of Earth during a date window.
+
+    Query params: start (YYYY-MM-DD, default today UTC), days (default 30), one of
+    threshold_au (default 0.05) | threshold_ld (lunar distances) | threshold_km,
+    sort ("distance" default | "energy"), limit (default 50, max 500).
+    Each result has the time and distance of the object's closest approach in the window,
+    its relative velocity and the impact energy it would carry.
+    """
+    import ephemeris
+    from screening import AU_KM, LUNAR_DISTANCE_AU
+
+    args = request.args
+    try:
+        start = args.get("start")
+        start = datetime.date.fromisoformat(start) if start else datetime.datetime.now(datetime.timezone.utc).date()
+        days = float(args.get("days", 30))
+        if args.get("threshold_ld"):
+            threshold_au = float(args["threshold_ld"]) * LUNAR_DISTANCE_AU
+        elif args.get("threshold_km"):
+            threshold_au = float(args["threshold_km"]) / AU_KM
+        else:
+            threshold_au = float(args.get("threshold_au", 0.05))
+        limit = max(1, min(500, int(args.get("limit", 50))))
+    except ValueError:
+        return jsonify({"status": "error", "message": "Invalid start, days, threshold or limit"}), 400
+    sort = args.get("sort", "distance")
+    if sort not in ("distance", "energy"):
+        return jsonify({"status": "error", "message": "sort must be 'distance' or 'energy'"}), 400
+    if not (0 < days <= SCREENING_MAX_DAYS) or not (0 < threshold_au <= 1.0):
+        return jsonify({"status": "error", "message": f"days must be 0..{SCREENING_MAX_DAYS:g} and threshold 0..1 AU"}), 400
+
+    start_jd = ephemeris.date_to_jd(start)
+    window = get_screening_window(start_jd, days)
+    results = window.ranked(threshold_au, sort=sort, limit=limit)
+    return jsonify({
+        "status": "ok",
+        "window": {"start": start.isoformat(), "days": days, "start_jd": start_jd},
+        "threshold_au": threshold_au,
+        "screened": len(window.elements),
+        "count": len(window.screen(threshold_au)[0]),
+        "sort": sort,
+        "results": results,
+    })
+
+
+# Assistant instruction sent ahead of every /api/ask-ai question
+SPACE_AI_PROMPT = (
+    "You are Space AI, an intelligent assistant for Neotrack.earth — a planetary defense web platform built for the NASA Space Apps Challenge by Sathwik Sastry.\n"
+    "\n"
+    "MISSION:\n"
+    "Educate and assist users in understanding asteroid behavior, orbital dynamics, and planetary defense. Provide accurate, scientifically grounded insights about space technology, impact prediction, and AI’s role in data analysis.\n"
+    "\n"
+    "TECH CONTEXT:\n"
+    "Neotrack.earth runs on a dual-tier system:\n"
+    "- Frontend: Next.js (Vercel) for dynamic rendering and visualization.\n"
+    "- Backend: Python Flask (Render) for computing impact physics and managing AI communication.\n"
+    "- AI Engine: Groq’s Llama-3.1-8B-instant model, integrated via REST API.\n"
+    "- Data Sources: NASA’s NEO API (when available) or preloaded JSON fallback.\n"
+    "\n"
+    "DATA SCIENCE LOGIC:\n"
+    "Neotrack.earth calculates:\n"
+    "- **Impact Energy (E):** ½ × mass × velocity² (in joules, converted to TNT equivalent).\n"
+    "- **Crater Diameter:** Empirical scaling equations based on energy and surface gravity.\n"
+    "- **Seismic Magnitude:** Logarithmic energy conversion using Richter scale relations.\n"
+    "- **Risk Level:** Derived from energy, size, and impact velocity thresholds.\n"
+    "\n"
+    "USER EXPERIENCE:\n"
+    "You answer questions about:\n"
+    "- Asteroid composition, orbit, and hazard potential.\n"
+    "- How AI and ML models assist in asteroid detection.\n"
+    "- The scientific basis of each Neotrack dashboard metric.\n"
+    "- The significance of each data visualization (Energy Graph, 3D Impact Scene, etc.).\n"
+    "- The purpose and educational vision of Neotrack.earth — to raise global awareness about planetary defense.\n"
+    "\n"
+    "TONE:\n"
+    "Be inspiring, factual, concise, short and clear. The responses should just answer the user's question and not add any extra information which overwhelms the user\n"
 # Deployment instructions:
 # 1) Build the game: cd app/game/astro-neo-defense && npm ci && npm run build
 # 2) Copy dist → public/astro-neo-defense
@@ -275,41 +712,265 @@ def api_ask_ai():
 # 3) Deploy. Verify /game/static/index.html returns 200.
 # Option C: External host
 #Host the built game (dist) on a CDN or GitHub Pages, set NEXT_PUBLIC_GAME_URL to that absolute URL in your env, redeploy and clearly educational — combining scientific precision with enthusiasm for exploration.\n"
-        "When uncertain, admit gracefully (“That detail isn’t verified yet, but here’s what we know…”).\n"
-        "Never reveal internal code or keys.\n"
-        "If asked about yourself, reply: “I’m Space AI, the cosmic guide of Neotrack.earth — here to help you explore the universe.”\n"
-        "\n"
-        "EXAMPLES:\n"
-        "User: “How does Neotrack.earth calculate asteroid impacts?”\n"
-        "Space AI: “Neotrack.earth uses each asteroid’s velocity, mass, and estimated diameter to compute kinetic energy (½ mv²). That energy helps estimate crater diameter, seismic effect, and blast radius — visualized in real time in the Impact Dashboard.”\n"
-        "\n"
-        "User: “Which asteroid is most dangerous?”\n"
-        "Space AI: “Based on NASA’s NEO hazard classifications, asteroids exceeding 140 m diameter with close approach under 0.05 AU are potentially hazardous. Neotrack.earth highlights such cases with red risk markers.”\n"
-    )
-    # If no key is configured, provide a graceful offline fallback
-    if not groq_api_key:
-        fallback = "I’m here and listening. I can share general insights: ask about asteroids, impact energy, crater size, or notable missions like DART."
-        basic_map = {
-            "dart": "DART was a planetary defense test that intentionally impacted the moonlet Dimorphos to measure how much its orbit changed.",
-            "impact": "Impact energy scales with mass and the square of velocity (E = 1/2 m v^2). Larger, faster objects release more energy and can form larger craters.",
-            "crater": "Crater size depends on impact energy and target surface; simple scaling suggests diameter grows sublinearly with energy.",
-            "asteroid": "Asteroids are rocky bodies orbiting the Sun; some are near-Earth objects (NEOs) that occasionally make close approaches.",
-        }
-        lower_q = (internal_query or "").lower()
-        for k, v in basic_map.items():
-            if k in lower_q:
-                return jsonify({"response": v})
-        return jsonify({"response": fallback})
-
-    answer = groq_chat(f"{system_prompt} {internal_query}")
+    "When uncertain, admit gracefully (“That detail isn’t verified yet, but here’s what we know…”).\n"
+    "Never reveal internal code or keys.\n"
+    "If asked about yourself, reply: “I’m Space AI, the cosmic guide of Neotrack.earth — here to help you explore the universe.”\n"
+    "\n"
+    "EXAMPLES:\n"
+    "User: “How does Neotrack.earth calculate asteroid impacts?”\n"
+    "Space AI: “Neotrack.earth uses each asteroid’s velocity, mass, and estimated diameter to compute kinetic energy (½ mv²). That energy helps estimate crater diameter, seismic effect, and blast radius — visualized in real time in the Impact Dashboard.”\n"
+    "\n"
+    "User: “Which asteroid is most dangerous?”\n"
+    "Space AI: “Based on NASA’s NEO hazard classifications, asteroids exceeding 140 m diameter with close approach under 0.05 AU are potentially hazardous. Neotrack.earth highlights such cases with red risk markers.”\n"
+)
+
+
+OFFLINE_FALLBACK = "I’m here and listening. I can share general insights: ask about asteroids, impact energy, crater size, or notable missions like DART."
+OFFLINE_ANSWERS = {
+    "dart": "DART was a planetary defense test that intentionally impacted the moonlet Dimorphos to measure how much its orbit changed.",
+    "impact": "Impact energy scales with mass and the square of velocity (E = 1/2 m v^2). Larger, faster objects release more energy and can form larger craters.",
+    "crater": "Crater size depends on impact energy and target surface; simple scaling suggests diameter grows sublinearly with energy.",
+    "asteroid": "Asteroids are rocky bodies orbiting the Sun; some are near-Earth objects (NEOs) that occasionally make close approaches.",
+}
+
+
+def offline_answer(query):
+    """Canned answer used when Groq is not configured or unavailable."""
+    lower_q = (query or "").lower()
+    for k, v in OFFLINE_ANSWERS.items():
+        if k in lower_q:
+            return v
+    return OFFLINE_FALLBACK
+
+
+# At most this many Groq calls per process; the rest get the offline fallback at once.
+# Keep it below the gunicorn thread count so physics routes always find a free thread.
+ai_bulkhead = Bulkhead(
+    "ai",
+    limit=int(os.environ.get("AI_MAX_CONCURRENCY", 4)),
+    wait=float(os.environ.get("AI_BULKHEAD_WAIT", 0)),
+)
+
+# "direct": one Groq call that answers in the user's language.
+# "chain": legacy translate-in / answer / translate-out (three sequential calls).
+ASK_AI_TRANSLATION = os.environ.get("ASK_AI_TRANSLATION", "direct")
+LANGUAGE_NAMES = {"en": "English", "hi": "Hindi", "es": "Spanish", "fr": "French"}
+
+# Time-to-answer per "language/mode", reported on /api/stats.
+ask_ai_latency = {}
+_ask_ai_latency_lock = threading.Lock()
+
+# Groq answers, explanations and translations keyed on normalized text + language.
+# Set AI_CACHE_DB to a file path to persist them and share them across workers.
+ai_cache = ResponseCache(
+    max_entries=int(os.environ.get("AI_CACHE_SIZE", 1024)),
+    ttl=float(os.environ.get("AI_CACHE_TTL", 24 * 3600)),
+    db_path=os.environ.get("AI_CACHE_DB") or None,
+)
+
+
+def groq_chat(prompt: str, api_key: str) -> str:
+    """Single-turn Groq chat completion; "" on a bad response, raises UpstreamUnavailable if Groq is down."""
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+    body = {
+        "model": "llama-3.1-8b-instant",
+        "messages": [{"role": "user", "content": prompt}],
+    }
+    try:
+        res = groq_upstream.request("POST", GROQ_CHAT_URL, headers=headers, json=body, timeout=30)
+        data = res.json()
+        return (
+            ((data.get("choices") or [{}])[0].get("message") or {}).get("content")
+            or ""
+        ).strip()
+    except UpstreamUnavailable:
+        raise
+    except Exception:
+        return ""
+
+
+def translate_to_english(query, language, api_key):
+    cached = ai_cache.get("translate", language, query)
+    if cached:
+        return cached
+    translated = groq_chat(f"Translate this to English for understanding: {query}", api_key)
+    if not translated:
+        return query
+    ai_cache.set("translate", language, query, translated)
+    return translated
+
+
+def groq_chat_stream(prompt: str, api_key: str):
+    """Yield content deltas from a streaming Groq completion (OpenAI-style SSE)."""
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+        "Accept": "text/event-stream",
+    }
+    body = {
+        "model": "llama-3.1-8b-instant",
+        "messages": [{"role": "user", "content": prompt}],
+        "stream": True,
+    }
+    res = groq_upstream.request("POST", GROQ_CHAT_URL, headers=headers, json=body, timeout=30, stream=True)
+    with res:
+        for line in res.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            try:
+                chunk = json.loads(data)
+            except ValueError:
+                continue
+            delta = (((chunk.get("choices") or [{}])[0].get("delta") or {}).get("content")) or ""
+            if delta:
+                yield delta
+
+
+def direct_prompt(query, language):
+    if language == "en":
+        return f"{SPACE_AI_PROMPT} {query}"
+    language_name = LANGUAGE_NAMES.get(language, language)
+    return f"{SPACE_AI_PROMPT}\nReply only in {language_name}, whatever language the question is written in.\n{query}"
+
+
+def answer_direct(query, language, api_key):
+    """One round trip: the model reads the question in any language and replies in `language`."""
+    return groq_chat(direct_prompt(query, language), api_key)
+
+
+def answer_chain(query, language, api_key):
+    """Legacy flow: translate the question to English, answer, translate the answer back."""
+    # Translate to English if needed for understanding
+    internal_query = query
+    if language != "en" and query:
+        internal_query = translate_to_english(query, language, api_key)
+
+    answer = groq_chat(f"{SPACE_AI_PROMPT} {internal_query}", api_key)
 
     # Translate back to target language if needed
     if language != "en" and answer:
-        translated = groq_chat(
-            f"Translate this answer into {language}: {answer}"
-        )
+        translated = groq_chat(f"Translate this answer into {language}: {answer}", api_key)
         if translated:
             answer = translated
+    return answer
+
+
+def record_ask_ai_latency(language, mode, seconds):
+    key = f"{language}/{mode}"
+    with _ask_ai_latency_lock:
+        hist = ask_ai_latency.get(key)
+        if hist is None:
+            hist = ask_ai_latency[key] = LatencyHistogram()
+    hist.observe(seconds)
+
+
+def sse_event(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+def stream_answer(query, language, api_key):
+    """Server-sent events for /api/ask-ai: `data: {"delta"}` chunks, then `event: done` with the full response.
+
+    Streaming always uses the single-call prompt, since the chain flow cannot
+    translate an answer before it is complete.
+    """
+    cached = ai_cache.get("ask", language, query) if api_key else None
+    if cached:
+        yield sse_event({"delta": cached})
+        yield sse_event({"response": cached}, event="done")
+        return
+
+    started = time.perf_counter()
+    parts = []
+    complete = False
+    try:
+        if not api_key or not groq_upstream.available():
+            raise UpstreamUnavailable("groq not configured or unavailable")
+        for delta in groq_chat_stream(direct_prompt(query, language), api_key):
+            if not parts:
+                record_ask_ai_latency(language, "stream_first_token", time.perf_counter() - started)
+            parts.append(delta)
+            yield sse_event({"delta": delta})
+        complete = True
+    except UpstreamUnavailable:
+        if not parts:
+            fallbacks.inc("ask_ai_stream")
+            parts.append(offline_answer(query))
+            yield sse_event({"delta": parts[0]})
+    except Exception:
+        # Connection dropped mid-stream; end with whatever already arrived.
+        pass
+    answer = "".join(parts) or "Sorry, I couldn't generate a response."
+    if complete and parts:
+        ai_cache.set("ask", language, query, answer)
+    record_ask_ai_latency(language, "stream", time.perf_counter() - started)
+    yield sse_event({"response": answer}, event="done")
+
+
+@app.route("/api/ask-ai", methods=["POST"])
+def api_ask_ai():
+    """Proxy chat endpoint backed by Groq (llama-3.1-8b-instant).
+
+    Request JSON: { query: string, language?: 'en'|'hi'|'es'|'fr', stream?: bool }
+    Response JSON: { response: string }
+    With stream=true (or Accept: text/event-stream) the answer is relayed as
+    server-sent events while Groq generates it; see stream_answer().
+    """
+    payload = request.get_json(force=True) or {}
+    query = str(payload.get("query", "")).strip()
+    language = (payload.get("language") or "en").lower()
+
+    # Use provided key; do not hardcode defaults to avoid leaking secrets
+    groq_api_key = os.getenv("GROQ_API_KEY")
+
+    if payload.get("stream") or "text/event-stream" in request.headers.get("Accept", ""):
+        if ai_bulkhead.try_acquire():
+            events = ai_bulkhead.guard(stream_answer(query, language, groq_api_key))
+        else:
+            # Too many AI requests in flight: stream the offline answer right away.
+            events = stream_answer(query, language, None)
+        return Response(
+            stream_with_context(events),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    if not groq_api_key:
+        fallbacks.inc("ask_ai_no_key")
+        return jsonify({"response": offline_answer(query)})
+
+    # Repeated questions are answered from the cache, even while Groq is down.
+    cached = ai_cache.get("ask", language, query)
+    if cached:
+        return jsonify({"response": cached})
+
+    # If Groq is failing, or this worker already has AI_MAX_CONCURRENCY calls
+    # waiting on it, provide a graceful offline fallback
+    if not groq_upstream.available() or not ai_bulkhead.try_acquire():
+        fallbacks.inc("ask_ai")
+        return jsonify({"response": offline_answer(query)})
+
+    mode = "chain" if ASK_AI_TRANSLATION == "chain" else "direct"
+    started = time.perf_counter()
+    try:
+        if mode == "chain":
+            answer = answer_chain(query, language, groq_api_key)
+        else:
+            answer = answer_direct(query, language, groq_api_key)
+    except UpstreamUnavailable:
+        fallbacks.inc("ask_ai")
+        return jsonify({"response": offline_answer(query)})
+    finally:
+        ai_bulkhead.release()
+    record_ask_ai_latency(language, mode, time.perf_counter() - started)
+    ai_cache.set("ask", language, query, answer)
 
     return jsonify({"response": answer or "Sorry, I couldn't generate a response."})
 
@@ -320,8 +981,11 @@ def api_impact_details():
 
     Accepts velocity_kms, mass_kg, diameter_m, density_kg_m3 (optional), and target ("ground"|"air"|"water").
     Returns: momentum, energy_j, energy_mt, crater_depth_m, displacement_m (very rough), seismic_mag (Mw estimate), blast_radius_km
+    With "mode": "uncertainty" the request is handled by /api/impact/uncertainty instead.
     """
     payload = request.get_json() or {}
+    if payload.get("mode") == "uncertainty":
+        return api_impact_uncertainty()
     try:
         # If asteroid_name provided, attempt to pull values from load_asteroids()
         asteroid_name = payload.get("asteroid_name")
@@ -332,12 +996,7 @@ def api_impact_details():
         target = payload.get("target", "ground")
 
         if asteroid_name and (not v_kms or not mass_kg or not diameter_m):
-            asts = load_asteroids()
-            found = None
-            for a in asts:
-                if str(a.get("label", "")).lower() == str(asteroid_name).lower() or str(a.get("name", "")).lower() == str(asteroid_name).lower():
-                    found = a
-                    break
+            found = get_asteroid_index().get(asteroid_name)
             if found:
                 v_kms = v_kms or found.get("velocity_kms") or found.get("velocity") or 20.0
                 diameter_m = diameter_m or found.get("diameter_m") or found.get("size") or None
@@ -346,9 +1005,7 @@ def api_impact_details():
                     if diameter_m:
                         # assume diameter_m in meters
                         try:
-                            rho = 3000.0
-                            r = float(diameter_m) / 2.0
-                            mass_kg = (4.0 / 3.0) * math.pi * (r ** 3) * rho
+                            mass_kg = physics.sphere_mass(diameter_m)
                         except Exception:
                             mass_kg = 1e9
                     else:
@@ -361,40 +1018,237 @@ def api_impact_details():
     except Exception:
         return jsonify({"status": "error", "message": "Invalid numeric input or missing asteroid data"}), 400
 
-    v_ms = v_kms * 1000.0
-    momentum = mass_kg * v_ms
-    energy_j = 0.5 * mass_kg * v_ms * v_ms
-    energy_mt = energy_j / 4.184e15
-
-    # Crater depth heuristic scaling (demo only)
-    crater_depth_m = 0.2 * (diameter_m ** 0.33) * ((energy_j / 1e15) ** 0.12) * 10
-
-    # Displacement (surface displacement) rough estimate: proportional to energy and inversely to area
-    footprint_area = math.pi * (diameter_m ** 2)
-    displacement_m = (energy_j / 1e9) / max(1.0, footprint_area ** 0.5)
-
-    # Seismic magnitude estimate (very rough): empirical scaling with energy
-    seismic_mag = max(0.0, 0.5 + math.log10(energy_j) * 0.166)
-
-    # Blast radius: scaling with energy, approximate in km
-    blast_radius_km = max(0.1, (energy_j / 1e15) ** 0.33 * 10)
+    m = physics.impact_metrics(v_kms, mass_kg, diameter_m, density)
 
     response = {
         "status": "ok",
         "input": {"velocity_kms": v_kms, "mass_kg": mass_kg, "diameter_m": diameter_m, "density_kg_m3": density, "target": target},
-        "momentum": momentum,
-        "impact_energy_j": energy_j,
-        "impact_energy_mt": energy_mt,
-        "crater_depth_m": crater_depth_m,
-        "crater_diameter_km": max(0.001, (crater_depth_m * 3) / 1000.0),
-        "displacement_m": displacement_m,
-        "seismic_magnitude_mw": seismic_mag,
-        "blast_radius_km": blast_radius_km,
-        "summary_text": f"Estimated impact energy: {energy_j:.3e} J ({energy_mt:.3f} Mt). Approx. crater diameter {max(0.001, (crater_depth_m * 3) / 1000.0):.3f} km.",
+        "momentum": m["momentum"],
+        "impact_energy_j": m["impact_energy_j"],
+        "impact_energy_mt": m["impact_energy_mt"],
+        "crater_depth_m": m["crater_depth_m"],
+        "crater_diameter_km": m["crater_diameter_km"],
+        "displacement_m": m["displacement_m"],
+        "seismic_magnitude_mw": m["seismic_magnitude_mw"],
+        "blast_radius_km": m["blast_radius_km"],
+        "summary_text": f"Estimated impact energy: {m['impact_energy_j']:.3e} J ({m['impact_energy_mt']:.3f} Mt). Approx. crater diameter {m['crater_diameter_km']:.3f} km.",
     }
     return jsonify(response)
 
 
+# At most this many Monte Carlo runs per process; each one already fans out to the pool.
+mc_bulkhead = Bulkhead("monte_carlo", int(os.environ.get("MC_MAX_CONCURRENCY", 2)))
+
+
+def catalog_diameter_m(found):
+    """Diameter in meters for a catalog entry; `size` and `estimated_diameter_km` are in km."""
+    dmin, dmax = found.get("diameter_min_m"), found.get("diameter_max_m")
+    if found.get("diameter_m"):
+        return found["diameter_m"]
+    if dmin and dmax:
+        return (dmin + dmax) / 2
+    if dmin or dmax:
+        return dmin or dmax
+    km = found.get("estimated_diameter_km") or found.get("size")
+    return km * 1000.0 if km else None
+
+
+def catalog_uncertainty_defaults(asteroid_name):
+    """Distribution inputs for a catalog asteroid: NeoWs diameter range and approach velocity."""
+    found = get_asteroid_index().get(asteroid_name) if asteroid_name else None
+    if not found:
+        return {}
+    return {
+        "diameter_min_m": found.get("diameter_min_m"),
+        "diameter_max_m": found.get("diameter_max_m"),
+        "diameter_m": catalog_diameter_m(found),
+        "velocity_kms": found.get("velocity_kms") or found.get("velocity") or 20.0,
+    }
+
+
+def iter_uncertainty_ndjson(runs, requested):
+    """NDJSON progress lines (percentiles only) at most every MC_PROGRESS_INTERVAL, then the full result."""
+    summary = None
+    last_sent = time.perf_counter()
+    for summary in runs:
+        now = time.perf_counter()
+        if now - last_sent >= MC_PROGRESS_INTERVAL:
+            last_sent = now
+            yield json.dumps({**summary.to_dict(complete=False, histogram=False), "partial": True}) + "\n"
+    if summary is None:
+        return
+    yield json.dumps(summary.to_dict(complete=summary.samples >= requested)) + "\n"
+
+
+@app.route("/api/impact/uncertainty", methods=["POST"])
+def api_impact_uncertainty():
+    """Monte Carlo impact outcomes over uncertain diameter, density and velocity.
+
+    Request JSON: asteroid_name (fills diameter range and velocity from the catalog) and/or
+    diameter_min_m + diameter_max_m | diameter_m (+ diameter_spread, default 0.25),
+    velocity_kms (+ velocity_sd_kms, default 10%), density_kg_m3 (default 3000, + density_sd, default 25%),
+    samples (default 100000), time_budget_s, seed, stream (NDJSON progress; also Accept: application/x-ndjson).
+    Response: percentiles, mean/std/min/max and histograms for impact energy, crater diameter,
+    seismic magnitude and blast radius; "complete" is false when the time budget cut the run short.
+    """
+    import impact_uncertainty
+
+    payload = request.get_json(silent=True) or {}
+    try:
+        defaults = catalog_uncertainty_defaults(payload.get("asteroid_name") or payload.get("name"))
+        model = impact_uncertainty.UncertaintyModel.from_payload(payload, defaults)
+        samples = int(payload.get("samples", 100_000))
+        budget = float(payload.get("time_budget_s", MC_TIME_BUDGET))
+        seed = payload.get("seed")
+        # SeedSequence rejects negative seeds, and a stream would already have started by then.
+        if seed is not None and (type(seed) is not int or seed < 0):
+            raise impact_uncertainty.UncertaintyError("seed must be a non-negative integer")
+    except (impact_uncertainty.UncertaintyError, TypeError, ValueError) as e:
+        message = str(e) if isinstance(e, impact_uncertainty.UncertaintyError) else "Invalid numeric input"
+        return jsonify({"status": "error", "message": message}), 400
+    if not (1 <= samples <= MC_MAX_SAMPLES):
+        return jsonify({"status": "error", "message": f"samples must be 1..{MC_MAX_SAMPLES}"}), 400
+    budget = max(0.1, min(budget, MC_MAX_TIME_BUDGET))
+
+    if not mc_bulkhead.try_acquire():
+        return jsonify({"status": "error", "message": "Too many uncertainty runs in progress; retry shortly"}), 429
+    runs = impact_uncertainty.iter_run(model, samples, budget, seed=seed, workers=MC_WORKERS)
+    stream = payload.get("stream") or "application/x-ndjson" in request.headers.get("Accept", "")
+    if stream:
+        body = mc_bulkhead.guard(iter_uncertainty_ndjson(runs, samples))
+        return Response(stream_with_context(body), mimetype="application/x-ndjson")
+    try:
+        summary = None
+        for summary in runs:
+            pass
+        return jsonify(summary.to_dict(complete=summary.samples >= samples))
+    finally:
+        mc_bulkhead.release()
+
+
+tile_cache = None
+
+
+def get_tile_cache():
+    global tile_cache
+    if tile_cache is None:
+        import damage_tiles
+
+        tile_cache = damage_tiles.TileCache(int(os.environ.get("TILE_CACHE_MB", 64)) * 1024 * 1024)
+    return tile_cache
+
+
+def damage_scenario(params):
+    """(DamageScenario, impact inputs) from request params; raises ValueError on bad input."""
+    import damage_tiles
+
+    lat = float(params["lat"])
+    lon = float(params["lon"])
+    if not (-85.06 <= lat <= 85.06 and -180 <= lon <= 180):
+        raise ValueError("lat must be within +/-85.06 and lon within +/-180")
+    v_kms = params.get("velocity_kms")
+    diameter_m = params.get("diameter_m")
+    if params.get("asteroid_name") and (not v_kms or not diameter_m):
+        found = get_asteroid_index().get(params["asteroid_name"]) or {}
+        v_kms = v_kms or found.get("velocity_kms") or found.get("velocity") or 20.0
+        diameter_m = diameter_m or catalog_diameter_m(found)
+    v_kms = float(v_kms)
+    diameter_m = float(diameter_m)
+    density = float(params.get("density_kg_m3") or physics.DEFAULT_DENSITY)
+    if not (v_kms > 0 and diameter_m > 0 and density > 0):
+        raise ValueError("velocity_kms, diameter_m and density_kg_m3 must be positive")
+    inputs = {"lat": lat, "lon": lon, "velocity_kms": v_kms, "diameter_m": diameter_m, "density_kg_m3": density}
+    m = physics.impact_metrics(v_kms, physics.sphere_mass(diameter_m, density), diameter_m, density)
+    return damage_tiles.DamageScenario.from_metrics(lat, lon, m), inputs
+
+
+@app.route("/api/damage/scenario", methods=["POST"])
+def api_damage_scenario():
+    """Damage zones and the tile URL template for an impact scenario.
+
+    Request JSON: lat, lon, and velocity_kms + diameter_m (+ density_kg_m3) or asteroid_name.
+    The tile URL carries the scenario in its query string so any worker can render it.
+    """
+    payload = request.get_json(silent=True) or {}
+    try:
+        scenario, inputs = damage_scenario(payload)
+    except (KeyError, TypeError, ValueError) as e:
+        message = str(e) if isinstance(e, ValueError) and str(e) else "lat, lon, velocity_kms and diameter_m are required"
+        return jsonify({"status": "error", "message": message}), 400
+    query = "&".join(f"{k}={v:.5f}" if k in ("lat", "lon") else f"{k}={v:.6g}" for k, v in inputs.items())
+    return jsonify({
+        "status": "ok",
+        "scenario": scenario.key,
+        "input": inputs,
+        "zones": {
+            "crater_radius_km": scenario.crater_radius_km,
+            "blast_radius_km": scenario.blast_radius_km,
+            "cutoff_km": scenario.cutoff_km,
+        },
+        "suggested_zoom": scenario.suggested_zoom(),
+        "tile_url": "/api/damage/tiles/{z}/{x}/{y}.png?" + query,
+    })
+
+
+@app.route("/api/damage/tiles/<int:z>/<int:x>/<int:y>.png", methods=["GET"])
+def api_damage_tile(z, x, y):
+    """256 px RGBA PNG of damage intensity for tile z/x/y; scenario params as in /api/damage/scenario."""
+    import damage_tiles
+
+    if not (0 <= z <= damage_tiles.MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return jsonify({"status": "error", "message": "Tile out of range"}), 400
+    try:
+        scenario, _ = damage_scenario(request.args)
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"status": "error", "message": "Invalid scenario parameters"}), 400
+
+    # A tile is fully determined by the scenario and its coordinates.
+    etag = f'"{scenario.key}-{z}-{x}-{y}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=86400, immutable"}
+    if request.headers.get("If-None-Match") == etag:
+        return Response(status=304, headers=headers)
+    return Response(get_tile_cache().get(scenario, z, x, y), mimetype="image/png", headers=headers)
+
+
+# Canned explanations: the general terms plus the metric labels in impact-summary.tsx.
+CANNED_EXPLANATIONS = {
+    "asteroid": "Asteroids are small rocky bodies orbiting the Sun. Many are found in the main asteroid belt between Mars and Jupiter.",
+    "impact": "An impact occurs when an object collides with a planet. Key metrics include kinetic energy, momentum, and crater size.",
+    "neocp": "NEO (Near-Earth Object) is an asteroid or comet whose orbit brings it close to Earth's orbit.",
+    "impact energy": "Impact energy is the asteroid's kinetic energy, E = ½ m v², shown in megatons of TNT (1 Mt = 4.184×10¹⁵ J).",
+    "crater depth": "Crater depth is a rough scaling estimate that grows with the impactor's diameter and, more slowly, with impact energy.",
+    "displacement": "Displacement estimates how far the ground surface is pushed, scaling with impact energy spread over the impactor's footprint.",
+    "seismic magnitude": "Seismic magnitude (Mw) converts impact energy to an earthquake-like magnitude on a logarithmic scale.",
+}
+# Terms warmed into the AI cache at startup when AI_EXPLAIN_PRECOMPUTE is set.
+PRECOMPUTE_TERMS = tuple(CANNED_EXPLANATIONS)
+
+
+def groq_explain(term, api_key):
+    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+    body = {"prompt": f"Explain the astronomy term: {term}", "max_tokens": 200}
+    r = groq_explain_upstream.request("POST", GROQ_EXPLAIN_URL, headers=headers, json=body, timeout=8)
+    r.raise_for_status()
+    out = r.json()
+    ai_cache.set("explain", "en", term, json.dumps(out))
+    return out
+
+
+def precompute_explanations(terms=PRECOMPUTE_TERMS):
+    api_key = os.environ.get("GROQ_API_KEY")
+    if not api_key:
+        return
+    for term in terms:
+        if ai_cache.get("explain", "en", term) is not None:
+            continue
+        try:
+            groq_explain(term, api_key)
+        except Exception:
+            # Best effort: the request path retries on demand.
+            load_failures.inc("ai_explain_precompute")
+            continue
+
+
 @app.route("/api/ai-explain", methods=["POST"])
 def api_ai_explain():
     payload = request.get_json() or {}
@@ -403,27 +1257,88 @@ def api_ai_explain():
     # If a GROQ_API_KEY env var exists, attempt to call the Groq LLM (optional).
     groq_key = os.environ.get("GROQ_API_KEY")
     if groq_key:
+        cached = ai_cache.get("explain", "en", term)
+        if cached:
+            return jsonify({"status": "ok", "term": term, "explanation": json.loads(cached)})
+    if groq_key and groq_explain_upstream.available() and ai_bulkhead.try_acquire():
         try:
-            import requests
-
-            url = "https://api.groq.ai/v1/engines/default/completions"
-            headers = {"Authorization": f"Bearer {groq_key}", "Content-Type": "application/json"}
-            body = {"prompt": f"Explain the astronomy term: {term}", "max_tokens": 200}
-            r = requests.post(url, headers=headers, json=body, timeout=8)
-            r.raise_for_status()
-            out = r.json()
+            out = groq_explain(term, groq_key)
             return jsonify({"status": "ok", "term": term, "explanation": out})
+        except UpstreamUnavailable:
+            # Upstream is failing; fall through to the canned explanation below.
+            pass
         except Exception as e:
             return jsonify({"status": "error", "message": "External LLM call failed", "detail": str(e)}), 500
+        finally:
+            ai_bulkhead.release()
 
     # Fallback canned explanation
-    canned = {
-        "asteroid": "Asteroids are small rocky bodies orbiting the Sun. Many are found in the main asteroid belt between Mars and Jupiter.",
-        "impact": "An impact occurs when an object collides with a planet. Key metrics include kinetic energy, momentum, and crater size.",
-        "neocp": "NEO (Near-Earth Object) is an asteroid or comet whose orbit brings it close to Earth's orbit.",
-    }
+    fallbacks.inc("ai_explain")
+    canned = CANNED_EXPLANATIONS
+    return jsonify({"status": "ok", "term": term, "explanation": canned.get(str(term).lower(), canned["asteroid"])})
+
+
+def collect_upstream_metrics():
+    """Per-upstream counters, breaker state and latency histograms from upstream.py."""
+    lines = []
+    stats = upstream_stats()
+    for field, help in (("requests", "Upstream HTTP attempts."), ("errors", "Failed upstream attempts."),
+                        ("retried", "Upstream retries."), ("rejected", "Calls refused by the breaker or slot limit.")):
+        name = f"neotrack_upstream_{field}_total"
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} counter"]
+        lines += [f'{name}{{upstream="{u}"}} {s[field]}' for u, s in sorted(stats.items())]
+    lines.append("# TYPE neotrack_upstream_circuit_open gauge")
+    lines += [f'neotrack_upstream_circuit_open{{upstream="{u}"}} {int(s["circuit"] == "open")}'
+              for u, s in sorted(stats.items())]
+    name = "neotrack_upstream_request_duration_seconds"
+    lines += [f"# HELP {name} Upstream attempt latency.", f"# TYPE {name} histogram"]
+    for u, s in sorted(stats.items()):
+        lines += metrics.render_histogram(name, ("upstream",), (u,), s["latency_seconds"])
+    name = "neotrack_ask_ai_duration_seconds"
+    lines += [f"# HELP {name} Time to answer /api/ask-ai by language/mode.", f"# TYPE {name} histogram"]
+    for key, hist in sorted(list(ask_ai_latency.items())):
+        lines += metrics.render_histogram(name, ("key",), (key,), hist.snapshot())
+    return lines
+
+
+metrics_registry.collect(collect_upstream_metrics)
+metrics_registry.collect_stats("asteroid_cache", lambda: asteroid_cache.stats())
+metrics_registry.collect_stats("impact_memo", lambda: physics.memo_stats())
+metrics_registry.collect_stats("ai_cache", lambda: ai_cache.stats())
+metrics_registry.collect_stats("ai_bulkhead", lambda: ai_bulkhead.stats())
+metrics_registry.collect_stats("mc_bulkhead", lambda: mc_bulkhead.stats())
+metrics_registry.collect_stats("screening_cache", lambda: screening_cache and screening_cache.stats())
+metrics_registry.collect_stats("tile_cache", lambda: tile_cache and tile_cache.stats())
+metrics_registry.collect_stats("neo_store", lambda: get_neo_store() and get_neo_store().stats())
+if profiler is not None:
+    metrics_registry.collect_stats("profiler", profiler.stats)
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Prometheus text exposition of request, upstream, fallback and cache metrics for this worker."""
+    return Response(metrics_registry.render(), content_type=metrics.CONTENT_TYPE, headers={"Cache-Control": "no-store"})
+
+
+@app.route("/debug/profiles", methods=["GET"])
+def debug_profiles():
+    """Slow-request profiles captured in this worker (needs PROFILE_SLOW_MS)."""
+    if profiler is None:
+        return jsonify({"status": "error", "message": "Profiling is disabled; set PROFILE_SLOW_MS"}), 404
+    return jsonify({"status": "ok", **profiler.stats(), "profiles": profiler.list()})
+
+
+@app.route("/debug/profiles/<int:profile_id>", methods=["GET"])
+def debug_profile(profile_id):
+    """pstats report (top functions by cumulative time) of one captured profile."""
+    entry = profiler.get(profile_id) if profiler is not None else None
+    if entry is None:
+        return jsonify({"status": "error", "message": "Profile not found"}), 404
+    return Response(entry["report"], mimetype="text/plain")
+
 
-    return jsonify({"status": "ok", "term": term, "explanation": canned.get(term.lower(), canned["asteroid"])})
+if os.environ.get("AI_EXPLAIN_PRECOMPUTE"):
+    threading.Thread(target=precompute_explanations, name="ai-explain-precompute", daemon=True).start()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,222 @@
+"""Process-wide asteroid catalog cache.
+
+The catalog is served from memory for `ttl` seconds. Once it goes stale the
+old copy keeps being served while a single background thread refreshes it
+(stale-while-revalidate), so request handlers never wait on NASA after the
+first load. Every successful upstream fetch is also written to a JSON
+snapshot on disk; other gunicorn workers pick that snapshot up on their first
+request instead of fetching the catalog themselves. An optional `prepare`
+converts every catalog (fetched, snapshot or fallback) into the form that is
+served, and `encode` writes that form back out as the snapshot's JSON array.
+When `encode` returns None the catalog is already shared some other way and
+any existing snapshot is removed, so cold starts go straight to `fetch`.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class AsteroidCache:
+    def __init__(self, fetch, fallback, ttl=600.0, snapshot_path=None, prepare=None, encode=None):
+        # fetch() returns the upstream catalog list, or None/raises when the
+        # upstream is unavailable. fallback() builds a local catalog and is
+        # only used when neither memory nor disk hold a previous good copy.
+        # prepare(data) -> served catalog; encode(catalog) -> JSON array bytes,
+        # or None for a catalog that needs no snapshot.
+        self._fetch = fetch
+        self._fallback = fallback
+        self._prepare = prepare
+        self._encode = encode
+        self.ttl = float(ttl)
+        self.snapshot_path = snapshot_path
+
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._data = None
+        self._loaded_at = 0.0
+        self._is_fallback = False
+        self._refreshing = False
+        self.version = 0
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.refresh_errors = 0
+        self.last_error = None
+        self.last_refresh_seconds = None
+        self.total_refresh_seconds = 0.0
+
+    # -- public API -------------------------------------------------------
+
+    def get(self):
+        """Return the cached catalog, loading it synchronously only on a cold start."""
+        with self._lock:
+            data = self._data
+            if data is not None:
+                if self._is_fresh():
+                    self.hits += 1
+                    return data
+                self.stale_hits += 1
+                self._start_background_refresh()
+                return data
+            self.misses += 1
+
+        # Cold start: load once, even if several threads miss together.
+        with self._load_lock:
+            with self._lock:
+                if self._data is not None:
+                    return self._data
+
+            # Prefer the snapshot another worker left on disk.
+            snapshot = self._read_snapshot()
+            if snapshot is not None:
+                data, saved_at = self._prepared(snapshot[0]), snapshot[1]
+                with self._lock:
+                    self._store(data, saved_at)
+                    if not self._is_fresh():
+                        self._start_background_refresh()
+                    return data
+
+            self.refresh(force=True)
+            with self._lock:
+                return self._data
+
+    def refresh(self, force=False):
+        """Fetch from upstream now; keep the previous copy if that fails.
+
+        Unless `force` is set, a snapshot that another worker refreshed within
+        the TTL is adopted instead of calling the upstream again.
+        """
+        if not force:
+            snapshot = self._read_snapshot()
+            if snapshot is not None and (time.time() - snapshot[1]) < self.ttl:
+                data = self._prepared(snapshot[0])
+                with self._lock:
+                    if snapshot[1] > self._loaded_at or self._data is None:
+                        self._store(data, snapshot[1])
+                    self._refreshing = False
+                return
+
+        started = time.perf_counter()
+        data = None
+        error = None
+        try:
+            # Convert outside the lock so readers keep getting the old copy meanwhile.
+            data = self._prepared(self._fetch())
+        except Exception as e:
+            data = None
+            error = f"{type(e).__name__}: {e}"
+        elapsed = time.perf_counter() - started
+        if error is not None:
+            log.warning("asteroid catalog refresh failed after %.2fs: %s", elapsed, error)
+
+        with self._lock:
+            self.refreshes += 1
+            self.last_refresh_seconds = elapsed
+            self.total_refresh_seconds += elapsed
+            if error is not None:
+                self.refresh_errors += 1
+                self.last_error = error
+            if data:
+                self._store(data, time.time())
+            else:
+                self.refresh_failures += 1
+                if self._data is None:
+                    self._store(self._prepared(self._fallback()), time.time(), is_fallback=True)
+                else:
+                    # Serve the last good copy for another full TTL rather
+                    # than hammering a failing upstream on every request.
+                    self._loaded_at = time.time()
+            self._refreshing = False
+        if data:
+            self._write_snapshot(data)
+
+    def invalidate(self):
+        with self._lock:
+            self._data = None
+            self._loaded_at = 0.0
+
+    def stats(self):
+        with self._lock:
+            served = self.hits + self.stale_hits + self.misses
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.stale_hits) / served if served else None,
+                "refreshes": self.refreshes,
+                "refresh_failures": self.refresh_failures,
+                "refresh_errors": self.refresh_errors,
+                "last_error": self.last_error,
+                "last_refresh_seconds": self.last_refresh_seconds,
+                "avg_refresh_seconds": self.total_refresh_seconds / self.refreshes if self.refreshes else None,
+                "age_seconds": time.time() - self._loaded_at if self._data is not None else None,
+                "ttl_seconds": self.ttl,
+                "version": self.version,
+                "size": len(self._data) if self._data is not None else 0,
+                "is_fallback": self._is_fallback,
+            }
+
+    def _prepared(self, data):
+        return self._prepare(data) if data and self._prepare is not None else data
+
+    # -- internals (callers hold self._lock) ------------------------------
+
+    def _is_fresh(self):
+        return (time.time() - self._loaded_at) < self.ttl
+
+    def _store(self, data, loaded_at, is_fallback=False):
+        # A fetch may hand back the object already held (an unchanged catalog); that is not a new version.
+        if data is not self._data:
+            self.version += 1
+        self._data = data
+        self._loaded_at = loaded_at
+        self._is_fallback = is_fallback
+
+    def _start_background_refresh(self):
+        if self._refreshing:
+            return
+        self._refreshing = True
+        t = threading.Thread(target=self.refresh, name="asteroid-cache-refresh", daemon=True)
+        t.start()
+
+    def _read_snapshot(self):
+        if not self.snapshot_path:
+            return None
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snap = json.load(f)
+            data = snap.get("data")
+            if not data:
+                return None
+            return data, float(snap.get("saved_at", 0))
+        except (OSError, ValueError, TypeError, AttributeError):
+            return None
+
+    def _write_snapshot(self, data):
+        if not self.snapshot_path:
+            return
+        # Write to a temp file and rename so other workers never read a
+        # half-written snapshot.
+        tmp = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        try:
+            body = self._encode(data) if self._encode is not None else json.dumps(data).encode("utf-8")
+            if body is None:
+                # Drop an older snapshot too, or cold starts would keep adopting it.
+                if os.path.exists(self.snapshot_path):
+                    os.remove(self.snapshot_path)
+                return
+            with open(tmp, "wb") as f:
+                f.write(b'{"saved_at": ' + repr(time.time()).encode("ascii") + b', "data": ' + body + b"}")
+            os.replace(tmp, self.snapshot_path)
+        except (OSError, TypeError, ValueError):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
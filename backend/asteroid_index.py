@@ -0,0 +1,105 @@
+"""In-memory lookup index over the asteroid catalog.
+
+Built once per catalog version: exact lookups by normalized name,
+`neo_reference_id` or id are dict hits, prefix search is a bisect over the
+sorted names, and fuzzy search falls back to difflib. difflib only scores
+the names sharing the most character trigrams with the query, not the whole
+catalog, and queries shorter than FUZZY_MIN_LENGTH skip it. The index keeps
+row positions, not rows, so an array-backed catalog only builds the rows it
+returns.
+"""
+import bisect
+import difflib
+import re
+from collections import Counter
+
+_WS = re.compile(r"\s+")
+FUZZY_MIN_LENGTH = 3
+# Names handed to difflib per fuzzy query, best trigram overlap first.
+FUZZY_CANDIDATES = 500
+
+
+def trigrams(key):
+    padded = f" {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def normalize_name(value):
+    """Lowercase, strip and collapse whitespace; '(2004 MN4)' style parentheses are dropped."""
+    text = str(value or "").strip().lower().replace("(", " ").replace(")", " ")
+    return _WS.sub(" ", text).strip()
+
+
+class AsteroidIndex:
+    def __init__(self, asteroids, version=None):
+        self.version = version
+        self._rows = asteroids
+        self._by_key = {}
+        names = {}
+        for pos, a in enumerate(asteroids):
+            for field in ("label", "name"):
+                key = normalize_name(a.get(field))
+                if key:
+                    self._by_key.setdefault(key, pos)
+                    names.setdefault(key, pos)
+            for field in ("neo_reference_id", "id"):
+                value = a.get(field)
+                if value is not None and value != "":
+                    self._by_key.setdefault(normalize_name(value), pos)
+        self._names = sorted(names)
+        self._name_rows = names
+        self._trigrams = {}
+        for i, name in enumerate(self._names):
+            for gram in trigrams(name):
+                self._trigrams.setdefault(gram, []).append(i)
+
+    def __len__(self):
+        return len(self._name_rows)
+
+    def get(self, key):
+        """Exact match on name, label, neo_reference_id or id."""
+        pos = self._by_key.get(normalize_name(key))
+        return None if pos is None else self._rows[pos]
+
+    def prefix(self, text, limit=10):
+        """Asteroids whose normalized name starts with `text`, in name order."""
+        return [self._rows[pos] for pos in self._prefix(text, limit)]
+
+    def _prefix(self, text, limit):
+        prefix = normalize_name(text)
+        if not prefix:
+            return []
+        out = []
+        i = bisect.bisect_left(self._names, prefix)
+        while i < len(self._names) and len(out) < limit and self._names[i].startswith(prefix):
+            out.append(self._name_rows[self._names[i]])
+            i += 1
+        return out
+
+    def fuzzy(self, text, limit=10, cutoff=0.6):
+        """Closest names by difflib similarity ratio."""
+        return [self._rows[pos] for pos in self._fuzzy(text, limit, cutoff)]
+
+    def _fuzzy(self, text, limit, cutoff=0.6):
+        key = normalize_name(text)
+        if len(key) < FUZZY_MIN_LENGTH:
+            return []
+        shared = Counter()
+        for gram in trigrams(key):
+            shared.update(self._trigrams.get(gram, ()))
+        candidates = [self._names[i] for i, _ in shared.most_common(FUZZY_CANDIDATES)]
+        matches = difflib.get_close_matches(key, candidates, n=limit, cutoff=cutoff)
+        return [self._name_rows[m] for m in matches]
+
+    def search(self, text, limit=10):
+        """Autocomplete: prefix matches first, topped up with fuzzy matches."""
+        out = self._prefix(text, limit)
+        if len(out) < limit:
+            seen = set(out)
+            for pos in self._fuzzy(text, limit):
+                if pos not in seen:
+                    out.append(pos)
+                    seen.add(pos)
+                if len(out) >= limit:
+                    break
+        return [self._rows[pos] for pos in out]
@@ -0,0 +1,217 @@
+"""Microbenchmarks for the catalog load path and the /api/asteroids response.
+
+Usage (from backend/):
+    python benchmarks/bench_api.py [--size 2000] [--out results.json] [--quick]
+
+Covers catalog normalization (NeoWs record parsing, the NeoWs browse page
+mapping, reading the catalog back from the SQLite store as rows, as columns
+and from the memory-mapped column file, the dropdown list), serialization of
+the /api/asteroids body (stdlib json over row dicts, for comparison, then the
+columnar encoders and the binary layout) with and without its compressed
+variants, and the full handler through the Flask test client for a cold
+build, a warm 200 and a 304 revalidation.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_physics import measure  # noqa: E402
+from stubs import neows_object  # noqa: E402
+
+
+def bench_parse_neo(objects, calls):
+    from neo_store import parse_neo
+
+    return measure(lambda: [parse_neo(n) for n in objects], calls, items_per_call=len(objects))
+
+
+class _PageResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+def bench_fetch_mapping(objects, calls):
+    """fetch_nasa_asteroids' mapping of one decoded NeoWs browse page (no network)."""
+    import app as backend
+
+    page = {"near_earth_objects": objects[:20]}
+    saved = backend.nasa_upstream.request, os.environ.get("NASA_API_KEY")
+    backend.nasa_upstream.request = lambda *args, **kwargs: _PageResponse(page)
+    os.environ["NASA_API_KEY"] = "bench"
+    try:
+        return measure(backend.fetch_nasa_asteroids, calls, items_per_call=len(page["near_earth_objects"]))
+    finally:
+        del backend.nasa_upstream.request
+        if saved[1] is None:
+            os.environ.pop("NASA_API_KEY", None)
+        else:
+            os.environ["NASA_API_KEY"] = saved[1]
+
+
+def bench_store_load(objects, calls):
+    from neo_store import NeoStore
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = NeoStore(os.path.join(tmp, "neo.sqlite3"))
+        try:
+            store.upsert(objects)
+            return measure(store.load_catalog, calls, items_per_call=len(objects))
+        finally:
+            store.close()
+
+
+def bench_store_columns(objects, calls):
+    from neo_store import NeoStore
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = NeoStore(os.path.join(tmp, "neo.sqlite3"))
+        cache_path = os.path.join(tmp, "catalog.cols")
+        try:
+            store.upsert(objects)
+            store.load_columns(cache_path)
+            return {
+                "store_load_columns": measure(store.load_columns, calls, items_per_call=len(objects)),
+                "store_load_columns_mmap": measure(
+                    lambda: store.load_columns(cache_path), calls, items_per_call=len(objects)),
+            }
+        finally:
+            store.close()
+
+
+def catalog_for(objects):
+    from neo_store import NeoStore
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = NeoStore(os.path.join(tmp, "neo.sqlite3"))
+        try:
+            store.upsert(objects)
+            return store.load_catalog()
+        finally:
+            store.close()
+
+
+def bench_serialize(catalog, calls):
+    import app as backend
+    from catalog_columns import CatalogColumns
+    from prepared_payload import PreparedPayload
+
+    n = len(catalog)
+    columns = CatalogColumns.from_records(catalog)
+    body = {"status": "ok", "data": catalog, "list": list(backend.simplify_asteroids(columns))}
+    encoded = json.dumps(body, separators=(",", ":")).encode("utf-8")
+    return {
+        "columns_from_records": measure(lambda: CatalogColumns.from_records(catalog), calls, items_per_call=n),
+        "simplify": measure(lambda: backend.simplify_asteroids(columns), calls, items_per_call=n),
+        "json_dumps": {
+            **measure(lambda: json.dumps(body, separators=(",", ":")), calls, items_per_call=n),
+            "bytes": len(encoded),
+        },
+        "encode_rows": {
+            **measure(lambda: backend.build_asteroids_payload(columns, "json").body, calls, items_per_call=n),
+            "bytes": len(backend.build_asteroids_payload(columns, "json").body),
+        },
+        "encode_columns": {
+            **measure(lambda: backend.build_asteroids_payload(columns, "columns").body, calls, items_per_call=n),
+            "bytes": len(backend.build_asteroids_payload(columns, "columns").body),
+        },
+        "encode_bin": {
+            **measure(columns.to_bytes, calls, items_per_call=n),
+            "bytes": len(columns.to_bytes()),
+        },
+        "prepare_payload": measure(lambda: PreparedPayload(encoded), calls, items_per_call=n),
+    }
+
+
+def bench_endpoint(catalog, calls):
+    import app as backend
+    from catalog_columns import CatalogColumns
+
+    client = backend.app.test_client()
+    saved = backend.load_asteroids
+    # The asteroid cache holds the catalog as columns.
+    columns = CatalogColumns.from_records(catalog)
+    holder = {"data": columns}
+    backend.load_asteroids = lambda: holder["data"]
+    try:
+        def cold():
+            # A new catalog object forces the prepared payload to be rebuilt.
+            holder["data"] = CatalogColumns(columns.columns, columns.count)
+            client.get("/api/asteroids")
+
+        results = {"cold": measure(cold, max(1, calls // 4))}
+        res = client.get("/api/asteroids")
+        etag = res.headers["ETag"]
+        results["warm_200"] = {
+            **measure(lambda: client.get("/api/asteroids"), calls, repeat=15),
+            "bytes": len(res.get_data()),
+        }
+        gzip = {"Accept-Encoding": "gzip"}
+        results["warm_gzip"] = measure(lambda: client.get("/api/asteroids", headers=gzip), calls, repeat=15)
+        revalidate = {"If-None-Match": etag}
+        results["revalidate_304"] = measure(lambda: client.get("/api/asteroids", headers=revalidate), calls, repeat=15)
+        for fmt in ("columns", "bin"):
+            url = f"/api/asteroids?format={fmt}"
+            results[f"warm_{fmt}"] = {
+                **measure(lambda: client.get(url), calls, repeat=15),
+                "bytes": len(client.get(url).get_data()),
+            }
+        return results
+    finally:
+        backend.load_asteroids = saved
+
+
+def run(size=2000, quick=False):
+    scale = 5 if quick else 1
+    objects = [neows_object(i) for i in range(size)]
+    catalog = catalog_for(objects)
+    results = {
+        "parse_neo": bench_parse_neo(objects, max(1, 10 // scale)),
+        "fetch_nasa_mapping": bench_fetch_mapping(objects, max(50, 500 // scale)),
+        "store_load_catalog": bench_store_load(objects, max(1, 10 // scale)),
+        **bench_store_columns(objects, max(1, 10 // scale)),
+    }
+    for name, r in bench_serialize(catalog, max(2, 20 // scale)).items():
+        results[name] = r
+    for name, r in bench_endpoint(catalog, max(4, 100 // scale)).items():
+        results[f"asteroids_{name}"] = r
+    return {
+        "benchmark": "api",
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "config": {"catalog_size": size},
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=2000, help="catalog entries (default 2000)")
+    parser.add_argument("--out", help="write JSON results to this file")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations (smoke test)")
+    args = parser.parse_args(argv)
+
+    report = run(args.size, quick=args.quick)
+    for name, r in report["results"].items():
+        print(f"{name:22s} {r['seconds_per_call'] * 1000:10.3f} ms/call {r['items_per_second']:14,.0f} items/s")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
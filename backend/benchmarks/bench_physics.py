@@ -0,0 +1,110 @@
+"""Microbenchmarks for the impact physics engine.
+
+Usage (from backend/):
+    python benchmarks/bench_physics.py [--out results.json] [--quick]
+
+Reports per-call latency and throughput for the scalar entry point (cold and
+memoized) and the vectorized entry point at several batch sizes.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+import impact_physics as physics  # noqa: E402
+
+
+def measure(fn, calls, items_per_call=1, repeat=5):
+    """Best-of-`repeat` timing of `calls` invocations of fn()."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()  # don't bill earlier benchmarks' garbage to this one
+        started = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, time.perf_counter() - started)
+    per_call = best / calls
+    return {
+        "calls": calls,
+        "items_per_call": items_per_call,
+        "seconds_per_call": per_call,
+        "us_per_item": per_call / items_per_call * 1e6,
+        "items_per_second": items_per_call / per_call,
+    }
+
+
+def bench_scalar_uncached(calls):
+    rng = random.Random(1)
+    inputs = [(rng.uniform(5, 70), rng.uniform(1e6, 1e12), rng.uniform(10, 1000)) for _ in range(calls)]
+    it = iter(inputs * 10)
+
+    def call():
+        physics._impact_metrics(*next(it), physics.DEFAULT_DENSITY)
+
+    return measure(call, calls)
+
+
+def bench_scalar_memoized(calls):
+    # Slider traffic: a handful of distinct values repeated many times.
+    physics.clear_memo()
+    values = [(20.0 + i * 1e-9, 1e9, 100.0) for i in range(16)]
+    state = {"i": 0}
+
+    def call():
+        state["i"] += 1
+        physics.impact_metrics(*values[state["i"] % len(values)])
+
+    result = measure(call, calls)
+    result["memo"] = physics.memo_stats()
+    return result
+
+
+def bench_array(size, calls):
+    rng = np.random.default_rng(1)
+    v = rng.uniform(5, 70, size)
+    d = rng.uniform(10, 1000, size)
+    return measure(lambda: physics.impact_metrics_array(v, d), calls, items_per_call=size)
+
+
+def run(quick=False):
+    scale = 10 if quick else 1
+    results = {
+        "scalar_uncached": bench_scalar_uncached(20000 // scale),
+        "scalar_memoized": bench_scalar_memoized(20000 // scale),
+    }
+    for size in (1, 1000, 100000):
+        results[f"array_{size}"] = bench_array(size, max(3, 2000 // size // scale))
+    return {
+        "benchmark": "physics",
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", help="write JSON results to this file")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations (smoke test)")
+    args = parser.parse_args(argv)
+
+    report = run(quick=args.quick)
+    for name, r in report["results"].items():
+        print(f"{name:18s} {r['us_per_item']:10.3f} us/item {r['items_per_second']:14,.0f} items/s")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
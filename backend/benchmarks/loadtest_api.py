@@ -0,0 +1,284 @@
+"""Mixed-traffic load generator for the whole API, against local Groq and NeoWs stubs.
+
+Usage (from backend/):
+    python benchmarks/loadtest_api.py [--driver client|werkzeug|gunicorn] [--requests 2000]
+                                      [--concurrency 8] [--groq-delay 0.2] [--out results.json]
+
+Each client thread draws requests from a weighted mix modelled on the
+frontend: catalog loads (revalidated with the ETag the thread saw last),
+name search, impact and impact-details calls with varied inputs, damage
+scenarios, and a small share of AI questions and term explanations that go
+to the Groq stub. The `client` driver calls the app in-process through
+Flask's test client (no sockets, so it isolates handler cost); `werkzeug`
+and `gunicorn` serve it over HTTP, the latter with gunicorn.conf.py.
+Reports throughput and p50/p95/p99 latency overall and per route.
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from loadtest_mixed import free_port, start_gunicorn, start_werkzeug, summarize, wait_ready  # noqa: E402
+from stubs import StubResponse, StubServer, groq_completion, neows_browse, neows_object  # noqa: E402
+
+SEARCH_TERMS = ("20", "2031", "AB", "(2005", "apo", "eros", "x")
+EXPLAIN_TERMS = ("asteroid", "crater", "impact energy", "seismic magnitude", "blast radius", "megaton")
+
+
+def _catalog(state, rng):
+    headers = {"If-None-Match": state["etag"]} if state.get("etag") and rng.random() < 0.7 else {}
+    return "GET", "/api/asteroids", None, headers
+
+
+def _search(state, rng):
+    return "GET", f"/api/asteroids/search?q={rng.choice(SEARCH_TERMS)}&limit=10", None, {}
+
+
+def _impact(state, rng):
+    body = {"velocity_kms": round(rng.uniform(5, 70), 1), "mass_kg": 10 ** rng.uniform(6, 12),
+            "diameter_m": round(rng.uniform(10, 1000))}
+    return "POST", "/api/impact", body, {}
+
+
+def _impact_details(state, rng):
+    if rng.random() < 0.3:
+        # Picked from the dropdown: the backend fills in the catalog values.
+        body = {"asteroid_name": neows_object(rng.randrange(20))["name"]}
+    else:
+        d = round(rng.uniform(10, 1000))
+        body = {"velocity_kms": round(rng.uniform(5, 70), 1), "diameter_m": d, "mass_kg": 3000 * 0.5236 * d ** 3}
+    body["target"] = rng.choice(("ground", "air", "water"))
+    return "POST", "/api/impact-details", body, {}
+
+
+def _damage(state, rng):
+    body = {"lat": round(rng.uniform(-60, 60), 2), "lon": round(rng.uniform(-180, 180), 2),
+            "velocity_kms": 20, "diameter_m": round(rng.uniform(20, 500))}
+    return "POST", "/api/damage/scenario", body, {}
+
+
+def _ask_ai(state, rng):
+    # Half repeat a popular question (served from the AI cache), half are new.
+    query = "what is a near-earth object?" if rng.random() < 0.5 else f"question {rng.getrandbits(40)}"
+    return "POST", "/api/ask-ai", {"query": query}, {}
+
+
+def _explain(state, rng):
+    return "POST", "/api/ai-explain", {"term": rng.choice(EXPLAIN_TERMS)}, {}
+
+
+# (weight, route name, request builder)
+TRAFFIC_MIX = (
+    (30, "asteroids", _catalog),
+    (10, "search", _search),
+    (25, "impact", _impact),
+    (15, "impact_details", _impact_details),
+    (8, "damage_scenario", _damage),
+    (7, "ask_ai", _ask_ai),
+    (5, "ai_explain", _explain),
+)
+
+
+def start_stubs(groq_delay):
+    objects = [neows_object(i) for i in range(100)]
+    groq = StubServer({
+        "/chat": lambda req: StubResponse(200, groq_completion("stub answer"), delay=groq_delay),
+        "/explain": lambda req: StubResponse(200, {"text": "stub explanation"}, delay=groq_delay),
+    }).start()
+    neows = StubServer({"/neo/browse": neows_browse(objects)}).start()
+    return groq, neows
+
+
+def backend_env(groq, neows, tmp):
+    return {
+        "GROQ_API_KEY": "load-test",
+        "GROQ_CHAT_URL": groq.url + "/chat",
+        "GROQ_EXPLAIN_URL": groq.url + "/explain",
+        "NASA_API_KEY": "load-test",
+        "NASA_NEOWS_URL": neows.url,
+        # Keep the run's catalog snapshot and (absent) SQLite store out of backend/data.
+        "ASTEROIDS_CACHE_FILE": os.path.join(tmp, "asteroids_cache.json"),
+        "NEO_DB_PATH": os.path.join(tmp, "neo.sqlite3"),
+    }
+
+
+@contextlib.contextmanager
+def inprocess_app(env):
+    """The imported Flask app pointed at the stubs in `env`; settings are restored afterwards."""
+    saved_env = {k: os.environ.get(k) for k in env}
+    os.environ.update(env)
+    import app as backend
+
+    attrs = ("GROQ_CHAT_URL", "GROQ_EXPLAIN_URL", "NASA_NEOWS_URL", "NEO_DB_PATH", "_neo_store")
+    saved = {k: getattr(backend, k) for k in attrs}
+    saved_snapshot = backend.asteroid_cache.snapshot_path
+    for k in attrs[:-1]:
+        setattr(backend, k, env[k])
+    backend._neo_store = None
+    backend.asteroid_cache.snapshot_path = env["ASTEROIDS_CACHE_FILE"]
+    backend.asteroid_cache.invalidate()
+    try:
+        yield backend
+    finally:
+        for k, v in saved.items():
+            setattr(backend, k, v)
+        backend.asteroid_cache.snapshot_path = saved_snapshot
+        backend.asteroid_cache.invalidate()
+        for k, v in saved_env.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+def client_sender(backend):
+    def make():
+        client = backend.app.test_client()
+
+        def send(method, path, body, headers):
+            res = client.open(path, method=method, json=body, headers=headers)
+            res.get_data()
+            return res.status_code, res.headers.get("ETag")
+
+        return send
+
+    return make
+
+
+def http_sender(base):
+    def make():
+        session = requests.Session()
+
+        def send(method, path, body, headers):
+            res = session.request(method, base + path, json=body, headers=headers, timeout=60)
+            return res.status_code, res.headers.get("ETag")
+
+        return send
+
+    return make
+
+
+def drive(make_sender, total, concurrency, seed=1, mix=TRAFFIC_MIX):
+    """Send `total` requests from `concurrency` threads; returns (per-route latencies, errors, elapsed)."""
+    weights = [w for w, _, _ in mix]
+    latencies = {name: [] for _, name, _ in mix}
+    errors = {name: 0 for _, name, _ in mix}
+    remaining = itertools.count()
+    lock = threading.Lock()
+
+    def worker(k):
+        rng = random.Random(seed * 1000 + k)
+        send = make_sender()
+        state = {}
+        while next(remaining) < total:
+            _, name, build = rng.choices(mix, weights)[0]
+            method, path, body, headers = build(state, rng)
+            started = time.perf_counter()
+            try:
+                status, etag = send(method, path, body, headers)
+                ok = status < 400
+            except requests.RequestException:
+                status, etag, ok = None, None, False
+            elapsed = time.perf_counter() - started
+            if name == "asteroids" and etag:
+                state["etag"] = etag
+            with lock:
+                if ok:
+                    latencies[name].append(elapsed)
+                else:
+                    errors[name] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors, time.perf_counter() - started
+
+
+def run(driver="client", total=2000, concurrency=8, groq_delay=0.2, seed=1, env=None):
+    groq, neows = start_stubs(groq_delay)
+    tmp = tempfile.mkdtemp(prefix="loadtest-")
+    config_env = {**backend_env(groq, neows, tmp), **(env or {})}
+    stop_backend = None
+    try:
+        with contextlib.ExitStack() as stack:
+            if driver == "client":
+                make_sender = client_sender(stack.enter_context(inprocess_app(config_env)))
+            else:
+                port = free_port()
+                base = f"http://127.0.0.1:{port}"
+                starter = start_gunicorn if driver == "gunicorn" else start_werkzeug
+                stop_backend = starter(port, config_env)
+                wait_ready(base)
+                make_sender = http_sender(base)
+            # One warm-up request so the first catalog load is not in the numbers.
+            make_sender()("GET", "/api/asteroids", None, {})
+            latencies, errors, elapsed = drive(make_sender, total, concurrency, seed)
+    finally:
+        if stop_backend is not None:
+            stop_backend()
+        groq.stop()
+        neows.stop()
+
+    everything = [x for values in latencies.values() for x in values]
+    return {
+        "benchmark": "loadtest_api",
+        "timestamp": time.time(),
+        "config": {
+            "driver": driver,
+            "requests": total,
+            "concurrency": concurrency,
+            "groq_delay_s": groq_delay,
+            "mix": {name: w for w, name, _ in TRAFFIC_MIX},
+        },
+        "overall": {**summarize(everything, elapsed), "errors": sum(errors.values())},
+        "routes": {name: {**summarize(values, elapsed), "errors": errors[name]} for name, values in latencies.items()},
+    }
+
+
+def print_report(report):
+    def line(name, r):
+        if not r["requests"]:
+            return f"{name:16s} {'-':>8s}  errors {r['errors']}"
+        return (f"{name:16s} {r['requests']:8d}  {r['throughput_rps']:8.1f} req/s  p50 {r['p50_ms']:8.2f} ms  "
+                f"p95 {r['p95_ms']:8.2f} ms  p99 {r['p99_ms']:8.2f} ms  errors {r['errors']}")
+
+    print(line("overall", report["overall"]))
+    for name, r in report["routes"].items():
+        print(line(name, r))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--driver", choices=("client", "werkzeug", "gunicorn"), default="client")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--groq-delay", type=float, default=0.2, help="seconds per stubbed Groq call")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args.driver, args.requests, args.concurrency, args.groq_delay, args.seed)
+    print_report(report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Mixed-traffic load test: /api/impact latency while /api/ask-ai calls are stuck on a slow Groq.
+
+Usage (from backend/):
+    python benchmarks/loadtest_mixed.py [--server gunicorn|werkzeug] [--groq-delay 3]
+                                        [--ai-concurrency 8] [--impact-requests 400] [--out results.json]
+
+A local stub stands in for Groq and answers every chat completion after
+`--groq-delay` seconds. `--ai-concurrency` client threads keep AI requests
+outstanding for the whole run while `--impact-concurrency` threads measure
+/api/impact. Run once with `--ai-concurrency 0` for an unloaded baseline.
+"""
+import argparse
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stubs import StubResponse, StubServer, groq_completion  # noqa: E402
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(latencies, elapsed):
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "throughput_rps": len(values) / elapsed if elapsed else None,
+        "p50_ms": percentile(values, 0.50) * 1000 if values else None,
+        "p95_ms": percentile(values, 0.95) * 1000 if values else None,
+        "p99_ms": percentile(values, 0.99) * 1000 if values else None,
+        "max_ms": values[-1] * 1000 if values else None,
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(port, env):
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **env, "PORT": str(port)},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return proc.terminate
+
+
+def start_werkzeug(port, env):
+    os.environ.update(env)
+    from werkzeug.serving import make_server
+
+    from app import app
+
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.shutdown
+
+
+def wait_ready(base, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base}/api/stats", timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("backend did not become ready")
+
+
+def run(server="gunicorn", groq_delay=3.0, ai_concurrency=8, impact_requests=400, impact_concurrency=4,
+        env=None):
+    groq = StubServer({"/chat": lambda req: StubResponse(200, groq_completion("stub answer"), delay=groq_delay)}).start()
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    backend_env = {
+        "GROQ_API_KEY": "load-test",
+        "GROQ_CHAT_URL": groq.url + "/chat",
+        **(env or {}),
+    }
+    stop_backend = (start_gunicorn if server == "gunicorn" else start_werkzeug)(port, backend_env)
+    try:
+        wait_ready(base)
+        stop = threading.Event()
+        ai_done = []
+        counter = itertools.count()
+
+        def ai_client():
+            session = requests.Session()
+            while not stop.is_set():
+                # Unique questions so the AI response cache never short-circuits Groq.
+                query = f"load test question {next(counter)}"
+                started = time.perf_counter()
+                try:
+                    session.post(f"{base}/api/ask-ai", json={"query": query}, timeout=60)
+                    ai_done.append(time.perf_counter() - started)
+                except requests.RequestException:
+                    pass
+
+        ai_threads = [threading.Thread(target=ai_client, daemon=True) for _ in range(ai_concurrency)]
+        for t in ai_threads:
+            t.start()
+        if ai_concurrency:
+            time.sleep(0.5)  # let the AI requests get stuck upstream first
+
+        latencies, errors = [], []
+        remaining = itertools.count()
+
+        def impact_client():
+            session = requests.Session()
+            payload = {"velocity_kms": 20.0, "mass_kg": 1e9, "diameter_m": 100}
+            while next(remaining) < impact_requests:
+                started = time.perf_counter()
+                try:
+                    r = session.post(f"{base}/api/impact", json=payload, timeout=60)
+                    r.raise_for_status()
+                    latencies.append(time.perf_counter() - started)
+                except requests.RequestException as e:
+                    errors.append(str(e))
+
+        started = time.perf_counter()
+        impact_threads = [threading.Thread(target=impact_client) for _ in range(impact_concurrency)]
+        for t in impact_threads:
+            t.start()
+        for t in impact_threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+        stop.set()
+
+        return {
+            "benchmark": "loadtest_mixed",
+            "timestamp": time.time(),
+            "config": {
+                "server": server,
+                "groq_delay_s": groq_delay,
+                "ai_concurrency": ai_concurrency,
+                "impact_requests": impact_requests,
+                "impact_concurrency": impact_concurrency,
+                **{k: v for k, v in backend_env.items() if k != "GROQ_API_KEY"},
+            },
+            "impact": {**summarize(latencies, elapsed), "errors": len(errors)},
+            "ai_completed_during_run": len(ai_done),
+        }
+    finally:
+        stop_backend()
+        groq.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", choices=("gunicorn", "werkzeug"), default="gunicorn")
+    parser.add_argument("--groq-delay", type=float, default=3.0)
+    parser.add_argument("--ai-concurrency", type=int, default=8)
+    parser.add_argument("--impact-requests", type=int, default=400)
+    parser.add_argument("--impact-concurrency", type=int, default=4)
+    parser.add_argument("--worker-class", help="GUNICORN_WORKER_CLASS for the backend (default: gthread)")
+    parser.add_argument("--threads", type=int, help="GUNICORN_THREADS (use 1 with --worker-class sync for the old setup)")
+    parser.add_argument("--out", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    env = {}
+    if args.worker_class:
+        env["GUNICORN_WORKER_CLASS"] = args.worker_class
+    if args.threads:
+        env["GUNICORN_THREADS"] = str(args.threads)
+    report = run(args.server, args.groq_delay, args.ai_concurrency, args.impact_requests, args.impact_concurrency, env)
+    impact = report["impact"]
+    print(
+        f"/api/impact with {args.ai_concurrency} AI requests outstanding: "
+        f"p50 {impact['p50_ms']:.1f} ms  p95 {impact['p95_ms']:.1f} ms  p99 {impact['p99_ms']:.1f} ms  "
+        f"{impact['throughput_rps']:.0f} req/s  errors {impact['errors']}"
+    )
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Run every benchmark, save the results, and fail on regressions against a stored baseline.
+
+Usage (from backend/):
+    python benchmarks/run_suite.py [--quick] [--driver client|werkzeug|gunicorn] [--rounds 3] [--out results.json]
+                                   [--baseline benchmarks/baseline.json] [--tolerance 0.5] [--save-baseline]
+
+Runs bench_physics, bench_api and loadtest_api, writes one JSON report, and
+compares it with the baseline. Microbenchmark times and load-test p50 and
+throughput may be `--tolerance` worse than the baseline (default 50%, which
+run-to-run noise on a shared single-core VM stays within); the overall
+p95/p99 get `--tail-tolerance` (default 150%), and per-route tails are
+reported but not compared. Any new request errors count as a regression.
+Exits 1 and lists the regressions if any are found, 2 if the baseline was
+recorded with other settings. Record the baseline on the machine that runs the comparison
+(`--save-baseline`), since absolute timings do not transfer between machines,
+and use `--rounds 3` or more on noisy machines: each metric is then the
+median over the rounds.
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import bench_api  # noqa: E402
+import bench_physics  # noqa: E402
+import loadtest_api  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+# Metric name -> whether bigger is better. Other fields (counts, bytes, memo stats) are informational.
+TRACKED = {
+    "seconds_per_call": False,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "throughput_rps": True,
+    "errors": False,
+}
+TAIL_METRICS = ("p95_ms", "p99_ms")
+
+
+def run(quick=False, driver="client", requests=2000, concurrency=8):
+    config = {"quick": quick, "driver": driver, "requests": requests, "concurrency": concurrency}
+    return {
+        "suite": "backend",
+        "timestamp": time.time(),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": config,
+        "reports": {
+            "physics": bench_physics.run(quick=quick),
+            "api": bench_api.run(quick=quick),
+            "loadtest": loadtest_api.run(driver, requests // (4 if quick else 1), concurrency),
+        },
+    }
+
+
+def tracked_metrics(suite):
+    """{"loadtest.routes.impact.p95_ms": value, ...} for every tracked metric in a suite report."""
+    out = {}
+
+    def walk(node, path):
+        for key, value in node.items():
+            if isinstance(value, dict):
+                walk(value, path + (key,))
+            elif key in TRACKED and isinstance(value, (int, float)):
+                # A route sees a few hundred requests per run, too few for a stable p95/p99.
+                if key in TAIL_METRICS and path[:2] == ("loadtest", "routes"):
+                    continue
+                out[".".join(path + (key,))] = value
+
+    walk(suite["reports"], ())
+    return out
+
+
+def merge_rounds(suites):
+    """One suite report whose tracked metrics are the medians over `suites` (repeated runs)."""
+    merged = copy.deepcopy(suites[0])
+    rounds = [tracked_metrics(s) for s in suites]
+    for name in rounds[0]:
+        node = merged["reports"]
+        *parents, field = name.split(".")
+        for key in parents:
+            node = node[key]
+        node[field] = statistics.median(r[name] for r in rounds if name in r)
+    merged["rounds"] = len(suites)
+    return merged
+
+
+def compare(current, baseline, tolerance=0.5, tail_tolerance=1.5):
+    """Regressions of `current` against `baseline`: list of dicts (metric, baseline, current, change)."""
+    now = tracked_metrics(current)
+    regressions = []
+    for name, old in tracked_metrics(baseline).items():
+        new = now.get(name)
+        if new is None:
+            continue
+        field = name.rsplit(".", 1)[1]
+        if field == "errors":
+            if new > old:
+                regressions.append({"metric": name, "baseline": old, "current": new, "change": None})
+            continue
+        if not old:
+            continue
+        # Positive change = worse, whichever direction the metric improves in.
+        change = (old - new) / old if TRACKED[field] else (new - old) / old
+        limit = tail_tolerance if field in TAIL_METRICS else tolerance
+        if change > limit:
+            regressions.append({"metric": name, "baseline": old, "current": new, "change": change})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="fewer iterations and requests (smoke test)")
+    parser.add_argument("--driver", choices=("client", "werkzeug", "gunicorn"), default="client")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=1, help="repeat the suite and use per-metric medians")
+    parser.add_argument("--out", help="write the suite JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--tail-tolerance", type=float, default=1.5)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    args = parser.parse_args(argv)
+
+    suite = merge_rounds([run(args.quick, args.driver, args.requests, args.concurrency)
+                          for _ in range(max(1, args.rounds))])
+    loadtest_api.print_report(suite["reports"]["loadtest"])
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(suite, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(suite, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("config") != suite["config"]:
+        print(f"baseline settings {baseline.get('config')} differ from this run {suite['config']}")
+        return 2
+    if baseline.get("machine") != suite["machine"]:
+        print(f"warning: baseline recorded on {baseline.get('machine')}, this run on {suite['machine']}")
+
+    regressions = compare(suite, baseline, args.tolerance, args.tail_tolerance)
+    if not regressions:
+        print(f"no regressions against {args.baseline}")
+        return 0
+    print(f"PERFORMANCE REGRESSION: {len(regressions)} metric(s) worse than {args.baseline}")
+    for r in regressions:
+        change = "" if r["change"] is None else f"  ({r['change']:+.0%})"
+        print(f"  {r['metric']:50s} {r['baseline']:>12.4g} -> {r['current']:<12.4g}{change}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""Local stub HTTP servers standing in for Groq and NASA NeoWs.
+
+Used by the tests and the load-test harnesses so nothing talks to the real
+APIs. Each route is a callable taking a `StubRequest` and returning a
+`StubResponse`; the server runs on a background thread on 127.0.0.1.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubRequest:
+    def __init__(self, method, path, query, headers, body):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body or b"{}")
+
+
+class StubResponse:
+    def __init__(self, status=200, body=b"", headers=None, delay=0.0, chunks=None, chunk_delay=0.0):
+        # `chunks` streams the body piecewise (e.g. server-sent events), sleeping
+        # `chunk_delay` seconds between pieces.
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body)
+            headers = {"Content-Type": "application/json", **(headers or {})}
+        self.status = status
+        self.body = body.encode() if isinstance(body, str) else body
+        self.headers = headers or {}
+        self.delay = delay
+        self.chunks = chunks
+        self.chunk_delay = chunk_delay
+
+
+class StubServer:
+    def __init__(self, routes=None):
+        self.routes = dict(routes or {})
+        self.calls = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                req = StubRequest(self.command, url.path, parse_qs(url.query), dict(self.headers), self.rfile.read(length))
+                stub.calls.append(req)
+                route = stub.routes.get((self.command, url.path)) or stub.routes.get(url.path)
+                res = route(req) if route else StubResponse(404, {"error": "no stub route"})
+                if res.delay:
+                    time.sleep(res.delay)
+                self.send_response(res.status)
+                for k, v in res.headers.items():
+                    self.send_header(k, v)
+                if res.chunks is None:
+                    self.send_header("Content-Length", str(len(res.body)))
+                    self.end_headers()
+                    self.wfile.write(res.body)
+                    return
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for chunk in res.chunks:
+                    data = chunk.encode() if isinstance(chunk, str) else chunk
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                    self.wfile.flush()
+                    if res.chunk_delay:
+                        time.sleep(res.chunk_delay)
+                self.wfile.write(b"0\r\n\r\n")
+
+            do_GET = do_POST = _handle
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def groq_completion(content):
+    """Body of an OpenAI-compatible chat completion returning `content`."""
+    return {"choices": [{"message": {"role": "assistant", "content": content}}]}
+
+
+def neows_object(i):
+    """A NeoWs browse/lookup record with orbital and close-approach data; fields vary with `i`."""
+    d_min = 20.0 + (i * 37) % 900
+    return {
+        "id": str(2000000 + i),
+        "neo_reference_id": str(2000000 + i),
+        "name": f"({2000 + i % 30} {chr(65 + i % 26)}{chr(65 + i // 26 % 26)}{i % 100})",
+        "absolute_magnitude_h": 18.0 + (i % 80) / 10.0,
+        "estimated_diameter": {"meters": {"estimated_diameter_min": d_min, "estimated_diameter_max": d_min * 2.236}},
+        "is_potentially_hazardous_asteroid": i % 9 == 0,
+        "close_approach_data": [{
+            "close_approach_date": f"20{30 + i % 60}-0{1 + i % 9}-1{i % 10}",
+            "epoch_date_close_approach": 1893456000000 + i * 86400000,
+            "relative_velocity": {"kilometers_per_second": str(5.0 + (i % 250) / 10.0)},
+            "miss_distance": {"kilometers": str(1e5 + (i * 7919) % 7.5e7)},
+            "orbiting_body": "Earth",
+        }],
+        "orbital_data": {
+            "epoch_osculation": "2460600.5", "semi_major_axis": str(0.8 + (i % 200) / 100.0),
+            "eccentricity": str((i % 90) / 100.0), "inclination": str(i % 40), "ascending_node_longitude": str(i % 360),
+            "perihelion_argument": str((i * 7) % 360), "mean_anomaly": str((i * 13) % 360), "mean_motion": None,
+        },
+    }
+
+
+def neows_browse(objects, page_size=20):
+    """Route for `/neo/browse` paging through `objects` (honours `page` and `size`)."""
+
+    def route(req):
+        size = int((req.query.get("size") or [page_size])[0])
+        page = int((req.query.get("page") or [0])[0])
+        chunk = objects[page * size:(page + 1) * size]
+        return StubResponse(200, {
+            "page": {"size": size, "number": page, "total_pages": -(-len(objects) // size)},
+            "near_earth_objects": chunk,
+        })
+
+    return route
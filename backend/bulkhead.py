@@ -0,0 +1,46 @@
+"""Per-process concurrency cap for slow, I/O-bound routes.
+
+A bulkhead admits at most `limit` requests at once and turns the rest away
+immediately (or after `wait` seconds) instead of queueing them. Capping the
+AI routes below the worker's thread count keeps threads free for the cheap
+physics routes while Groq is slow.
+"""
+import threading
+
+
+class Bulkhead:
+    def __init__(self, name, limit, wait=0.0):
+        self.name = name
+        self.limit = limit
+        self.wait = wait
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        ok = self._slots.acquire(timeout=self.wait) if self.wait else self._slots.acquire(blocking=False)
+        with self._lock:
+            if ok:
+                self.active += 1
+                self.admitted += 1
+            else:
+                self.rejected += 1
+        return ok
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+        self._slots.release()
+
+    def guard(self, iterable):
+        """Hold the slot until a streamed response body is exhausted or closed."""
+        try:
+            yield from iterable
+        finally:
+            self.release()
+
+    def stats(self):
+        with self._lock:
+            return {"limit": self.limit, "active": self.active, "admitted": self.admitted, "rejected": self.rejected}
@@ -0,0 +1,407 @@
+"""Array-backed asteroid catalog.
+
+`CatalogColumns` holds the catalog column by column rather than as a list of
+dicts. Numbers go in typed NumPy arrays and booleans in uint8. Strings are
+interned into one table per column with int32 codes. Nested objects such as
+`orbit` become child column sets. A per-column state byte separates a value
+from a null and from an absent key, so rows round-trip exactly. The class is
+a read-only Sequence of row dicts built on access, so code written against
+the old list keeps working.
+
+`encode_json` writes the row-format JSON array. With the optional `orjson`
+package it serializes rows built column by column; otherwise it formats
+them from the columns with one string template per distinct key set,
+encoding each distinct string once. `encode_columns_json` writes {name: [values]}. `to_bytes` produces a flat
+binary layout: b"CAT1", uint32 LE header length, JSON header, then 8-byte
+aligned little-endian arrays. `load` can memory-map that layout, so every
+gunicorn worker shares one copy of a large catalog through the page cache.
+"""
+import json
+import math
+import os
+import struct
+from collections.abc import Sequence
+from json.encoder import encode_basestring_ascii
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+BINARY_MAGIC = b"CAT1"
+VALUE, NULL, MISSING = 0, 1, 2
+DTYPES = {"float": "<f8", "int": "<i8", "bool": "u1", "str": "<i4"}
+
+_ABSENT = object()
+_INT64_MIN, _INT64_MAX = -(2 ** 63), 2 ** 63 - 1
+
+
+class CatalogError(ValueError):
+    pass
+
+
+class Column:
+    """One field: `values` (array, list or child CatalogColumns) plus an optional state array."""
+
+    __slots__ = ("kind", "values", "state", "strings")
+
+    def __init__(self, kind, values, state=None, strings=None):
+        self.kind = kind
+        self.values = values
+        # None means every row holds a value.
+        self.state = state if state is not None and state.any() else None
+        self.strings = strings
+
+    @classmethod
+    def from_cells(cls, cells):
+        """Infer the narrowest column kind for Python values (`_ABSENT` marks a missing key)."""
+        n = len(cells)
+        state = np.fromiter(
+            (MISSING if c is _ABSENT else NULL if c is None else VALUE for c in cells), dtype=np.uint8, count=n
+        )
+        present = [c for c in cells if c is not _ABSENT and c is not None]
+        types = {type(c) for c in present}
+        if not types or types == {float} and all(math.isfinite(c) for c in present):
+            values = np.array([c if type(c) is float else math.nan for c in cells], dtype=DTYPES["float"])
+            return cls("float", values, state)
+        if types == {int} and _INT64_MIN <= min(present) and max(present) <= _INT64_MAX:
+            return cls("int", np.array([c if type(c) is int else 0 for c in cells], dtype=DTYPES["int"]), state)
+        if types == {bool}:
+            return cls("bool", np.array([c is True for c in cells], dtype=DTYPES["bool"]), state)
+        if types == {str}:
+            table = {}
+            codes = [table.setdefault(c, len(table)) if type(c) is str else -1 for c in cells]
+            return cls("str", np.array(codes, dtype=DTYPES["str"]), state, list(table))
+        if types == {dict}:
+            child = CatalogColumns.from_records([c if type(c) is dict else {} for c in cells])
+            return cls("struct", child, state)
+        # Mixed or unusual types (int and float together, lists, non-finite floats) keep the Python values.
+        return cls("json", [None if c is _ABSENT else c for c in cells], state)
+
+    @classmethod
+    def from_array(cls, values):
+        """A float column from a numeric array; NaN becomes null."""
+        values = np.ascontiguousarray(values, dtype=DTYPES["float"])
+        return cls("float", values, np.where(np.isfinite(values), VALUE, NULL).astype(np.uint8))
+
+    def value(self, i):
+        kind = self.kind
+        if kind == "float":
+            return float(self.values[i])
+        if kind == "int":
+            return int(self.values[i])
+        if kind == "bool":
+            return bool(self.values[i])
+        if kind == "str":
+            return self.strings[self.values[i]]
+        return self.values[i]
+
+    def state_at(self, i):
+        return VALUE if self.state is None else int(self.state[i])
+
+    def to_list(self):
+        """Python values, None wherever the row has no value."""
+        kind = self.kind
+        if kind in ("float", "int"):
+            out = self.values.tolist()
+        elif kind == "bool":
+            out = [bool(v) for v in self.values.tolist()]
+        elif kind == "str":
+            strings = self.strings + [None]
+            out = [strings[c] for c in self.values.tolist()]
+        elif kind == "struct":
+            out = self.values.to_records()
+        else:
+            out = list(self.values)
+        if self.state is not None:
+            for i in np.flatnonzero(self.state).tolist():
+                out[i] = None
+        return out
+
+    def tokens(self):
+        """JSON text of every cell ("null" wherever the row has no value)."""
+        kind = self.kind
+        if kind == "float":
+            out = list(map(float.__repr__, self.values.tolist()))
+        elif kind == "int":
+            out = list(map(int.__repr__, self.values.tolist()))
+        elif kind == "bool":
+            out = [("false", "true")[v] for v in self.values.tolist()]
+        elif kind == "str":
+            encoded = list(map(encode_basestring_ascii, self.strings)) + ["null"]
+            out = [encoded[c] for c in self.values.tolist()]
+        elif kind == "struct":
+            out = self.values.row_tokens()
+        else:
+            out = [json.dumps(v) for v in self.values]
+        if self.state is not None:
+            for i in np.flatnonzero(self.state).tolist():
+                out[i] = "null"
+        return out
+
+
+class CatalogColumns(Sequence):
+    def __init__(self, columns, count, meta=None):
+        self.columns = columns
+        self.count = count
+        self.meta = meta or {}
+
+    @classmethod
+    def from_records(cls, records):
+        """Columns for a list of dicts; keys keep their first-seen order."""
+        records = records if isinstance(records, list) else list(records)
+        names = {}
+        for r in records:
+            for key in r:
+                names.setdefault(key, None)
+        columns = {name: Column.from_cells([r.get(name, _ABSENT) for r in records]) for name in names}
+        return cls(columns, len(records))
+
+    @classmethod
+    def from_columns(cls, columns, meta=None):
+        """Columns from {name: NumPy array or list of Python values}."""
+        built, count = {}, None
+        for name, values in columns.items():
+            if isinstance(values, np.ndarray):
+                built[name] = Column.from_array(values)
+            else:
+                built[name] = Column.from_cells(list(values))
+            size = len(values)
+            if count is not None and size != count:
+                raise CatalogError(f"column {name!r} has {size} rows, expected {count}")
+            count = size
+        return cls(built, count or 0, meta)
+
+    @classmethod
+    def of(cls, data):
+        """`data` itself when it is already columnar, else the columns of a list of dicts."""
+        return data if isinstance(data, cls) else cls.from_records(data)
+
+    # -- Sequence of row dicts ---------------------------------------------
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(self.count))]
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("catalog index out of range")
+        row = {}
+        for name, col in self.columns.items():
+            state = col.state_at(i)
+            if state != MISSING:
+                row[name] = None if state == NULL else col.value(i)
+        return row
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+    # -- column access -------------------------------------------------------
+
+    def values(self, name):
+        """Python values of one column (None for null or missing; all None for an unknown name)."""
+        col = self.columns.get(name)
+        return [None] * self.count if col is None else col.to_list()
+
+    def numbers(self, name):
+        """Float64 array of one column; NaN where a row has no numeric value."""
+        col = self.columns.get(name)
+        if col is None:
+            return np.full(self.count, math.nan)
+        if col.kind in ("float", "int", "bool"):
+            out = col.values.astype(np.float64)
+        else:
+            out = np.array([v if type(v) in (int, float) else math.nan for v in col.to_list()], dtype=np.float64)
+        if col.state is not None:
+            out[col.state != VALUE] = math.nan
+        return out
+
+    # -- JSON ----------------------------------------------------------------
+
+    def _key_groups(self):
+        """(indexes of the columns present, row indexes or None for every row) per distinct key set."""
+        names = list(self.columns)
+        # Rows that lack the same keys form one group; find them by a bitmask of missing columns.
+        mask = np.zeros(self.count, dtype=object if len(names) > 62 else np.int64)
+        for j, col in enumerate(self.columns.values()):
+            if col.state is not None:
+                mask += (col.state == MISSING).astype(mask.dtype) * (1 << j)
+        patterns, which = np.unique(mask, return_inverse=True)
+        which = which.reshape(-1)
+        for p, bits in enumerate(patterns.tolist()):
+            keep = [j for j in range(len(names)) if not bits >> j & 1]
+            yield keep, None if len(patterns) == 1 else np.flatnonzero(which == p).tolist()
+
+    def row_tokens(self):
+        """JSON text of every row object."""
+        names = list(self.columns)
+        if not names:
+            return ["{}"] * self.count
+        tokens = [col.tokens() for col in self.columns.values()]
+        out = [None] * self.count
+        for keep, rows in self._key_groups():
+            # One string template per key set.
+            template = "{" + ",".join(json.dumps(names[j]).replace("%", "%%") + ":%s" for j in keep) + "}"
+            if rows is None:
+                return [template % t for t in zip(*[tokens[j] for j in keep])] if keep else ["{}"] * self.count
+            cells = [[tokens[j][k] for k in rows] for j in keep]
+            encoded = [template % t for t in zip(*cells)] if keep else ["{}"] * len(rows)
+            for k, text in zip(rows, encoded):
+                out[k] = text
+        return out
+
+    def to_records(self):
+        """Every row as a dict, built column by column (much faster than iterating)."""
+        names = list(self.columns)
+        if not names:
+            return [{} for _ in range(self.count)]
+        values = [col.to_list() for col in self.columns.values()]
+        out = [None] * self.count
+        for keep, rows in self._key_groups():
+            keys = [names[j] for j in keep]
+            if rows is None:
+                return [dict(zip(keys, t)) for t in zip(*[values[j] for j in keep])] if keep else [{} for _ in out]
+            cells = [[values[j][k] for k in rows] for j in keep]
+            records = [dict(zip(keys, t)) for t in zip(*cells)] if keep else [{} for _ in rows]
+            for k, record in zip(rows, records):
+                out[k] = record
+        return out
+
+    def encode_json(self):
+        """The catalog as a JSON array of row objects (UTF-8 bytes)."""
+        if orjson is not None:
+            try:
+                return orjson.dumps(self.to_records())
+            except TypeError:  # e.g. integers beyond 64 bits in a "json" column
+                pass
+        return ("[" + ",".join(self.row_tokens()) + "]").encode("utf-8")
+
+    def encode_columns_json(self):
+        """The catalog as a JSON object of columns; nested objects become nested column objects."""
+        parts = []
+        for name, col in self.columns.items():
+            if col.kind == "struct":
+                body = col.values.encode_columns_json().decode("utf-8")
+            else:
+                body = "[" + ",".join(col.tokens()) + "]"
+            parts.append(json.dumps(name) + ":" + body)
+        return ("{" + ",".join(parts) + "}").encode("utf-8")
+
+    # -- binary ----------------------------------------------------------------
+
+    def to_bytes(self, meta=None):
+        """The "CAT1" binary layout (see module docstring); `meta` is stored in the header."""
+        chunks = []
+        offset = [0]
+
+        def put(array):
+            data = np.ascontiguousarray(array).tobytes()
+            start = offset[0]
+            chunks.append(data + b"\0" * (-len(data) % 8))
+            offset[0] += len(chunks[-1])
+            return [start, len(data)]
+
+        def spec(columns):
+            out = []
+            for name, col in columns.columns.items():
+                entry = {"name": name, "kind": col.kind, "state": put(col.state) if col.state is not None else None}
+                if col.kind == "struct":
+                    entry["columns"] = spec(col.values)
+                elif col.kind == "json":
+                    entry["values"] = col.values
+                else:
+                    entry["data"] = put(col.values.astype(DTYPES[col.kind], copy=False))
+                    if col.kind == "str":
+                        entry["strings"] = col.strings
+                out.append(entry)
+            return out
+
+        header = {"count": self.count, "meta": self.meta if meta is None else meta, "columns": spec(self)}
+        head = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        head += b" " * (-(len(head) + 8) % 8)
+        return BINARY_MAGIC + struct.pack("<I", len(head)) + head + b"".join(chunks)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Inverse of `to_bytes`; arrays are views into `data` (bytes, memoryview or a uint8 array)."""
+        raw = data if isinstance(data, np.ndarray) else np.frombuffer(data, dtype=np.uint8)
+        if bytes(raw[:4]) != BINARY_MAGIC:
+            raise CatalogError("not a catalog columns payload")
+        (length,) = struct.unpack("<I", bytes(raw[4:8]))
+        header = json.loads(bytes(raw[8:8 + length]))
+        base = 8 + length
+
+        def view(extent, dtype):
+            start, size = extent
+            return raw[base + start:base + start + size].view(dtype)
+
+        def build(specs, count):
+            columns = {}
+            for entry in specs:
+                kind = entry["kind"]
+                state = view(entry["state"], np.uint8) if entry["state"] is not None else None
+                if kind == "struct":
+                    values = CatalogColumns(build(entry["columns"], count), count)
+                elif kind == "json":
+                    values = entry["values"]
+                else:
+                    values = view(entry["data"], DTYPES[kind])
+                columns[entry["name"]] = Column(kind, values, state, entry.get("strings"))
+            return columns
+
+        return cls(build(header["columns"], header["count"]), header["count"], header.get("meta"))
+
+    def save(self, path, meta=None):
+        """Write `to_bytes` to `path` atomically (temp file + rename)."""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(self.to_bytes(meta))
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Read a saved catalog; with `mmap` the arrays stay on disk and are paged in on use."""
+        if mmap:
+            return cls.from_bytes(np.memmap(path, dtype=np.uint8, mode="r"))
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def _first_valid(*arrays):
+    """Element-wise first value that is finite and non-zero (the `a or b or None` of the row code)."""
+    out = np.full(arrays[0].shape, math.nan)
+    for values in reversed(arrays):
+        out = np.where(np.isfinite(values) & (values != 0), values, out)
+    return out
+
+
+def simplify(catalog):
+    """Dropdown columns (name, mass, velocity, diameter) for a catalog, computed per column."""
+    import impact_physics as physics
+
+    names = [
+        label or name or str(i)
+        for label, name, i in zip(catalog.values("label"), catalog.values("name"), catalog.values("id"))
+    ]
+    diameter = _first_valid(catalog.numbers("diameter_m"), catalog.numbers("size"))
+    # Sizes below 1 are km fractions from the ring layout; scale them up like the row code did.
+    diameter = np.where(diameter < 1, diameter * 100, diameter)
+    return CatalogColumns.from_columns({
+        "name": names,
+        "mass": physics.sphere_mass_array(diameter),
+        "velocity": _first_valid(catalog.numbers("velocity_kms"), catalog.numbers("velocity")),
+        "diameter": diameter,
+    })
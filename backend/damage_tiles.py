@@ -0,0 +1,185 @@
+"""Damage-intensity map tiles (Web Mercator z/x/y, 256 px PNG) for impact overlays.
+
+A `DamageScenario` is an impact location plus the crater and blast radii from
+impact_physics. Intensity is 1 inside the crater and falls off as
+0.5 * (blast_radius / r)^2 outside it (0.5 at the blast radius). A tile is
+rendered by computing the great-circle distance of every pixel centre to the
+impact point in one NumPy pass, mapping intensity through a colour ramp, and
+encoding the result with the small PNG writer below, so nothing depends on
+a map service or imaging library. Tiles are rendered on first request and
+kept in an LRU keyed by (scenario hash, z, x, y). Tiles beyond the visible
+cutoff share one transparent PNG.
+"""
+import hashlib
+import math
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+TILE_SIZE = 256
+MAX_ZOOM = 18
+EARTH_RADIUS_KM = 6371.0088
+EQUATOR_KM = 2 * math.pi * EARTH_RADIUS_KM
+MIN_INTENSITY = 0.02  # below this a pixel is left transparent
+
+
+def encode_png(rgba):
+    """Encode an (height, width, 4) uint8 array as an RGBA PNG."""
+    height, width, _ = rgba.shape
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)  # leading 0 = filter "None" per row
+    raw[:, 1:] = rgba.reshape(height, width * 4)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)) + chunk(b"IEND", b""))
+
+
+EMPTY_TILE = encode_png(np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8))
+
+
+def _colour_ramp(steps=256):
+    # Pale yellow -> orange -> red -> dark red, opacity rising with intensity.
+    stops = np.array([
+        [0.00, 255, 240, 120, 40],
+        [0.25, 255, 190, 60, 110],
+        [0.50, 255, 120, 20, 160],
+        [0.75, 220, 40, 20, 200],
+        [1.00, 120, 0, 10, 235],
+    ])
+    t = np.linspace(0, 1, steps)
+    return np.stack([np.interp(t, stops[:, 0], stops[:, c]) for c in range(1, 5)], axis=1).astype(np.uint8)
+
+
+COLOUR_RAMP = _colour_ramp()
+
+
+def tile_bounds(z, x, y):
+    """(west, south, east, north) of a tile in degrees."""
+    n = 2 ** z
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+
+def pixel_lonlat(z, x, y, size=TILE_SIZE):
+    """Longitudes (columns) and latitudes (rows) of the pixel centres of a tile, in degrees."""
+    n = 2 ** z
+    offsets = (np.arange(size) + 0.5) / size
+    lon = (x + offsets) / n * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + offsets) / n))))
+    return lon, lat
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+class DamageScenario:
+    def __init__(self, lat, lon, crater_radius_km, blast_radius_km):
+        self.lat = float(lat)
+        self.lon = float(lon)
+        self.crater_radius_km = max(0.0, float(crater_radius_km))
+        self.blast_radius_km = max(1e-3, float(blast_radius_km))
+        # Distance where 0.5 * (blast / r)^2 drops to MIN_INTENSITY.
+        self.cutoff_km = max(self.crater_radius_km, self.blast_radius_km * math.sqrt(0.5 / MIN_INTENSITY))
+        params = "%.5f|%.5f|%.6g|%.6g" % (self.lat, self.lon, self.crater_radius_km, self.blast_radius_km)
+        self.key = hashlib.sha1(params.encode("ascii")).hexdigest()[:16]
+
+    @classmethod
+    def from_metrics(cls, lat, lon, metrics):
+        return cls(lat, lon, metrics["crater_diameter_km"] / 2.0, metrics["blast_radius_km"])
+
+    def intensity(self, distance_km):
+        with np.errstate(divide="ignore"):
+            falloff = 0.5 * (self.blast_radius_km / np.maximum(distance_km, 1e-9)) ** 2
+        return np.where(distance_km <= self.crater_radius_km, 1.0, np.minimum(falloff, 1.0))
+
+    def suggested_zoom(self):
+        """Zoom at which the damage footprint spans about two tiles."""
+        width_km = EQUATOR_KM * max(0.05, math.cos(math.radians(self.lat)))
+        return int(max(0, min(MAX_ZOOM, math.floor(math.log2(width_km / max(self.cutoff_km, 1e-3))))))
+
+    def touches(self, z, x, y):
+        """False only when the whole tile is clearly beyond the cutoff distance."""
+        west, south, east, north = tile_bounds(z, x, y)
+        lat = min(max(self.lat, south), north)
+        dlon = (self.lon - (west + east) / 2 + 180.0) % 360.0 - 180.0
+        half = (east - west) / 2
+        lon = (west + east) / 2 + max(-half, min(half, dlon))
+        # The clamped point is only an approximation of the nearest tile point
+        # away from the equator, so keep a generous margin.
+        return float(haversine_km(self.lat, self.lon, lat, lon)) <= self.cutoff_km * 1.5
+
+    def render(self, z, x, y):
+        """PNG bytes for tile (z, x, y)."""
+        if not self.touches(z, x, y):
+            return EMPTY_TILE
+        lon, lat = pixel_lonlat(z, x, y)
+        distance = haversine_km(self.lat, self.lon, lat[:, None], lon[None, :])
+        intensity = self.intensity(distance)
+        if not np.any(intensity >= MIN_INTENSITY):
+            return EMPTY_TILE
+        rgba = COLOUR_RAMP[np.clip((intensity * 255).astype(np.intp), 0, 255)]
+        rgba[intensity < MIN_INTENSITY] = 0
+        return encode_png(rgba)
+
+
+class TileCache:
+    """LRU of rendered tiles keyed by (scenario key, z, x, y), bounded by total bytes."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, scenario, z, x, y):
+        # Tiles off the footprint are answered without an entry; panning would otherwise fill the cache with them.
+        if not scenario.touches(z, x, y):
+            return EMPTY_TILE
+        key = (scenario.key, z, x, y)
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self._tiles.move_to_end(key)
+                self.hits += 1
+                return tile
+            self.misses += 1
+        tile = scenario.render(z, x, y)
+        with self._lock:
+            if key not in self._tiles:
+                # Empty tiles near the footprint share one body but are charged like any
+                # other, so their entries still count towards the bound.
+                self.bytes += len(tile)
+                self._tiles[key] = tile
+            while self.bytes > self.max_bytes and self._tiles:
+                _, old = self._tiles.popitem(last=False)
+                self.bytes -= len(old)
+                self.evictions += 1
+        return tile
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "tiles": len(self._tiles),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,195 @@
+"""Vectorized two-body ephemerides for the NEO catalog.
+
+Positions come from each object's osculating elements (as stored by
+neo_store): Kepler's equation is solved with Newton iterations over an
+(objects x timesteps) array in one NumPy pass, then rotated into heliocentric
+ecliptic J2000 coordinates in AU. `iter_binary` streams the result as one
+small JSON header followed by little-endian float32 positions, so the frontend
+can play back thousands of bodies from a single ArrayBuffer.
+"""
+import datetime
+import json
+import struct
+
+import numpy as np
+
+GAUSS_K = 0.01720209895  # rad/day, heliocentric gravitational constant
+J2000_JD = 2451545.0
+UNIX_EPOCH_JD = 2440587.5
+
+# Earth-Moon barycentre, J2000 mean elements (Standish); node 0 so peri = longitude of perihelion.
+EARTH_ELEMENTS = {
+    "epoch_jd": J2000_JD, "a_au": 1.00000261, "e": 0.01671123, "i_deg": -0.00001531,
+    "node_deg": 0.0, "peri_deg": 102.93768193, "M_deg": 100.46457166 - 102.93768193, "n_deg_day": None,
+}
+ELEMENT_KEYS = ("epoch_jd", "a_au", "e", "i_deg", "node_deg", "peri_deg", "M_deg", "n_deg_day")
+BINARY_MAGIC = b"EPH1"
+
+
+class EphemerisError(ValueError):
+    pass
+
+
+def date_to_jd(value):
+    """Julian date of a date/datetime (naive values are taken as UTC)."""
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        delta = value - datetime.datetime(1970, 1, 1)
+    else:
+        delta = datetime.datetime(value.year, value.month, value.day) - datetime.datetime(1970, 1, 1)
+    return UNIX_EPOCH_JD + delta.total_seconds() / 86400.0
+
+
+class OrbitElements:
+    """Column arrays of osculating elements; angles in radians, mean motion in rad/day."""
+
+    def __init__(self, ids, names, columns):
+        self.ids = list(ids)
+        self.names = list(names)
+        self.epoch_jd = np.asarray(columns["epoch_jd"], dtype=np.float64)
+        self.a = np.asarray(columns["a_au"], dtype=np.float64)
+        self.e = np.asarray(columns["e"], dtype=np.float64)
+        self.i = np.radians(np.asarray(columns["i_deg"], dtype=np.float64))
+        self.node = np.radians(np.asarray(columns["node_deg"], dtype=np.float64))
+        self.peri = np.radians(np.asarray(columns["peri_deg"], dtype=np.float64))
+        self.M0 = np.radians(np.asarray(columns["M_deg"], dtype=np.float64))
+        n = np.asarray([np.nan if v is None else v for v in columns["n_deg_day"]], dtype=np.float64)
+        # Fall back to two-body mean motion where NeoWs omitted it.
+        self.n = np.where(np.isfinite(n), np.radians(n), GAUSS_K / np.power(self.a, 1.5))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def subset(self, indices):
+        indices = np.asarray(indices, dtype=np.intp)
+        out = OrbitElements.__new__(OrbitElements)
+        out.ids = [self.ids[k] for k in indices]
+        out.names = [self.names[k] for k in indices]
+        for attr in ("epoch_jd", "a", "e", "i", "node", "peri", "M0", "n"):
+            setattr(out, attr, getattr(self, attr)[indices])
+        return out
+
+    @classmethod
+    def from_catalog(cls, catalog):
+        """Elements for the catalog entries that carry a bound (e < 1) `orbit`."""
+        ids, names = [], []
+        columns = {k: [] for k in ELEMENT_KEYS}
+        for a in catalog:
+            orbit = a.get("orbit")
+            if not orbit:
+                continue
+            if any(orbit.get(k) is None for k in ELEMENT_KEYS[:-1]):
+                continue
+            if not (orbit["a_au"] > 0 and 0 <= orbit["e"] < 1):
+                continue
+            ids.append(a.get("id"))
+            names.append(a.get("label") or a.get("name") or str(a.get("id")))
+            for k in ELEMENT_KEYS:
+                columns[k].append(orbit.get(k))
+        return cls(ids, names, columns)
+
+    @classmethod
+    def earth(cls):
+        return cls(["earth"], ["Earth"], {k: [EARTH_ELEMENTS[k]] for k in ELEMENT_KEYS})
+
+
+def solve_kepler(M, e, tol=1e-12, max_iter=50):
+    """Eccentric anomaly E with E - e sin E = M, element-wise (Newton's method)."""
+    M = np.remainder(M, 2 * np.pi)
+    e = np.broadcast_to(e, M.shape)
+    E = np.where(e < 0.8, M + e * np.sin(M), np.pi)
+    for _ in range(max_iter):
+        delta = (E - e * np.sin(E) - M) / (1.0 - e * np.cos(E))
+        E = E - delta
+        if np.max(np.abs(delta), initial=0.0) < tol:
+            break
+    return E
+
+
+def propagate(elements, jd):
+    """Heliocentric ecliptic positions in AU, shape (objects, len(jd), 3).
+
+    `jd` may also be 2-D, (objects, steps), to give every object its own times.
+    """
+    jd = np.asarray(jd, dtype=np.float64)
+    if jd.ndim < 2:
+        jd = np.atleast_1d(jd)[None, :]
+    col = lambda v: v[:, None]  # noqa: E731
+    M = col(elements.M0) + col(elements.n) * (jd - col(elements.epoch_jd))
+    e = col(elements.e)
+    E = solve_kepler(M, e)
+    a = col(elements.a)
+    xp = a * (np.cos(E) - e)
+    yp = a * np.sqrt(1.0 - e * e) * np.sin(E)
+
+    cos_o, sin_o = np.cos(col(elements.node)), np.sin(col(elements.node))
+    cos_w, sin_w = np.cos(col(elements.peri)), np.sin(col(elements.peri))
+    cos_i, sin_i = np.cos(col(elements.i)), np.sin(col(elements.i))
+    out = np.empty(M.shape + (3,), dtype=np.float64)
+    out[..., 0] = (cos_o * cos_w - sin_o * sin_w * cos_i) * xp + (-cos_o * sin_w - sin_o * cos_w * cos_i) * yp
+    out[..., 1] = (sin_o * cos_w + cos_o * sin_w * cos_i) * xp + (-sin_o * sin_w + cos_o * cos_w * cos_i) * yp
+    out[..., 2] = (sin_w * sin_i) * xp + (cos_w * sin_i) * yp
+    return out
+
+
+def time_grid(start_jd, days, steps):
+    if steps < 1:
+        raise EphemerisError("steps must be at least 1")
+    if steps == 1:
+        return np.array([start_jd], dtype=np.float64)
+    return start_jd + np.linspace(0.0, float(days), steps)
+
+
+def positions(elements, jd, frame="helio"):
+    """`propagate`, optionally made geocentric by subtracting Earth's position."""
+    pos = propagate(elements, jd)
+    if frame == "geo":
+        pos -= propagate(OrbitElements.earth(), jd)
+    elif frame != "helio":
+        raise EphemerisError("frame must be 'helio' or 'geo'")
+    return pos
+
+
+def header(elements, jd, frame):
+    return {
+        "count": len(elements),
+        "steps": int(len(jd)),
+        "start_jd": float(jd[0]),
+        "step_days": float(jd[1] - jd[0]) if len(jd) > 1 else 0.0,
+        "frame": frame,
+        "units": "au",
+        "layout": "object,step,xyz",
+        "dtype": "float32",
+        "ids": elements.ids,
+        "names": elements.names,
+    }
+
+
+def iter_binary(elements, jd, frame="helio", chunk_objects=2048):
+    """Yield the binary ephemeris: magic, uint32 header length, JSON header, float32 positions.
+
+    The header is space-padded so the positions start on a 4-byte boundary and
+    can be viewed directly as a Float32Array. Positions are computed and sent
+    `chunk_objects` bodies at a time to keep memory flat for large catalogs.
+    """
+    head = json.dumps(header(elements, jd, frame), separators=(",", ":")).encode("utf-8")
+    head += b" " * (-len(head) % 4)
+    yield BINARY_MAGIC + struct.pack("<I", len(head)) + head
+    earth = propagate(OrbitElements.earth(), jd) if frame == "geo" else None
+    for start in range(0, len(elements), chunk_objects):
+        chunk = elements.subset(range(start, min(start + chunk_objects, len(elements))))
+        pos = propagate(chunk, jd)
+        if earth is not None:
+            pos -= earth
+        yield pos.astype("<f4").tobytes()
+
+
+def decode_binary(data):
+    """Inverse of `iter_binary` (used by tests and tools): (header, positions array)."""
+    if data[:4] != BINARY_MAGIC:
+        raise EphemerisError("not an ephemeris payload")
+    (length,) = struct.unpack_from("<I", data, 4)
+    head = json.loads(data[8:8 + length])
+    pos = np.frombuffer(data, dtype="<f4", offset=8 + length)
+    return head, pos.reshape(head["count"], head["steps"], 3)
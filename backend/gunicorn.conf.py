@@ -0,0 +1,18 @@
+# Gunicorn settings for the Flask backend (used by the Dockerfile).
+#
+# The default "gthread" worker gives each process a pool of threads, so a slow
+# Groq/NASA call only ties up one thread instead of a whole worker. AI routes
+# are additionally capped per process (AI_MAX_CONCURRENCY in app.py), which
+# keeps threads free for the CPU-only physics routes. Set
+# GUNICORN_WORKER_CLASS=gevent (after `pip install gevent`) for greenlet
+# workers instead; requests' sockets are then cooperative.
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get("GUNICORN_WORKERS", 2))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 200))  # gevent only
+# Streaming /api/ask-ai responses can outlive the 30 s default.
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+keepalive = 5
@@ -0,0 +1,115 @@
+"""Request parsing and chunked evaluation for /api/impact/batch."""
+import json
+
+import numpy as np
+
+from impact_physics import COLUMNS, DEFAULT_DENSITY, impact_metrics_array
+
+INPUT_FIELDS = ("velocity_kms", "diameter_m", "mass_kg", "density_kg_m3")
+# Sizes and densities must be positive and velocities non-negative; anything else yields NaN metrics.
+NON_NEGATIVE_FIELDS = ("velocity_kms",)
+GRID_FIELDS = ("velocity_kms", "diameter_m", "density_kg_m3")
+CHUNK_SIZE = 16384
+
+
+class BatchError(ValueError):
+    pass
+
+
+def _as_array(value, field, max_num=None):
+    # Grid axes may be given as {"start", "stop", "num"} instead of a list.
+    if isinstance(value, dict):
+        try:
+            num = int(value.get("num", 10))
+            start, stop = float(value["start"]), float(value["stop"])
+        except (KeyError, TypeError, ValueError, OverflowError):
+            raise BatchError(f"Invalid range for {field}")
+        # Bound num before linspace allocates it.
+        if num <= 0 or (max_num is not None and num > max_num):
+            raise BatchError(f"{field} num must be between 1 and {max_num or 'unbounded'}")
+        value = np.linspace(start, stop, num)
+    try:
+        arr = np.atleast_1d(np.asarray(value, dtype=np.float64))
+    except (TypeError, ValueError):
+        raise BatchError(f"Invalid numeric input for {field}")
+    if arr.ndim != 1 or arr.size == 0:
+        raise BatchError(f"{field} must be a number or a non-empty flat list")
+    if not np.all(np.isfinite(arr)):
+        raise BatchError(f"{field} contains non-finite values")
+    if field in NON_NEGATIVE_FIELDS:
+        if np.any(arr < 0):
+            raise BatchError(f"{field} must not be negative")
+    elif np.any(arr <= 0):
+        raise BatchError(f"{field} must be positive")
+    return arr
+
+
+class Batch:
+    """A parsed batch: either zipped scenario arrays or a cartesian grid."""
+
+    def __init__(self, arrays, grid):
+        self.arrays = arrays
+        self.grid = grid
+        if grid:
+            self.shape = tuple(arrays[f].size for f in GRID_FIELDS)
+            self.count = int(np.prod(self.shape))
+        else:
+            self.shape = None
+            self.count = max(a.size for a in arrays.values())
+
+    @classmethod
+    def from_payload(cls, payload, max_scenarios=None):
+        """Parse a request body; `max_scenarios` bounds each {"start", "stop", "num"} range."""
+        if "grid" in payload:
+            spec = payload.get("grid") or {}
+            fields, grid = GRID_FIELDS, True
+        elif "scenarios" in payload:
+            spec = payload.get("scenarios") or {}
+            fields, grid = INPUT_FIELDS, False
+        else:
+            raise BatchError("Provide either 'scenarios' or 'grid'")
+        if not isinstance(spec, dict):
+            raise BatchError("'scenarios'/'grid' must be an object of arrays")
+
+        arrays = {}
+        for field in fields:
+            if field in spec and spec[field] is not None:
+                arrays[field] = _as_array(spec[field], field, max_scenarios)
+        if "velocity_kms" not in arrays or "diameter_m" not in arrays:
+            raise BatchError("velocity_kms and diameter_m are required")
+        arrays.setdefault("density_kg_m3", np.array([DEFAULT_DENSITY]))
+
+        if not grid:
+            n = max(a.size for a in arrays.values())
+            for field, a in arrays.items():
+                if a.size not in (1, n):
+                    raise BatchError(f"{field} has {a.size} values, expected 1 or {n}")
+        return cls(arrays, grid)
+
+    def evaluate(self, start=0, stop=None):
+        """Metrics for scenarios [start, stop) as a dict of arrays."""
+        stop = self.count if stop is None else min(stop, self.count)
+        if self.grid:
+            idx = np.unravel_index(np.arange(start, stop), self.shape)
+            v, d, rho = (self.arrays[f][i] for f, i in zip(GRID_FIELDS, idx))
+            return impact_metrics_array(v, d, density=rho)
+
+        def part(field):
+            a = self.arrays.get(field)
+            if a is None:
+                return None
+            return a if a.size == 1 else a[start:stop]
+
+        v = np.broadcast_to(part("velocity_kms"), (stop - start,))
+        return impact_metrics_array(v, part("diameter_m"), part("mass_kg"), part("density_kg_m3"))
+
+    def columns(self):
+        result = self.evaluate()
+        return {name: result[name].tolist() for name in COLUMNS}
+
+    def iter_ndjson(self, chunk_size=CHUNK_SIZE):
+        """Yield one JSON object per scenario, computing a chunk at a time."""
+        for start in range(0, self.count, chunk_size):
+            result = self.evaluate(start, start + chunk_size)
+            rows = np.column_stack([result[name] for name in COLUMNS]).tolist()
+            yield "".join(json.dumps(dict(zip(COLUMNS, row))) + "\n" for row in rows)
@@ -0,0 +1,153 @@
+"""Impact physics engine shared by the impact routes.
+
+Demo-grade heuristics, not a validated impact model. Every formula lives here
+once, with a scalar entry point (`impact_metrics`, memoized on quantized
+inputs because the UI sliders resend near-identical values) and a NumPy entry
+point (`impact_metrics_array`) for batches. NumPy is imported by the array
+functions only, so the scalar routes do not load it at worker boot.
+"""
+import math
+from functools import lru_cache
+
+TNT_MT_J = 4.184e15  # 1 megaton of TNT in joules
+HIROSHIMA_MT = 0.015  # ~15 kt
+DEFAULT_DENSITY = 3000.0  # kg/m^3, stony asteroid
+
+# Crater depth ~ k * diameter^a * (energy / 1e15)^b * 10. /api/impact has always
+# used the quick coefficients, /api/impact-details the detailed ones.
+CRATER_DEPTH_QUICK = (0.1, 0.3, 0.1)
+CRATER_DEPTH_DETAILED = (0.2, 0.33, 0.12)
+
+# Inputs are rounded to this many significant digits before hitting the memo cache.
+QUANTIZE_DIGITS = 6
+MEMO_SIZE = 4096
+
+COLUMNS = (
+    "velocity_kms",
+    "diameter_m",
+    "density_kg_m3",
+    "mass_kg",
+    "momentum",
+    "impact_energy_j",
+    "impact_energy_mt",
+    "crater_depth_m",
+    "crater_diameter_km",
+    "displacement_m",
+    "seismic_magnitude_mw",
+    "blast_radius_km",
+)
+
+
+def sphere_mass(diameter_m, density=DEFAULT_DENSITY):
+    """Mass (kg) of a sphere of the given diameter (m) and density (kg/m^3)."""
+    r = float(diameter_m) / 2.0
+    return (4.0 / 3.0) * math.pi * (r ** 3) * density
+
+
+def crater_depth_m(diameter_m, energy_j, coefficients=CRATER_DEPTH_DETAILED):
+    k, a, b = coefficients
+    return k * (diameter_m ** a) * ((energy_j / 1e15) ** b) * 10
+
+
+_KEY_FORMAT = "|".join([f"%.{QUANTIZE_DIGITS}g"] * 4)
+
+
+def impact_metrics(velocity_kms, mass_kg, diameter_m, density=DEFAULT_DENSITY):
+    """Scalar impact metrics for one scenario, served from an LRU memo when possible.
+
+    Returns a new dict with the COLUMNS keys plus hiroshima_equivalent.
+    """
+    # One string format quantizes all four inputs; it is much cheaper than
+    # rounding each float separately and doubles as the cache key.
+    key = _KEY_FORMAT % (float(velocity_kms), float(mass_kg), float(diameter_m), float(density))
+    return dict(_impact_metrics_cached(key))
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _impact_metrics_cached(key):
+    return _impact_metrics(*(float(part) for part in key.split("|")))
+
+
+def _impact_metrics(velocity_kms, mass_kg, diameter_m, density):
+    v_ms = velocity_kms * 1000.0
+    energy_j = 0.5 * mass_kg * v_ms * v_ms
+    energy_mt = energy_j / TNT_MT_J
+    depth = crater_depth_m(diameter_m, energy_j)
+    footprint_area = math.pi * (diameter_m ** 2)
+    return {
+        "velocity_kms": velocity_kms,
+        "diameter_m": diameter_m,
+        "density_kg_m3": density,
+        "mass_kg": mass_kg,
+        "momentum": mass_kg * v_ms,
+        "impact_energy_j": energy_j,
+        "impact_energy_mt": energy_mt,
+        "hiroshima_equivalent": energy_mt / HIROSHIMA_MT,
+        "crater_depth_m": depth,
+        "crater_diameter_km": max(0.001, (depth * 3) / 1000.0),
+        "displacement_m": (energy_j / 1e9) / max(1.0, footprint_area ** 0.5),
+        "seismic_magnitude_mw": max(0.0, 0.5 + math.log10(energy_j) * 0.166) if energy_j > 0 else 0.0,
+        "blast_radius_km": max(0.1, (energy_j / 1e15) ** 0.33 * 10),
+    }
+
+
+def memo_stats():
+    info = _impact_metrics_cached.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize}
+
+
+def clear_memo():
+    _impact_metrics_cached.cache_clear()
+
+
+def sphere_mass_array(diameter_m, density=DEFAULT_DENSITY):
+    import numpy as np
+
+    r = np.asarray(diameter_m, dtype=np.float64) / 2.0
+    return (4.0 / 3.0) * np.pi * r ** 3 * density
+
+
+def impact_metrics_array(velocity_kms, diameter_m, mass_kg=None, density=DEFAULT_DENSITY):
+    """Evaluate every impact metric for broadcast-compatible input arrays.
+
+    When `mass_kg` is None it is estimated from diameter and density.
+    Returns a dict of float64 arrays keyed by COLUMNS.
+    """
+    import numpy as np
+
+    v_kms, d_m, rho = np.broadcast_arrays(
+        np.asarray(velocity_kms, dtype=np.float64),
+        np.asarray(diameter_m, dtype=np.float64),
+        np.asarray(density, dtype=np.float64),
+    )
+    if mass_kg is None:
+        mass = sphere_mass_array(d_m, rho)
+    else:
+        mass = np.broadcast_to(np.asarray(mass_kg, dtype=np.float64), v_kms.shape)
+
+    k, a, b = CRATER_DEPTH_DETAILED
+    with np.errstate(divide="ignore", invalid="ignore"):
+        v_ms = v_kms * 1000.0
+        momentum = mass * v_ms
+        energy_j = 0.5 * mass * v_ms * v_ms
+        energy_mt = energy_j / TNT_MT_J
+        depth = k * d_m ** a * (energy_j / 1e15) ** b * 10
+        footprint_area = np.pi * d_m ** 2
+        displacement_m = (energy_j / 1e9) / np.maximum(1.0, np.sqrt(footprint_area))
+        seismic = np.maximum(0.0, 0.5 + np.log10(energy_j) * 0.166)
+        blast_radius_km = np.maximum(0.1, (energy_j / 1e15) ** 0.33 * 10)
+
+    return {
+        "velocity_kms": v_kms,
+        "diameter_m": d_m,
+        "density_kg_m3": rho,
+        "mass_kg": mass,
+        "momentum": momentum,
+        "impact_energy_j": energy_j,
+        "impact_energy_mt": energy_mt,
+        "crater_depth_m": depth,
+        "crater_diameter_km": np.maximum(0.001, depth * 3 / 1000.0),
+        "displacement_m": displacement_m,
+        "seismic_magnitude_mw": seismic,
+        "blast_radius_km": blast_radius_km,
+    }
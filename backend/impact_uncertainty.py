@@ -0,0 +1,303 @@
+"""Monte Carlo impact uncertainty for /api/impact/uncertainty.
+
+Diameter is drawn log-uniformly between the NeoWs min/max estimates (the
+spread comes from the unknown albedo); density and velocity are normal and
+clipped at four standard deviations. Samples are evaluated with
+`impact_metrics_array` in chunks. Each chunk is reduced to fixed-edge
+histograms plus running moments, so partial results from any number of
+chunks and processes merge by addition, and percentiles are read off the
+merged histogram. Large runs are spread over a process pool, stop
+submitting work once the time budget is spent, and can report progress as
+they go.
+"""
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+import impact_physics as physics
+
+METRICS = ("impact_energy_mt", "crater_diameter_km", "seismic_magnitude_mw", "blast_radius_km")
+LINEAR_METRICS = ("seismic_magnitude_mw",)
+PERCENTILES = (5, 25, 50, 75, 95)
+HISTOGRAM_BINS = 200
+CHUNK_SAMPLES = 100_000
+CLIP_SIGMA = 4.0
+
+
+class UncertaintyError(ValueError):
+    pass
+
+
+def _positive(value, field, required=True):
+    if value is None:
+        if required:
+            raise UncertaintyError(f"{field} is required")
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise UncertaintyError(f"Invalid numeric input for {field}")
+    if not math.isfinite(value) or value <= 0:
+        raise UncertaintyError(f"{field} must be a positive number")
+    return value
+
+
+class UncertaintyModel:
+    """Input distributions; plain floats so it pickles cheaply to pool workers."""
+
+    def __init__(self, diameter_min_m, diameter_max_m, density_mean, density_sd, velocity_mean_kms, velocity_sd_kms):
+        if diameter_min_m > diameter_max_m:
+            diameter_min_m, diameter_max_m = diameter_max_m, diameter_min_m
+        self.diameter_min_m = diameter_min_m
+        self.diameter_max_m = diameter_max_m
+        self.density_mean = density_mean
+        self.density_sd = density_sd
+        self.velocity_mean_kms = velocity_mean_kms
+        self.velocity_sd_kms = velocity_sd_kms
+
+    @classmethod
+    def from_payload(cls, payload, defaults=None):
+        """Build from request JSON; `defaults` (e.g. catalog values) fill missing fields."""
+        merged = {**(defaults or {}), **{k: v for k, v in payload.items() if v is not None}}
+        d_min = _positive(merged.get("diameter_min_m"), "diameter_min_m", required=False)
+        d_max = _positive(merged.get("diameter_max_m"), "diameter_max_m", required=False)
+        if d_min is None or d_max is None:
+            d = _positive(merged.get("diameter_m"), "diameter_m (or diameter_min_m and diameter_max_m)")
+            spread = float(merged.get("diameter_spread", 0.25))
+            d_min, d_max = d * (1 - spread), d * (1 + spread)
+            if d_min <= 0:
+                raise UncertaintyError("diameter_spread must be below 1")
+        density = _positive(merged.get("density_kg_m3", physics.DEFAULT_DENSITY), "density_kg_m3")
+        density_sd = float(merged.get("density_sd", 0.25 * density))
+        velocity = _positive(merged.get("velocity_kms"), "velocity_kms")
+        velocity_sd = float(merged.get("velocity_sd_kms", 0.1 * velocity))
+        if density_sd < 0 or velocity_sd < 0:
+            raise UncertaintyError("standard deviations must not be negative")
+        return cls(d_min, d_max, density, density_sd, velocity, velocity_sd)
+
+    def _normal_bounds(self, mean, sd):
+        return max(mean * 0.05, mean - CLIP_SIGMA * sd), mean + CLIP_SIGMA * sd
+
+    def sample(self, rng, n):
+        """(velocity_kms, diameter_m, density) arrays of `n` draws."""
+        log_d = rng.uniform(math.log(self.diameter_min_m), math.log(self.diameter_max_m), n)
+        rho = np.clip(rng.normal(self.density_mean, self.density_sd, n), *self._normal_bounds(self.density_mean, self.density_sd))
+        v = np.clip(rng.normal(self.velocity_mean_kms, self.velocity_sd_kms, n),
+                    *self._normal_bounds(self.velocity_mean_kms, self.velocity_sd_kms))
+        return v, np.exp(log_d), rho
+
+    def histogram_edges(self, bins=HISTOGRAM_BINS):
+        """Fixed bin edges per metric covering every value the clipped inputs can produce."""
+        rho_lo, rho_hi = self._normal_bounds(self.density_mean, self.density_sd)
+        v_lo, v_hi = self._normal_bounds(self.velocity_mean_kms, self.velocity_sd_kms)
+        # Every reported metric increases with velocity, diameter and density.
+        corners = physics.impact_metrics_array(
+            np.array([v_lo, v_hi]), np.array([self.diameter_min_m, self.diameter_max_m]), density=np.array([rho_lo, rho_hi])
+        )
+        edges = {}
+        for name in METRICS:
+            lo, hi = float(corners[name][0]), float(corners[name][1])
+            if name in LINEAR_METRICS:
+                pad = max(1e-6, (hi - lo) * 1e-3)
+                edges[name] = np.linspace(lo - pad, hi + pad, bins + 1)
+            else:
+                edges[name] = np.geomspace(lo * 0.999, hi * 1.001, bins + 1)
+        return edges
+
+    def describe(self):
+        return {
+            "diameter_m": {"distribution": "log-uniform", "min": self.diameter_min_m, "max": self.diameter_max_m},
+            "density_kg_m3": {"distribution": "normal", "mean": self.density_mean, "sd": self.density_sd},
+            "velocity_kms": {"distribution": "normal", "mean": self.velocity_mean_kms, "sd": self.velocity_sd_kms},
+        }
+
+
+def run_chunk(model, n, seed, edges):
+    """Evaluate `n` samples; returns mergeable partial statistics per metric."""
+    rng = np.random.default_rng(seed)
+    v, d, rho = model.sample(rng, n)
+    m = physics.impact_metrics_array(v, d, density=rho)
+    out = {"samples": n}
+    for name in METRICS:
+        values = m[name]
+        counts, _ = np.histogram(values, bins=edges[name])
+        out[name] = {
+            "counts": counts,
+            "sum": float(values.sum()),
+            "sumsq": float(np.dot(values, values)),
+            "min": float(values.min()),
+            "max": float(values.max()),
+        }
+    return out
+
+
+class Summary:
+    """Running merge of `run_chunk` partials."""
+
+    def __init__(self, model, edges, requested):
+        self.model = model
+        self.edges = edges
+        self.requested = requested
+        self.samples = 0
+        self.started = time.perf_counter()
+        self.stats = {
+            name: {"counts": np.zeros(len(edges[name]) - 1, dtype=np.int64), "sum": 0.0, "sumsq": 0.0,
+                   "min": math.inf, "max": -math.inf}
+            for name in METRICS
+        }
+
+    def add(self, partial):
+        self.samples += partial["samples"]
+        for name in METRICS:
+            acc, part = self.stats[name], partial[name]
+            acc["counts"] += part["counts"]
+            acc["sum"] += part["sum"]
+            acc["sumsq"] += part["sumsq"]
+            acc["min"] = min(acc["min"], part["min"])
+            acc["max"] = max(acc["max"], part["max"])
+
+    def _percentile(self, name, q):
+        counts = self.stats[name]["counts"]
+        edges = self.edges[name]
+        cumulative = np.cumsum(counts)
+        target = q / 100.0 * cumulative[-1]
+        k = int(np.searchsorted(cumulative, target, side="left"))
+        k = min(k, len(counts) - 1)
+        before = cumulative[k - 1] if k else 0
+        frac = (target - before) / counts[k] if counts[k] else 0.0
+        lo, hi = edges[k], edges[k + 1]
+        if name in LINEAR_METRICS:
+            return float(lo + (hi - lo) * frac)
+        return float(lo * (hi / lo) ** frac)
+
+    def to_dict(self, complete, histogram=True):
+        metrics = {}
+        for name in METRICS:
+            acc = self.stats[name]
+            entry = {}
+            if self.samples:
+                mean = acc["sum"] / self.samples
+                entry = {
+                    "mean": mean,
+                    "std": math.sqrt(max(0.0, acc["sumsq"] / self.samples - mean * mean)),
+                    "min": acc["min"],
+                    "max": acc["max"],
+                    "percentiles": {f"p{q}": self._percentile(name, q) for q in PERCENTILES},
+                }
+            if histogram:
+                entry["histogram"] = {"edges": self.edges[name].tolist(), "counts": acc["counts"].tolist()}
+            metrics[name] = entry
+        return {
+            "status": "ok",
+            "complete": complete,
+            "samples": self.samples,
+            "requested": self.requested,
+            "elapsed_s": time.perf_counter() - self.started,
+            "inputs": self.model.describe(),
+            "metrics": metrics,
+        }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers):
+    """Process-wide worker pool, started on first use.
+
+    Uses the spawn start method: forking a threaded server process can
+    deadlock the child on a lock some other thread held at fork time.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def iter_run(model, samples, time_budget, seed=None, workers=None, chunk_samples=CHUNK_SAMPLES, inline_below=None):
+    """Run the simulation, yielding the Summary after every merged chunk.
+
+    Runs of at most `inline_below` samples (default: one chunk) are evaluated
+    in this thread; larger runs go to the process pool with at most two
+    chunks in flight per worker. No new chunk starts after `time_budget`
+    seconds; the last yielded Summary says how many samples completed.
+    """
+    workers = workers or os.cpu_count() or 1
+    inline_below = chunk_samples if inline_below is None else inline_below
+    edges = model.histogram_edges()
+    summary = Summary(model, edges, samples)
+    sizes = [chunk_samples] * (samples // chunk_samples)
+    if samples % chunk_samples:
+        sizes.append(samples % chunk_samples)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    deadline = summary.started + time_budget
+
+    if samples <= inline_below or workers <= 1:
+        for size, child in zip(sizes, seeds):
+            if time.perf_counter() >= deadline and summary.samples:
+                break
+            summary.add(run_chunk(model, size, child, edges))
+            yield summary
+        return
+
+    pool = get_pool(workers)
+    pending = {}
+    queue = list(zip(sizes, seeds))
+    try:
+        while queue or pending:
+            while queue and len(pending) < 2 * workers and time.perf_counter() < deadline:
+                size, child = queue.pop(0)
+                pending[pool.submit(run_chunk, model, size, child, edges)] = (size, child)
+            if not pending:
+                break
+            done, _ = wait(pending, timeout=max(0.0, deadline - time.perf_counter()) + 0.05,
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = pending.pop(future)
+                try:
+                    summary.add(future.result())
+                except BrokenProcessPool:
+                    # A worker died (e.g. OOM-killed): drop the pool and finish in this thread.
+                    shutdown_pool()
+                    queue = [chunk] + list(pending.values()) + queue
+                    pending = {}
+                    break
+            if done:
+                yield summary
+            if time.perf_counter() >= deadline:
+                queue = []
+            elif _pool is None:
+                for size, child in queue:
+                    if time.perf_counter() >= deadline:
+                        break
+                    summary.add(run_chunk(model, size, child, edges))
+                    yield summary
+                return
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def run(model, samples, time_budget, seed=None, workers=None, **kwargs):
+    """Run to completion (or budget) and return the final result dict."""
+    summary = None
+    for summary in iter_run(model, samples, time_budget, seed, workers, **kwargs):
+        pass
+    if summary is None:
+        summary = Summary(model, model.histogram_edges(), samples)
+    return summary.to_dict(complete=summary.samples >= samples)
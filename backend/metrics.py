@@ -0,0 +1,174 @@
+"""In-process metrics in the Prometheus text format, served on /metrics.
+
+Counters and histograms are keyed by label values and live in one
+`Registry` per process. Histograms reuse upstream.LatencyHistogram, so
+request, upstream and payload-size distributions share one implementation.
+Components that already keep their own counters (caches, bulkheads,
+upstreams) are not double-counted: their `stats()` is read at scrape time
+and exported as gauges. Each gunicorn worker keeps its own registry, so a
+scrape reports the worker that answered it.
+"""
+import re
+import threading
+
+from upstream import LatencyHistogram
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_INVALID_NAME = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def metric_name(*parts):
+    return _INVALID_NAME.sub("_", "_".join(str(p) for p in parts if p))
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        text = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{text}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, n in items:
+            lines.append(f"{self.name}{_labels(self.labels, values)} {_number(n)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=REQUEST_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def series(self, *label_values):
+        with self._lock:
+            hist = self._series.get(label_values)
+            if hist is None:
+                hist = self._series[label_values] = LatencyHistogram(self.buckets)
+            return hist
+
+    def observe(self, value, *label_values):
+        self.series(*label_values).observe(value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(self._series.items())
+        for values, hist in items:
+            lines.extend(render_histogram(self.name, self.labels, values, hist.snapshot()))
+        return lines
+
+
+def render_histogram(name, label_names, label_values, snapshot):
+    """Sample lines for one LatencyHistogram.snapshot()."""
+    lines = []
+    for bound, cumulative in snapshot["buckets"].items():
+        labels = _labels(label_names + ("le",), tuple(label_values) + (bound,))
+        lines.append(f"{name}_bucket{labels} {cumulative}")
+    labels = _labels(label_names, label_values)
+    lines.append(f"{name}_sum{labels} {_number(float(snapshot['sum']))}")
+    lines.append(f"{name}_count{labels} {snapshot['count']}")
+    return lines
+
+
+def flatten_stats(stats, prefix=""):
+    """Numeric leaves of a nested stats() dict as {"a_b_c": value}; strings and None are skipped."""
+    out = {}
+    for key, value in (stats or {}).items():
+        name = metric_name(prefix, key)
+        if isinstance(value, bool):
+            out[name] = int(value)
+        elif isinstance(value, (int, float)):
+            out[name] = value
+        elif isinstance(value, dict):
+            out.update(flatten_stats(value, name))
+    return out
+
+
+class Registry:
+    def __init__(self, namespace="app"):
+        self.namespace = namespace
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(metric_name(self.namespace, name), help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=REQUEST_BUCKETS):
+        return self._add(Histogram(metric_name(self.namespace, name), help, labels, buckets))
+
+    def _add(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def collect(self, fn):
+        """Register `fn() -> list of exposition lines`, called at every scrape."""
+        with self._lock:
+            self._collectors.append(fn)
+        return fn
+
+    def collect_stats(self, component, stats_fn):
+        """Export the numeric fields of `stats_fn()` as gauges named <namespace>_<component>_<field>."""
+        prefix = metric_name(self.namespace, component)
+
+        def collector():
+            lines = []
+            for name, value in sorted(flatten_stats(stats_fn(), prefix).items()):
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_number(value)}")
+            return lines
+
+        return self.collect(collector)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                # One broken component must not take the whole scrape down.
+                lines.append(f"# collector {getattr(collector, '__name__', '?')} failed: {type(e).__name__}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,206 @@
+"""Ingest the NASA NeoWs catalog into the local SQLite store.
+
+Usage (from backend/):
+    python neo_ingest.py full [--workers 4] [--max-pages N] [--restart]
+    python neo_ingest.py sync [--days 7]
+    python neo_ingest.py status
+
+`full` pages through /neo/browse with a bounded pool of worker threads. Every
+page is written together with its checkpoint, so an interrupted run picks up
+the missing pages on the next `full` (use `--restart` to start over).
+`sync` is the incremental refresh: it asks /feed which objects have close
+approaches since the last sync, looks each one up, and rewrites only rows
+whose content changed. Reads NASA_API_KEY, NASA_NEOWS_URL and NEO_DB_PATH
+from the environment.
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from neo_store import NeoStore
+from upstream import get_upstream
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "neo.sqlite3")
+NEOWS_URL = "https://api.nasa.gov/neo/rest/v1"
+BROWSE_PAGE_SIZE = 20  # NeoWs maximum
+FEED_MAX_DAYS = 7  # NeoWs rejects longer feed windows
+
+
+class IngestError(Exception):
+    pass
+
+
+class NeoWsClient:
+    def __init__(self, base_url=None, api_key=None, upstream=None, timeout=20):
+        self.base_url = (base_url or os.environ.get("NASA_NEOWS_URL") or NEOWS_URL).rstrip("/")
+        self.api_key = api_key or os.environ.get("NASA_API_KEY") or "DEMO_KEY"
+        self.upstream = upstream or get_upstream("nasa")
+        self.timeout = timeout
+
+    def _get(self, path, **params):
+        params["api_key"] = self.api_key
+        r = self.upstream.request("GET", self.base_url + path, params=params, timeout=self.timeout)
+        if r.status_code != 200:
+            raise IngestError(f"GET {path} returned HTTP {r.status_code}")
+        return r.json()
+
+    def browse(self, page, size=BROWSE_PAGE_SIZE):
+        """One browse page: (objects, total_pages)."""
+        payload = self._get("/neo/browse", page=page, size=size)
+        total_pages = int((payload.get("page") or {}).get("total_pages") or 0)
+        return payload.get("near_earth_objects") or [], total_pages
+
+    def feed_ids(self, start, end):
+        """IDs of objects with a close approach between `start` and `end` (dates, inclusive)."""
+        payload = self._get("/feed", start_date=start.isoformat(), end_date=end.isoformat())
+        ids = []
+        for objects in (payload.get("near_earth_objects") or {}).values():
+            for n in objects:
+                neo_id = n.get("neo_reference_id") or n.get("id")
+                if neo_id:
+                    ids.append(str(neo_id))
+        return ids
+
+    def lookup(self, neo_id):
+        return self._get(f"/neo/{neo_id}")
+
+
+def ingest_full(store, client, workers=4, page_size=BROWSE_PAGE_SIZE, max_pages=None, restart=False, log=None):
+    """Crawl every browse page into `store`, resuming an unfinished run unless `restart`."""
+    log = log or (lambda msg: None)
+    run = store.get_meta("full_run")
+    if run is None or restart:
+        if run is not None:
+            store.clear_checkpoints(run["id"])
+        run = {"id": uuid.uuid4().hex, "started_at": time.time(), "total_pages": None, "page_size": page_size}
+        store.set_meta("full_run", run)
+    run_id = run["id"]
+    page_size = run["page_size"]
+    done = store.done_pages(run_id)
+    totals = {"inserted": 0, "updated": 0, "unchanged": 0, "pages": 0, "failed_pages": []}
+
+    def record(page, neos):
+        counts = store.upsert(neos, run_id=run_id, page=page)
+        for k, v in counts.items():
+            totals[k] += v
+        totals["pages"] += 1
+
+    # Page 0 tells us how many pages there are.
+    if run["total_pages"] is None:
+        neos, total_pages = client.browse(0, page_size)
+        run["total_pages"] = total_pages
+        store.set_meta("full_run", run)
+        if 0 not in done:
+            record(0, neos)
+            done.add(0)
+
+    total_pages = run["total_pages"]
+    last_page = total_pages if max_pages is None else min(total_pages, max_pages)
+    pending = [p for p in range(last_page) if p not in done]
+    log(f"run {run_id[:8]}: {len(done)}/{total_pages} pages done, fetching {len(pending)} with {workers} workers")
+
+    # Workers only fetch; this thread does all SQLite writes.
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(client.browse, page, page_size): page for page in pending}
+        for future in as_completed(futures):
+            page = futures[future]
+            try:
+                neos, _ = future.result()
+            except Exception as e:
+                totals["failed_pages"].append(page)
+                log(f"page {page} failed: {e}")
+                continue
+            record(page, neos)
+            if totals["pages"] % 50 == 0:
+                log(f"{totals['pages']} pages written")
+
+    complete = not totals["failed_pages"] and len(store.done_pages(run_id)) >= total_pages
+    if complete:
+        store.clear_checkpoints(run_id)
+        store.set_meta("full_run", None)
+        store.set_meta("last_full_sync", time.time())
+        store.set_meta("last_sync_date", datetime.date.today().isoformat())
+    totals["failed_pages"].sort()
+    totals.update({"run_id": run_id, "total_pages": total_pages, "complete": complete, "objects": store.count()})
+    return totals
+
+
+def feed_windows(start, end, max_days=FEED_MAX_DAYS):
+    """Split [start, end] into consecutive windows the feed endpoint accepts."""
+    windows = []
+    while start <= end:
+        stop = min(end, start + datetime.timedelta(days=max_days - 1))
+        windows.append((start, stop))
+        start = stop + datetime.timedelta(days=1)
+    return windows
+
+
+def sync_recent(store, client, workers=4, days=FEED_MAX_DAYS, today=None, log=None):
+    """Refresh objects with close approaches since the last sync (or the last `days` days)."""
+    log = log or (lambda msg: None)
+    today = today or datetime.date.today()
+    last = store.get_meta("last_sync_date")
+    start = datetime.date.fromisoformat(last) if last else today - datetime.timedelta(days=days)
+    # Include the coming week so newly announced approaches are picked up too.
+    end = today + datetime.timedelta(days=FEED_MAX_DAYS - 1)
+
+    ids = []
+    for window in feed_windows(start, end):
+        ids.extend(client.feed_ids(*window))
+    ids = list(dict.fromkeys(ids))
+    log(f"{len(ids)} objects with approaches between {start} and {end}")
+
+    totals = {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0, "checked": len(ids)}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(client.lookup, neo_id) for neo_id in ids]
+        for future in as_completed(futures):
+            try:
+                neo = future.result()
+            except Exception:
+                totals["failed"] += 1
+                continue
+            for k, v in store.upsert([neo]).items():
+                totals[k] += v
+
+    if not totals["failed"]:
+        store.set_meta("last_sync_date", today.isoformat())
+    store.set_meta("last_incremental_sync", time.time())
+    totals["objects"] = store.count()
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=os.environ.get("NEO_DB_PATH", DEFAULT_DB_PATH))
+    parser.add_argument("--workers", type=int, default=4, help="parallel NeoWs requests")
+    sub = parser.add_subparsers(dest="command", required=True)
+    full = sub.add_parser("full", help="crawl the whole browse catalog (resumable)")
+    full.add_argument("--max-pages", type=int, help="stop after this many pages (for trial runs)")
+    full.add_argument("--page-size", type=int, default=BROWSE_PAGE_SIZE)
+    full.add_argument("--restart", action="store_true", help="discard checkpoints of an unfinished run")
+    sync = sub.add_parser("sync", help="refresh objects with recent close approaches")
+    sync.add_argument("--days", type=int, default=FEED_MAX_DAYS, help="look-back window when never synced")
+    sub.add_parser("status", help="print store counters")
+    args = parser.parse_args(argv)
+
+    store = NeoStore(args.db)
+    log = lambda msg: print(msg, file=sys.stderr)  # noqa: E731
+    if args.command == "status":
+        result = store.stats()
+    else:
+        client = NeoWsClient()
+        if args.command == "full":
+            result = ingest_full(store, client, args.workers, args.page_size, args.max_pages, args.restart, log)
+        else:
+            result = sync_recent(store, client, args.workers, args.days, log=log)
+    print(json.dumps(result, indent=2))
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""Local SQLite store for the NeoWs catalog.
+
+`neo_ingest.py` fills it from the NeoWs browse/feed/lookup endpoints; the API
+reads the catalog from here instead of calling NASA per request. One row per
+object in `neos` (typed, indexed columns including the osculating orbital
+elements), Earth close approaches in `close_approaches`, and page checkpoints
+for resumable ingestion runs in `ingest_pages`. Each row carries a hash of its
+parsed content so re-ingesting an unchanged object is a no-op.
+`load_columns` serves the catalog in array-backed form, optionally through a
+memory-mapped file that is rebuilt only when the stored catalog changes.
+"""
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+NEO_COLUMNS = (
+    "id", "name", "absolute_magnitude", "diameter_min_m", "diameter_max_m", "is_hazardous",
+    "velocity_kms", "miss_distance_km", "close_approach_date",
+    "epoch_jd", "a_au", "e", "i_deg", "node_deg", "peri_deg", "M_deg", "n_deg_day",
+)
+ORBIT_COLUMNS = ("epoch_jd", "a_au", "e", "i_deg", "node_deg", "peri_deg", "M_deg", "n_deg_day")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS neos (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    absolute_magnitude REAL,
+    diameter_min_m REAL,
+    diameter_max_m REAL,
+    is_hazardous INTEGER NOT NULL DEFAULT 0,
+    velocity_kms REAL,
+    miss_distance_km REAL,
+    close_approach_date TEXT,
+    epoch_jd REAL,
+    a_au REAL,
+    e REAL,
+    i_deg REAL,
+    node_deg REAL,
+    peri_deg REAL,
+    M_deg REAL,
+    n_deg_day REAL,
+    content_hash TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS neos_name ON neos (name);
+CREATE INDEX IF NOT EXISTS neos_hazardous ON neos (is_hazardous);
+CREATE TABLE IF NOT EXISTS close_approaches (
+    neo_id TEXT NOT NULL,
+    epoch_ms INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    miss_distance_km REAL,
+    velocity_kms REAL,
+    orbiting_body TEXT NOT NULL,
+    PRIMARY KEY (neo_id, epoch_ms, orbiting_body)
+);
+CREATE INDEX IF NOT EXISTS close_approaches_epoch ON close_approaches (epoch_ms);
+CREATE TABLE IF NOT EXISTS ingest_pages (
+    run_id TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    objects INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (run_id, page)
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def _float(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def parse_neo(n, now_ms=None):
+    """Map one NeoWs object to (row dict, close approach rows); None when it has no id."""
+    neo_id = n.get("neo_reference_id") or n.get("id")
+    if not neo_id:
+        return None
+    neo_id = str(neo_id)
+    meters = (n.get("estimated_diameter") or {}).get("meters") or {}
+    orbit = n.get("orbital_data") or {}
+
+    approaches = []
+    for ca in n.get("close_approach_data") or []:
+        epoch_ms = ca.get("epoch_date_close_approach")
+        if epoch_ms is None:
+            continue
+        approaches.append((
+            neo_id,
+            int(epoch_ms),
+            ca.get("close_approach_date") or "",
+            _float((ca.get("miss_distance") or {}).get("kilometers")),
+            _float((ca.get("relative_velocity") or {}).get("kilometers_per_second")),
+            ca.get("orbiting_body") or "Earth",
+        ))
+    approaches.sort(key=lambda a: a[1])
+
+    # Headline approach: the Earth approach nearest to now.
+    now_ms = time.time() * 1000 if now_ms is None else now_ms
+    earth = [a for a in approaches if a[5] == "Earth"]
+    nearest = min(earth, key=lambda a: abs(a[1] - now_ms)) if earth else None
+
+    row = {
+        "id": neo_id,
+        "name": n.get("name") or n.get("name_limited") or neo_id,
+        "absolute_magnitude": _float(n.get("absolute_magnitude_h")),
+        "diameter_min_m": _float(meters.get("estimated_diameter_min")),
+        "diameter_max_m": _float(meters.get("estimated_diameter_max")),
+        "is_hazardous": 1 if n.get("is_potentially_hazardous_asteroid") else 0,
+        "velocity_kms": nearest[4] if nearest else None,
+        "miss_distance_km": nearest[3] if nearest else None,
+        "close_approach_date": nearest[2] if nearest else None,
+        "epoch_jd": _float(orbit.get("epoch_osculation")),
+        "a_au": _float(orbit.get("semi_major_axis")),
+        "e": _float(orbit.get("eccentricity")),
+        "i_deg": _float(orbit.get("inclination")),
+        "node_deg": _float(orbit.get("ascending_node_longitude")),
+        "peri_deg": _float(orbit.get("perihelion_argument")),
+        "M_deg": _float(orbit.get("mean_anomaly")),
+        "n_deg_day": _float(orbit.get("mean_motion")),
+    }
+    return row, approaches
+
+
+def _content_hash(row, approaches):
+    # The headline approach depends on the current time, so hash the inputs
+    # it is derived from rather than the derived columns.
+    stable = {k: v for k, v in row.items() if k not in ("velocity_kms", "miss_distance_km", "close_approach_date")}
+    blob = json.dumps([stable, approaches], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+class NeoStore:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        # Last load_columns result; handed out again while the catalog version holds.
+        self._columns_lock = threading.Lock()
+        self._columns = None
+        self._columns_key = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        # sqlite3 connections cannot be shared across threads; keep one per thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # -- writes -----------------------------------------------------------
+
+    def upsert(self, neos, run_id=None, page=None):
+        """Insert or update NeoWs objects; returns {"inserted", "updated", "unchanged"}.
+
+        With `run_id`/`page` the page checkpoint is written in the same
+        transaction, so a crash never records a page whose rows were lost.
+        """
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            for n in neos:
+                parsed = parse_neo(n)
+                if parsed is None:
+                    continue
+                row, approaches = parsed
+                digest = _content_hash(row, approaches)
+                existing = conn.execute("SELECT content_hash FROM neos WHERE id = ?", (row["id"],)).fetchone()
+                if existing is not None and existing[0] == digest:
+                    counts["unchanged"] += 1
+                    continue
+                counts["updated" if existing is not None else "inserted"] += 1
+                conn.execute(
+                    "INSERT OR REPLACE INTO neos (%s, content_hash, updated_at) VALUES (%s, ?, ?)"
+                    % (", ".join(NEO_COLUMNS), ", ".join("?" * len(NEO_COLUMNS))),
+                    [row[c] for c in NEO_COLUMNS] + [digest, now],
+                )
+                conn.execute("DELETE FROM close_approaches WHERE neo_id = ?", (row["id"],))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO close_approaches "
+                    "(neo_id, epoch_ms, date, miss_distance_km, velocity_kms, orbiting_body) VALUES (?, ?, ?, ?, ?, ?)",
+                    approaches,
+                )
+            if run_id is not None and page is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ingest_pages (run_id, page, objects, fetched_at) VALUES (?, ?, ?, ?)",
+                    (run_id, page, len(neos), now),
+                )
+        return counts
+
+    def get_meta(self, key, default=None):
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value):
+        conn = self._conn()
+        with conn:
+            if value is None:
+                conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+            else:
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def done_pages(self, run_id):
+        rows = self._conn().execute("SELECT page FROM ingest_pages WHERE run_id = ?", (run_id,))
+        return {r[0] for r in rows}
+
+    def clear_checkpoints(self, run_id):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM ingest_pages WHERE run_id = ?", (run_id,))
+
+    # -- reads ------------------------------------------------------------
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM neos").fetchone()[0]
+
+    def load_catalog(self):
+        """Every stored object in the /api/asteroids catalog format, ordered by name."""
+        rows = self._conn().execute("SELECT %s FROM neos ORDER BY name" % ", ".join(NEO_COLUMNS)).fetchall()
+        total = len(rows)
+        out = []
+        for i, values in enumerate(rows):
+            row = dict(zip(NEO_COLUMNS, values))
+            dmin, dmax = row["diameter_min_m"], row["diameter_max_m"]
+            diameter_m = (dmin + dmax) / 2 if dmin is not None and dmax is not None else (dmin or dmax)
+            entry = {
+                "id": row["id"],
+                "neo_reference_id": row["id"],
+                "label": row["name"],
+                "name": row["name"],
+                # Ring layout for clients that do not play back /api/ephemeris.
+                "r": 4.8 + (i % 6) * 0.15,
+                "theta": (i / max(1, total)) * 2 * math.pi,
+                "y": 0,
+                "size": diameter_m and max(0.02, diameter_m / 1000) or 0.08,
+                "diameter_m": diameter_m,
+                "diameter_min_m": dmin,
+                "diameter_max_m": dmax,
+                "absolute_magnitude": row["absolute_magnitude"],
+                "is_hazardous": bool(row["is_hazardous"]),
+                "velocity_kms": row["velocity_kms"],
+                "miss_distance_km": row["miss_distance_km"],
+                "close_approach_date": row["close_approach_date"],
+                "close_approach": row["miss_distance_km"] is not None,
+            }
+            if row["a_au"] is not None and row["e"] is not None:
+                entry["orbit"] = {c: row[c] for c in ORBIT_COLUMNS}
+            out.append(entry)
+        return out
+
+    def catalog_version(self):
+        """Changes whenever an object is added or its content changes (unchanged re-ingests keep it)."""
+        count, updated = self._conn().execute("SELECT COUNT(*), MAX(updated_at) FROM neos").fetchone()
+        return f"{count}:{updated}"
+
+    def load_columns(self, cache_path=None):
+        """`load_catalog` as CatalogColumns.
+
+        The same object is returned while the catalog version is unchanged, so
+        state derived from it (indexes, payloads) survives cache refreshes.
+        With `cache_path` the columns are saved there in the binary layout and
+        memory-mapped back; other processes map that file directly until the
+        catalog version changes.
+        """
+        version = self.catalog_version()
+        with self._columns_lock:
+            if self._columns is not None and self._columns_key == (version, cache_path):
+                return self._columns
+            columns = self._load_columns(version, cache_path)
+            self._columns, self._columns_key = columns, (version, cache_path)
+            return columns
+
+    def _load_columns(self, version, cache_path):
+        from catalog_columns import CatalogColumns, CatalogError
+
+        if cache_path and os.path.exists(cache_path):
+            try:
+                cached = CatalogColumns.load(cache_path)
+                if cached.meta.get("version") == version:
+                    return cached
+            except (OSError, ValueError, KeyError, CatalogError):
+                pass
+        columns = CatalogColumns.from_records(self.load_catalog())
+        columns.meta = {"version": version}
+        if not cache_path:
+            return columns
+        try:
+            columns.save(cache_path)
+            return CatalogColumns.load(cache_path)
+        except OSError:
+            return columns
+
+    def stats(self):
+        conn = self._conn()
+        return {
+            "objects": self.count(),
+            "close_approaches": conn.execute("SELECT COUNT(*) FROM close_approaches").fetchone()[0],
+            "last_full_sync": self.get_meta("last_full_sync"),
+            "last_incremental_sync": self.get_meta("last_incremental_sync"),
+            "full_run_in_progress": self.get_meta("full_run") is not None,
+        }
@@ -0,0 +1,69 @@
+"""Response bodies serialized and compressed once, served many times.
+
+A PreparedPayload holds the body bytes, a strong ETag (content hash), and
+ready-made gzip and, when the optional `brotli` package is installed,
+brotli variants. Handlers rebuild it only when the underlying data changes.
+"""
+import gzip
+import hashlib
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# Preferred order when the client accepts several encodings.
+ENCODING_PREFERENCE = ("br", "gzip", "identity")
+
+
+class PreparedPayload:
+    def __init__(self, body, content_type="application/json", min_compress_size=512):
+        self.body = body
+        self.content_type = content_type
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.variants = {"identity": body}
+        if len(body) >= min_compress_size:
+            compressed = gzip.compress(body, compresslevel=6, mtime=0)
+            if len(compressed) < len(body):
+                self.variants["gzip"] = compressed
+            if brotli is not None:
+                compressed = brotli.compress(body, quality=9)
+                if len(compressed) < len(body):
+                    self.variants["br"] = compressed
+
+    def not_modified(self, if_none_match):
+        """True when an If-None-Match header value matches this payload's ETag."""
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*":
+                return True
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag == self.etag:
+                return True
+        return False
+
+    def negotiate(self, accept_encoding):
+        """Pick the best available encoding for an Accept-Encoding header: (encoding, body)."""
+        accepted = {}
+        for part in (accept_encoding or "").split(","):
+            name, _, params = part.strip().partition(";")
+            name = name.strip().lower()
+            if not name:
+                continue
+            q = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    q = float(params[2:])
+                except ValueError:
+                    q = 0.0
+            accepted[name] = q
+        for encoding in ENCODING_PREFERENCE:
+            if encoding == "identity":
+                break
+            if encoding in self.variants and accepted.get(encoding, accepted.get("*", 0)) > 0:
+                return encoding, self.variants[encoding]
+        return "identity", self.body
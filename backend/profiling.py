@@ -0,0 +1,102 @@
+"""Opt-in sampling profiler for slow requests.
+
+A sampled fraction of requests runs under cProfile. When a profiled request
+takes longer than the threshold, its stats are kept: the most recent
+`keep` profiles stay in memory (top functions by cumulative time, served on
+/debug/profiles), and with a directory configured each one is also written as
+a `.prof` file for snakeviz, flameprof or `python -m pstats`. Only one
+request is profiled at a time, since the interpreter allows one active
+profiler and profiling every thread would distort the timings being measured.
+"""
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import random
+import threading
+import time
+from collections import OrderedDict
+
+
+class SlowRequestProfiler:
+    def __init__(self, threshold_s=1.0, sample_rate=0.05, keep=20, directory=None, top=40):
+        self.threshold_s = threshold_s
+        self.sample_rate = sample_rate
+        self.keep = keep
+        self.directory = directory
+        self.top = top
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+        self._profiles = OrderedDict()
+        self._ids = itertools.count(1)
+        self.sampled = 0
+        self.captured = 0
+
+    def start(self):
+        """A running cProfile.Profile if this request is sampled, else None."""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        if not self._busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (a debugger, coverage) is already active.
+            self._busy.release()
+            return None
+        self.sampled += 1
+        return profile
+
+    def finish(self, profile, seconds, label):
+        """Stop `profile`; keep it if the request took at least threshold_s. Returns the profile id or None."""
+        profile.disable()
+        self._busy.release()
+        if seconds < self.threshold_s:
+            return None
+
+        out = io.StringIO()
+        stats = pstats.Stats(profile, stream=out)
+        stats.sort_stats("cumulative").print_stats(self.top)
+        profile_id = next(self._ids)
+        entry = {
+            "id": profile_id,
+            "label": label,
+            "seconds": seconds,
+            "captured_at": time.time(),
+            "report": out.getvalue(),
+            "path": None,
+        }
+        if self.directory:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                path = os.path.join(self.directory, f"{int(entry['captured_at'])}-{os.getpid()}-{profile_id}.prof")
+                stats.dump_stats(path)
+                entry["path"] = path
+            except OSError:
+                pass
+        with self._lock:
+            self.captured += 1
+            self._profiles[profile_id] = entry
+            while len(self._profiles) > self.keep:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def list(self):
+        with self._lock:
+            return [{k: v for k, v in p.items() if k != "report"} for p in reversed(self._profiles.values())]
+
+    def get(self, profile_id):
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "threshold_s": self.threshold_s,
+                "sample_rate": self.sample_rate,
+                "sampled": self.sampled,
+                "captured": self.captured,
+                "kept": len(self._profiles),
+            }
@@ -0,0 +1,155 @@
+"""Response cache for the AI endpoints.
+
+Entries are keyed on (namespace, language, normalized text), so "What is
+DART?" and "what is dart" share one Groq answer. A bounded in-memory LRU with
+TTL sits in front of an optional SQLite file; with the file configured the
+cache survives restarts and is shared by every gunicorn worker on the host.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_PUNCT = re.compile(r"[^\w\s]", re.UNICODE)
+_WS = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Lowercase, drop punctuation and collapse whitespace."""
+    text = _PUNCT.sub(" ", str(text or "").lower())
+    return _WS.sub(" ", text).strip()
+
+
+class ResponseCache:
+    def __init__(self, max_entries=1024, ttl=24 * 3600.0, db_path=None, max_db_entries=20000):
+        self.max_entries = max_entries
+        self.ttl = float(ttl)
+        self.db_path = db_path
+        self.max_db_entries = max_db_entries
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if db_path:
+            self._init_db()
+
+    @staticmethod
+    def make_key(namespace, language, text):
+        return f"{namespace}|{(language or 'en').lower()}|{normalize_text(text)}"
+
+    def get(self, namespace, language, text):
+        key = self.make_key(namespace, language, text)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+        row = self._db_get(key, now)
+        with self._lock:
+            if row is not None:
+                self.hits += 1
+                self.disk_hits += 1
+                self._remember(key, row[0], row[1])
+                return row[1]
+            self.misses += 1
+        return None
+
+    def set(self, namespace, language, text, value):
+        if not value:
+            return
+        key = self.make_key(namespace, language, text)
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+        self._db_set(key, now, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.db_path:
+            conn = self._conn()
+            with conn:
+                conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "persistent": bool(self.db_path),
+            }
+
+    # -- internals --------------------------------------------------------
+
+    def _remember(self, key, stored_at, value):
+        # caller holds self._lock
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _conn(self):
+        # sqlite3 connections cannot be shared across threads; keep one per thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_stored_at ON responses (stored_at)")
+
+    def _db_get(self, key, now):
+        if not self.db_path:
+            return None
+        try:
+            row = self._conn().execute(
+                "SELECT stored_at, value FROM responses WHERE key = ? AND stored_at > ?", (key, now - self.ttl)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        return row
+
+    def _db_set(self, key, stored_at, value):
+        if not self.db_path:
+            return
+        try:
+            conn = self._conn()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, stored_at) VALUES (?, ?, ?)", (key, value, stored_at)
+                )
+                # Expire old rows and keep the file bounded.
+                conn.execute("DELETE FROM responses WHERE stored_at <= ?", (stored_at - self.ttl,))
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_db_entries,),
+                )
+        except sqlite3.Error:
+            pass
@@ -0,0 +1,230 @@
+"""Close-approach screening: which catalog objects pass within a distance of Earth.
+
+A `ScreeningWindow` propagates every object once per coarse time bucket and
+keeps, per bucket, the objects sorted by geocentric distance. Because every
+query is centred on Earth, that radial ordering is the spatial index: a
+threshold query is a binary search per bucket, widened by how far each object
+can move relative to Earth within half a bucket. Only the surviving
+(object, bucket) pairs are re-propagated on a fine time grid to find the
+minimum distance. Windows are cached, and each window memoizes its results
+per threshold, so repeated "most dangerous" queries cost a lookup. The
+sorted radii are float32 and the ordering int32, about 8 bytes per object
+per bucket (29 MB for 40k objects over 366 days). `ScreeningCache` is
+bounded by the total bytes of its windows as well as their number.
+"""
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import ephemeris
+import impact_physics as physics
+
+AU_KM = 149_597_870.7
+LUNAR_DISTANCE_AU = 384_400.0 / AU_KM
+AU_PER_DAY_KMS = AU_KM / 86_400.0
+EARTH_ESCAPE_KMS = 11.186
+# Fastest Earth moves on its orbit, AU/day (perihelion).
+EARTH_MAX_SPEED = ephemeris.GAUSS_K * math.sqrt((1 + 0.0167) / (1 - 0.0167))
+# Relative slack on the float32 radii so rounding never prunes a real candidate.
+RADIUS_RTOL = 1e-6
+
+
+class ScreeningWindow:
+    def __init__(self, elements, start_jd, days, diameter_m=None, bucket_days=4.0, fine_step_days=0.05):
+        self.elements = elements
+        self.start_jd = float(start_jd)
+        self.days = float(days)
+        self.diameter_m = np.asarray(
+            diameter_m if diameter_m is not None else [np.nan] * len(elements), dtype=np.float64
+        )
+        buckets = max(1, int(math.ceil(self.days / bucket_days)))
+        self.half_width = self.days / buckets / 2.0
+        self.mids = self.start_jd + self.half_width * (2 * np.arange(buckets) + 1)
+        self.fine_step_days = fine_step_days
+
+        # Upper bound on each object's speed relative to Earth: its perihelion
+        # speed plus Earth's, in AU/day.
+        e, a = elements.e, elements.a
+        self.max_speed = ephemeris.GAUSS_K * np.sqrt((1 + e) / (a * (1 - e))) + EARTH_MAX_SPEED
+
+        radius = np.empty((buckets, len(elements)), dtype=np.float64)
+        for start in range(0, len(elements), 4096):
+            chunk = elements.subset(range(start, min(start + 4096, len(elements))))
+            pos = ephemeris.positions(chunk, self.mids, "geo")
+            radius[:, start:start + len(chunk)] = np.linalg.norm(pos, axis=2).T
+        order = np.argsort(radius, axis=1)
+        self.order = order.astype(np.int32)
+        self.sorted_radius = np.take_along_axis(radius, order, axis=1).astype(np.float32)
+        self.nbytes = self.order.nbytes + self.sorted_radius.nbytes + self.max_speed.nbytes + self.diameter_m.nbytes
+
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self.last_candidate_pairs = None
+
+    def candidates(self, threshold_au):
+        """Per bucket, the object indices that could come within `threshold_au` of Earth."""
+        out = []
+        reach = self.half_width * self.max_speed
+        widest = (threshold_au + (reach.max() if len(reach) else 0.0)) / (1 - RADIUS_RTOL)
+        for b in range(len(self.mids)):
+            k = np.searchsorted(self.sorted_radius[b], widest, side="right")
+            idx = self.order[b, :k].astype(np.intp)
+            radius = self.sorted_radius[b, :k].astype(np.float64) * (1 - RADIUS_RTOL)
+            out.append(idx[radius - reach[idx] <= threshold_au])
+        return out
+
+    def _closest(self, idx, mid):
+        """Closest approach of objects `idx` inside the bucket centred on `mid`: (jd, distance_au)."""
+        lo = max(self.start_jd, mid - self.half_width)
+        hi = min(self.start_jd + self.days, mid + self.half_width)
+        steps = max(3, int(math.ceil((hi - lo) / self.fine_step_days)) + 1)
+        jd = np.linspace(lo, hi, steps)
+        subset = self.elements.subset(idx)
+        dist2 = np.sum(ephemeris.positions(subset, jd, "geo") ** 2, axis=2)
+        best = np.argmin(dist2, axis=1)
+
+        # Parabolic refinement around interior minima.
+        rows = np.arange(len(idx))
+        interior = (best > 0) & (best < steps - 1)
+        i = np.clip(best, 1, steps - 2)
+        y0, y1, y2 = dist2[rows, i - 1], dist2[rows, i], dist2[rows, i + 1]
+        denom = y0 - 2 * y1 + y2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            shift = np.where(interior & (denom > 0), 0.5 * (y0 - y2) / denom, 0.0)
+        t = jd[best] + np.clip(shift, -1, 1) * (jd[1] - jd[0])
+        dist = np.linalg.norm(ephemeris.positions(subset, t[:, None], "geo")[:, 0], axis=1)
+        return t, dist
+
+    def screen(self, threshold_au):
+        """Objects whose minimum distance in the window is within `threshold_au`.
+
+        Returns arrays (index, jd, distance_au, relative_velocity_kms), one entry per object.
+        """
+        key = round(float(threshold_au), 12)
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+
+        best_jd = {}
+        best_dist = {}
+        pairs = 0
+        for b, idx in enumerate(self.candidates(threshold_au)):
+            if not len(idx):
+                continue
+            pairs += len(idx)
+            jd, dist = self._closest(idx, self.mids[b])
+            for k, t, d in zip(idx.tolist(), jd.tolist(), dist.tolist()):
+                if d <= threshold_au and d < best_dist.get(k, np.inf):
+                    best_jd[k], best_dist[k] = t, d
+
+        index = np.fromiter(best_dist, dtype=np.intp, count=len(best_dist))
+        jd = np.array([best_jd[k] for k in index.tolist()], dtype=np.float64)
+        dist = np.array([best_dist[k] for k in index.tolist()], dtype=np.float64)
+        velocity = self._relative_speed(index, jd)
+        result = (index, jd, dist, velocity)
+        with self._lock:
+            self.last_candidate_pairs = pairs
+            self._results[key] = result
+            while len(self._results) > 16:
+                self._results.popitem(last=False)
+        return result
+
+    def _relative_speed(self, index, jd, dt=0.01):
+        if not len(index):
+            return np.empty(0)
+        times = np.stack([jd - dt, jd + dt], axis=1)
+        pos = ephemeris.positions(self.elements.subset(index), times, "geo")
+        return np.linalg.norm(pos[:, 1] - pos[:, 0], axis=1) / (2 * dt) * AU_PER_DAY_KMS
+
+    def ranked(self, threshold_au, sort="distance", limit=None):
+        """Screening results as dicts, closest first (or most energetic first with sort="energy")."""
+        index, jd, dist, vrel = self.screen(threshold_au)
+        diameter = self.diameter_m[index]
+        # Impact speed adds Earth's escape velocity to the encounter speed.
+        impact_kms = np.sqrt(vrel ** 2 + EARTH_ESCAPE_KMS ** 2)
+        energy_mt = physics.impact_metrics_array(impact_kms, diameter)["impact_energy_mt"]
+        energy_key = np.where(np.isfinite(energy_mt), energy_mt, -1.0)
+        if sort == "energy":
+            order = np.lexsort((dist, -energy_key))
+        else:
+            order = np.lexsort((-energy_key, dist))
+        if limit is not None:
+            order = order[:limit]
+        rows = []
+        for k in order.tolist():
+            i = int(index[k])
+            rows.append({
+                "id": self.elements.ids[i],
+                "name": self.elements.names[i],
+                "approach_jd": float(jd[k]),
+                "approach_time": jd_to_iso(jd[k]),
+                "miss_distance_au": float(dist[k]),
+                "miss_distance_km": float(dist[k] * AU_KM),
+                "miss_distance_ld": float(dist[k] / LUNAR_DISTANCE_AU),
+                "relative_velocity_kms": float(vrel[k]),
+                "diameter_m": float(diameter[k]) if np.isfinite(diameter[k]) else None,
+                "impact_energy_mt": float(energy_mt[k]) if np.isfinite(energy_mt[k]) else None,
+            })
+        return rows
+
+
+def jd_to_iso(jd):
+    seconds = (float(jd) - ephemeris.UNIX_EPOCH_JD) * 86400.0
+    return np.datetime_as_string(np.datetime64(int(round(seconds)), "s")) + "Z"
+
+
+class ScreeningCache:
+    """LRU of ScreeningWindows keyed on (catalog elements, start, days), bounded by count and total bytes."""
+
+    def __init__(self, max_windows=8, max_bytes=256 * 1024 * 1024):
+        self.max_windows = max_windows
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, elements, start_jd, days, factory):
+        key = (id(elements), float(start_jd), float(days))
+        with self._lock:
+            entry = self._windows.get(key)
+            # id() can be reused once a catalog is dropped; check the object too.
+            if entry is not None and entry.elements is elements:
+                self._windows.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        window = factory()
+        with self._lock:
+            old = self._windows.pop(key, None)
+            if old is not None:
+                self.bytes -= old.nbytes
+            self._windows[key] = window
+            self.bytes += window.nbytes
+            # The newest window is kept even when it alone exceeds max_bytes.
+            while len(self._windows) > 1 and (len(self._windows) > self.max_windows or self.bytes > self.max_bytes):
+                _, evicted = self._windows.popitem(last=False)
+                self.bytes -= evicted.nbytes
+        return window
+
+    def clear(self):
+        with self._lock:
+            self._windows.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "windows": len(self._windows),
+                "max_windows": self.max_windows,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+from stubs import StubServer  # noqa: E402
+
+
+@pytest.fixture()
+def stub_server():
+    server = StubServer().start()
+    yield server
+    server.stop()
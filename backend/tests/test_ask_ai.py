@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+import app as backend
+from stubs import StubResponse, groq_completion
+from upstream import Upstream, make_session
+
+
+@pytest.fixture()
+def groq_stub(stub_server, monkeypatch):
+    stub_server.routes["/chat"] = lambda req: StubResponse(200, groq_completion("respuesta"))
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(backend, "GROQ_CHAT_URL", stub_server.url + "/chat")
+    monkeypatch.setattr(backend, "groq_upstream", Upstream("groq", make_session()))
+    backend.ai_cache.clear()
+    return stub_server
+
+
+def ask(payload):
+    backend.app.config["TESTING"] = True
+    with backend.app.test_client() as c:
+        return c.post("/api/ask-ai", data=json.dumps(payload), content_type="application/json").get_json()
+
+
+def prompt_of(call):
+    return call.json()["messages"][0]["content"]
+
+
+def test_direct_mode_makes_one_call(groq_stub, monkeypatch):
+    monkeypatch.setattr(backend, "ASK_AI_TRANSLATION", "direct")
+    assert ask({"query": "¿Qué es DART?", "language": "es"})["response"] == "respuesta"
+    assert len(groq_stub.calls) == 1
+    prompt = prompt_of(groq_stub.calls[0])
+    assert "Reply only in Spanish" in prompt and prompt.endswith("¿Qué es DART?")
+    assert backend.ask_ai_latency["es/direct"].count >= 1
+
+
+def test_english_prompt_unchanged(groq_stub, monkeypatch):
+    monkeypatch.setattr(backend, "ASK_AI_TRANSLATION", "direct")
+    ask({"query": "What is DART?"})
+    assert prompt_of(groq_stub.calls[0]) == f"{backend.SPACE_AI_PROMPT} What is DART?"
+
+
+def test_chain_mode_caches_question_translation(groq_stub, monkeypatch):
+    monkeypatch.setattr(backend, "ASK_AI_TRANSLATION", "chain")
+    ask({"query": "¿Qué es DART?", "language": "es"})
+    assert len(groq_stub.calls) == 3
+    assert backend.ai_cache.get("translate", "es", "qué es dart") == "respuesta"
+
+
+def test_repeated_question_served_from_cache(groq_stub):
+    ask({"query": "What is DART?"})
+    assert ask({"query": "what is dart"})["response"] == "respuesta"
+    assert len(groq_stub.calls) == 1
+
+
+def sse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields.get("event", "message"), json.loads(fields["data"])))
+    return events
+
+
+def test_stream_relays_groq_tokens(groq_stub):
+    chunks = [
+        'data: {"choices":[{"delta":{"role":"assistant"}}]}\n\n',
+        'data: {"choices":[{"delta":{"content":"Bennu "}}]}\n\n',
+        'data: {"choices":[{"delta":{"content":"is dark."}}]}\n\n',
+        "data: [DONE]\n\n",
+    ]
+    groq_stub.routes["/chat"] = lambda req: StubResponse(200, headers={"Content-Type": "text/event-stream"}, chunks=chunks)
+
+    backend.app.config["TESTING"] = True
+    with backend.app.test_client() as c:
+        r = c.post("/api/ask-ai", data=json.dumps({"query": "Bennu?", "stream": True}), content_type="application/json")
+        body = r.get_data(as_text=True)
+    assert r.mimetype == "text/event-stream"
+    assert sse_events(body) == [
+        ("message", {"delta": "Bennu "}),
+        ("message", {"delta": "is dark."}),
+        ("done", {"response": "Bennu is dark."}),
+    ]
+    assert groq_stub.calls[0].json()["stream"] is True
+
+
+def test_stream_offline_fallback(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    backend.app.config["TESTING"] = True
+    with backend.app.test_client() as c:
+        r = c.post("/api/ask-ai", data=json.dumps({"query": "dart"}), headers={"Accept": "text/event-stream"}, content_type="application/json")
+        events = sse_events(r.get_data(as_text=True))
+    assert events[-1] == ("done", {"response": backend.OFFLINE_ANSWERS["dart"]})
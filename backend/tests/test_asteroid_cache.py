@@ -0,0 +1,80 @@
+import time
+
+from asteroid_cache import AsteroidCache
+
+
+def make_fetch(results):
+    calls = []
+
+    def fetch():
+        calls.append(time.time())
+        value = results[min(len(calls), len(results)) - 1]
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    return fetch, calls
+
+
+def test_cache_hit_after_first_load():
+    fetch, calls = make_fetch([[{"id": 1}]])
+    cache = AsteroidCache(fetch, fallback=lambda: [], ttl=60)
+    assert cache.get() == [{"id": 1}]
+    assert cache.get() == [{"id": 1}]
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["hits"] == 1
+
+
+def test_stale_entry_served_while_refreshing():
+    fetch, calls = make_fetch([[{"id": 1}], [{"id": 2}]])
+    cache = AsteroidCache(fetch, fallback=lambda: [], ttl=0.05)
+    assert cache.get() == [{"id": 1}]
+    time.sleep(0.1)
+    # Stale copy comes back immediately; the refresh happens in the background.
+    assert cache.get() == [{"id": 1}]
+    for _ in range(50):
+        if cache.stats()["refreshes"] >= 2:
+            break
+        time.sleep(0.01)
+    assert cache.get() == [{"id": 2}]
+    assert cache.stats()["stale_hits"] >= 1
+
+
+def test_failed_refresh_keeps_last_good_copy():
+    fetch, _ = make_fetch([[{"id": 1}], RuntimeError("upstream down")])
+    cache = AsteroidCache(fetch, fallback=lambda: [{"id": "fallback"}], ttl=60)
+    cache.get()
+    cache.refresh(force=True)
+    assert cache.get() == [{"id": 1}]
+    assert cache.stats()["refresh_failures"] == 1
+
+
+def test_fallback_used_when_upstream_unavailable():
+    fetch, _ = make_fetch([None])
+    cache = AsteroidCache(fetch, fallback=lambda: [{"id": "local"}], ttl=60)
+    assert cache.get() == [{"id": "local"}]
+    assert cache.stats()["is_fallback"] is True
+
+
+def test_snapshot_shared_between_workers(tmp_path):
+    snapshot = str(tmp_path / "catalog.json")
+    fetch, calls = make_fetch([[{"id": 7}]])
+    AsteroidCache(fetch, fallback=lambda: [], ttl=60, snapshot_path=snapshot).get()
+
+    other_fetch, other_calls = make_fetch([[{"id": 8}]])
+    other = AsteroidCache(other_fetch, fallback=lambda: [], ttl=60, snapshot_path=snapshot)
+    assert other.get() == [{"id": 7}]
+    assert other_calls == []
+
+
+def test_catalog_without_snapshot_removes_the_old_one(tmp_path):
+    snapshot = tmp_path / "catalog.json"
+    AsteroidCache(lambda: [{"id": 7}], fallback=lambda: [], ttl=60, snapshot_path=str(snapshot)).get()
+    assert snapshot.exists()
+
+    # e.g. a catalog other workers load from their own shared file.
+    cache = AsteroidCache(lambda: [{"id": 8}], fallback=lambda: [], ttl=60, snapshot_path=str(snapshot),
+                          encode=lambda data: None)
+    cache.refresh(force=True)
+    assert cache.get() == [{"id": 8}] and not snapshot.exists()
@@ -0,0 +1,72 @@
+import difflib
+import json
+
+import pytest
+
+from app import app
+import asteroid_index
+from asteroid_index import AsteroidIndex, normalize_name
+
+CATALOG = [
+    {"id": "2099942", "neo_reference_id": "2099942", "label": "99942 Apophis (2004 MN4)"},
+    {"id": 2, "name": "Bennu"},
+    {"id": 3, "name": "Benson"},
+    {"id": 4, "label": "Didymos"},
+]
+
+
+@pytest.fixture()
+def client():
+    app.config["TESTING"] = True
+    with app.test_client() as c:
+        yield c
+
+
+def test_normalize_name():
+    assert normalize_name("  99942 Apophis (2004  MN4) ") == "99942 apophis 2004 mn4"
+
+
+def test_exact_lookup_by_name_and_id():
+    index = AsteroidIndex(CATALOG)
+    assert index.get("BENNU")["id"] == 2
+    assert index.get("99942 apophis (2004 mn4)")["id"] == "2099942"
+    assert index.get("2099942")["label"].startswith("99942")
+    assert index.get(4)["label"] == "Didymos"
+    assert index.get("ceres") is None
+
+
+def test_prefix_and_fuzzy_search():
+    index = AsteroidIndex(CATALOG)
+    assert [a["id"] for a in index.prefix("ben")] == [2, 3]
+    assert index.fuzzy("didymus")[0]["label"] == "Didymos"
+    assert [a["id"] for a in index.search("benu", limit=1)] == [2]
+    # Too short for a meaningful fuzzy match: prefix hits only.
+    assert index.fuzzy("bn") == [] and [a["id"] for a in index.search("be")] == [2, 3]
+
+
+def test_fuzzy_scores_only_trigram_candidates(monkeypatch):
+    catalog = [{"id": i, "name": f"({2000 + i % 20} X{i})"} for i in range(2000)] + [{"id": "t", "name": "Toutatis"}]
+    index = AsteroidIndex(catalog)
+    scored = []
+    real = difflib.get_close_matches
+
+    def counting(word, names, **kwargs):
+        scored.append(len(names))
+        return real(word, names, **kwargs)
+
+    monkeypatch.setattr(difflib, "get_close_matches", counting)
+    assert index.fuzzy("tautatis")[0]["id"] == "t"
+    assert scored and scored[0] <= asteroid_index.FUZZY_CANDIDATES < len(catalog)
+
+
+def test_search_endpoint(client):
+    r = client.get("/api/asteroids/search?q=ben")
+    assert r.status_code == 200
+    assert [m["name"] for m in r.get_json()["results"]] == ["Bennu"]
+
+
+def test_impact_details_by_name(client):
+    payload = {"asteroid_name": "bennu", "diameter_m": 500}
+    r = client.post("/api/impact-details", data=json.dumps(payload), content_type="application/json")
+    assert r.status_code == 200
+    assert r.get_json()["input"]["velocity_kms"] == 12.4
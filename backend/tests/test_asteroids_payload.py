@@ -0,0 +1,52 @@
+import gzip
+import json
+
+import pytest
+
+import app as backend
+from app import app
+from prepared_payload import PreparedPayload
+
+
+@pytest.fixture()
+def client():
+    app.config["TESTING"] = True
+    with app.test_client() as c:
+        yield c
+
+
+def test_asteroids_payload_and_etag(client):
+    r = client.get("/api/asteroids")
+    assert r.status_code == 200
+    j = r.get_json()
+    assert j["status"] == "ok" and len(j["list"]) == len(j["data"])
+    etag = r.headers["ETag"]
+    assert etag.startswith('"') and r.headers["Cache-Control"] == "no-cache"
+
+    again = client.get("/api/asteroids", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.get_data() == b""
+    assert client.get("/api/asteroids", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_asteroids_gzip_variant(client, monkeypatch):
+    # Well above PreparedPayload's compression threshold.
+    rows = [{"id": i, "label": f"Asteroid {i}", "r": 5.0, "size": 0.1, "velocity_kms": 12.5} for i in range(50)]
+    monkeypatch.setattr(backend, "load_asteroids", lambda: rows)
+    plain = client.get("/api/asteroids").get_data()
+    assert len(plain) > 512
+    r = client.get("/api/asteroids", headers={"Accept-Encoding": "gzip, deflate"})
+    assert r.headers["Content-Encoding"] == "gzip" and r.headers["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(r.get_data()) == plain
+    # Tiny bodies are not worth compressing.
+    assert PreparedPayload(b'{"data":[]}').variants.keys() == {"identity"}
+
+
+def test_prepared_payload_negotiation():
+    body = json.dumps({"data": ["x" * 20] * 100}).encode()
+    p = PreparedPayload(body)
+    assert p.negotiate("gzip;q=0, identity") == ("identity", body)
+    encoding, compressed = p.negotiate("gzip")
+    assert encoding == "gzip" and gzip.decompress(compressed) == body
+    assert p.not_modified(f'W/{p.etag}, "other"')
+    assert not p.not_modified(None)
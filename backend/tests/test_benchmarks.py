@@ -0,0 +1,69 @@
+import app as backend
+import bench_api
+import loadtest_api
+import run_suite
+
+
+def suite(p50=1.0, rps=100.0, p99=10.0, route_p99=10.0, errors=0, seconds=0.001):
+    return {"reports": {
+        "api": {"results": {"json_dumps": {"seconds_per_call": seconds, "bytes": 10}}},
+        "loadtest": {
+            "overall": {"p50_ms": p50, "p99_ms": p99, "throughput_rps": rps, "errors": errors},
+            "routes": {"impact": {"p50_ms": p50, "p99_ms": route_p99, "errors": 0}},
+        },
+    }}
+
+
+def test_compare_flags_slowdowns_throughput_drops_and_errors():
+    base = suite()
+    assert run_suite.compare(suite(p50=1.4, rps=70), base) == []
+    worse = run_suite.compare(suite(p50=2.0, rps=40, errors=3, seconds=0.002), base)
+    assert {r["metric"] for r in worse} == {
+        "loadtest.overall.p50_ms", "loadtest.overall.throughput_rps", "loadtest.overall.errors",
+        "loadtest.routes.impact.p50_ms", "api.results.json_dumps.seconds_per_call",
+    }
+    # Tails get more room, and per-route tails are not compared at all.
+    assert run_suite.compare(suite(p99=20.0, route_p99=100.0), base) == []
+    assert [r["metric"] for r in run_suite.compare(suite(p99=30.0), base)] == ["loadtest.overall.p99_ms"]
+
+
+def test_main_exits_nonzero_on_regression(tmp_path, monkeypatch):
+    def fake_run(quick, driver, requests, concurrency):
+        report = suite(p50=state["p50"])
+        report["config"] = {"quick": quick, "driver": driver, "requests": requests, "concurrency": concurrency}
+        report["machine"] = {}
+        return report
+
+    state = {"p50": 1.0}
+    monkeypatch.setattr(run_suite, "run", fake_run)
+    monkeypatch.setattr(run_suite.loadtest_api, "print_report", lambda report: None)
+    args = ["--quick", "--concurrency", "2", "--baseline", str(tmp_path / "baseline.json")]
+    assert run_suite.main(args + ["--save-baseline"]) == 0
+    assert run_suite.main(args) == 0
+    state["p50"] = 5.0
+    assert run_suite.main(args) == 1
+    # A baseline recorded with other settings is not comparable.
+    assert run_suite.main(args + ["--requests", "80"]) == 2
+
+
+def test_loadtest_client_driver_runs_the_mix():
+    catalog_url = backend.NASA_NEOWS_URL
+    report = loadtest_api.run("client", total=120, concurrency=3, groq_delay=0.0)
+    assert report["overall"]["requests"] == 120 and report["overall"]["errors"] == 0
+    assert report["overall"]["p99_ms"] >= report["overall"]["p50_ms"] > 0
+    assert set(report["routes"]) == {name for _, name, _ in loadtest_api.TRAFFIC_MIX}
+    # The in-process driver restores the app's settings afterwards.
+    assert backend.NASA_NEOWS_URL == catalog_url
+
+
+def test_api_microbenchmarks_smoke():
+    report = bench_api.run(size=60, quick=True)
+    results = report["results"]
+    assert results["json_dumps"]["bytes"] > 0
+    assert all(r["seconds_per_call"] > 0 for r in results.values())
+
+
+def test_merge_rounds_takes_medians():
+    merged = run_suite.merge_rounds([suite(p50=1.0), suite(p50=9.0), suite(p50=2.0)])
+    assert merged["reports"]["loadtest"]["overall"]["p50_ms"] == 2.0
+    assert merged["reports"]["api"]["results"]["json_dumps"]["bytes"] == 10 and merged["rounds"] == 3
@@ -0,0 +1,33 @@
+import json
+
+import app as backend
+from bulkhead import Bulkhead
+
+
+def test_bulkhead_rejects_over_limit():
+    b = Bulkhead("t", limit=1)
+    assert b.try_acquire()
+    assert not b.try_acquire()
+    b.release()
+    assert b.try_acquire()
+    assert b.stats() == {"limit": 1, "active": 1, "admitted": 2, "rejected": 1}
+
+
+def test_guard_releases_after_stream():
+    b = Bulkhead("t", limit=1)
+    assert b.try_acquire()
+    assert list(b.guard(iter("ab"))) == ["a", "b"]
+    assert b.stats()["active"] == 0
+
+
+def test_ask_ai_falls_back_when_saturated(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    full = Bulkhead("ai", limit=1)
+    full.try_acquire()
+    monkeypatch.setattr(backend, "ai_bulkhead", full)
+
+    backend.app.config["TESTING"] = True
+    with backend.app.test_client() as c:
+        r = c.post("/api/ask-ai", data=json.dumps({"query": "tell me about dart"}), content_type="application/json")
+    assert r.get_json()["response"] == backend.OFFLINE_ANSWERS["dart"]
+    assert full.stats()["rejected"] == 1
@@ -0,0 +1,122 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import app as backend
+from catalog_columns import CatalogColumns, CatalogError, simplify
+from neo_store import NeoStore
+from stubs import neows_object
+
+ROWS = [
+    {"id": "1", "label": "Apophis", "r": 5.2, "y": 0, "size": 0.12, "is_hazardous": True,
+     "orbit": {"a_au": 0.92, "e": 0.19, "n_deg_day": None}},
+    {"id": 2, "name": "Bennu", "r": 4.8, "y": 0, "velocity_kms": None, "is_hazardous": False},
+    {"id": "3", "label": "Didymos é", "r": 6.0, "y": 1, "diameter_m": 780.0, "tags": ["binary"],
+     "orbit": {"a_au": 1.64, "e": 0.38, "n_deg_day": 0.47}},
+]
+
+
+@pytest.fixture()
+def client():
+    backend.app.config["TESTING"] = True
+    with backend.app.test_client() as c:
+        yield c
+
+
+def test_rows_round_trip_with_nulls_missing_keys_and_nesting():
+    catalog = CatalogColumns.from_records(ROWS)
+    assert len(catalog) == 3 and list(catalog) == ROWS and catalog[-1] == ROWS[-1]
+    kinds = {name: col.kind for name, col in catalog.columns.items()}
+    assert kinds["r"] == "float" and kinds["y"] == "int" and kinds["label"] == "str"
+    assert kinds["is_hazardous"] == "bool" and kinds["orbit"] == "struct"
+    # Mixed str/int ids and lists keep their Python values.
+    assert kinds["id"] == "json" and kinds["tags"] == "json"
+    assert json.loads(catalog.encode_json()) == ROWS
+
+
+def test_json_encoders_agree(monkeypatch):
+    import catalog_columns
+
+    rows = ROWS + [{"id": 2 ** 70, "label": "big"}]
+    catalog = CatalogColumns.from_records(rows)
+    assert catalog.to_records() == rows
+    # orjson (when installed) rejects the 70-bit id, so this also covers its fallback.
+    encoded = catalog.encode_json()
+    monkeypatch.setattr(catalog_columns, "orjson", None)
+    assert json.loads(encoded) == json.loads(catalog.encode_json()) == rows
+    assert json.loads(CatalogColumns.from_records(ROWS).encode_json()) == ROWS
+
+
+def test_columns_json_and_numbers():
+    catalog = CatalogColumns.from_records(ROWS)
+    columns = json.loads(catalog.encode_columns_json())
+    assert columns["label"] == ["Apophis", None, "Didymos é"]
+    assert columns["orbit"]["e"] == [0.19, None, 0.38]
+    numbers = catalog.numbers("diameter_m")
+    assert np.isnan(numbers[0]) and numbers[2] == 780.0
+    assert catalog.values("missing") == [None, None, None]
+
+
+def test_binary_round_trip_and_memory_map(tmp_path):
+    catalog = CatalogColumns.from_records(ROWS)
+    decoded = CatalogColumns.from_bytes(catalog.to_bytes(meta={"version": "v1"}))
+    assert list(decoded) == ROWS and decoded.meta == {"version": "v1"}
+
+    path = str(tmp_path / "catalog.cols")
+    catalog.save(path, meta={"version": "v2"})
+    mapped = CatalogColumns.load(path)
+    assert isinstance(mapped.columns["r"].values.base, np.memmap)
+    assert list(mapped) == ROWS and mapped.encode_json() == catalog.encode_json()
+    with pytest.raises(CatalogError):
+        CatalogColumns.from_bytes(b"nope" + bytes(8))
+
+
+def test_simplify_matches_the_row_rules():
+    listing = list(simplify(CatalogColumns.from_records(ROWS)))
+    assert [r["name"] for r in listing] == ["Apophis", "Bennu", "Didymos é"]
+    # size < 1 is scaled up; no diameter gives no mass.
+    assert listing[0]["diameter"] == pytest.approx(12.0) and listing[0]["mass"] > 0
+    assert listing[1] == {"name": "Bennu", "mass": None, "velocity": None, "diameter": None}
+    assert listing[2]["diameter"] == 780.0
+
+
+def test_store_columns_file_is_reused_until_the_catalog_changes(tmp_path):
+    store = NeoStore(str(tmp_path / "neo.sqlite3"))
+    path = str(tmp_path / "catalog.cols")
+    store.upsert([neows_object(i) for i in range(5)])
+    first = store.load_columns(path)
+    assert list(first) == store.load_catalog()
+    assert store.load_columns(path) is first
+    # Another worker maps the same file once and then keeps its copy too.
+    other = NeoStore(str(tmp_path / "neo.sqlite3"))
+    mapped = other.load_columns(path)
+    assert mapped.meta == first.meta and isinstance(mapped.columns["r"].values.base, np.memmap)
+    assert other.load_columns(path) is mapped
+    other.close()
+
+    store.upsert([neows_object(i) for i in range(8)])
+    assert len(store.load_columns(path)) == 8
+    store.close()
+
+
+def test_asteroids_formats(client):
+    rows = client.get("/api/asteroids").get_json()
+    columns = client.get("/api/asteroids?format=columns").get_json()
+    assert columns["count"] == len(rows["data"])
+    assert columns["columns"]["id"] == [a.get("id") for a in rows["data"]]
+    assert columns["list"]["name"] == [a["name"] for a in rows["list"]]
+
+    r = client.get("/api/asteroids?format=bin")
+    assert r.mimetype == "application/octet-stream" and r.headers["ETag"] != ""
+    assert list(CatalogColumns.from_bytes(r.get_data())) == rows["data"]
+    assert client.get("/api/asteroids?format=xml").status_code == 400
+
+
+def test_app_import_does_not_load_numpy():
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = "import sys, app; sys.exit('numpy' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], cwd=backend_dir).returncode == 0
@@ -0,0 +1,105 @@
+import struct
+import zlib
+
+import numpy as np
+
+import app as backend
+import damage_tiles
+from damage_tiles import EMPTY_TILE, DamageScenario, TileCache
+
+
+def decode_png(data):
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    width, height = struct.unpack(">II", data[16:24])
+    pos, idat = 8, b""
+    while pos < len(data):
+        (length,) = struct.unpack(">I", data[pos:pos + 4])
+        if data[pos + 4:pos + 8] == b"IDAT":
+            idat += data[pos + 8:pos + 8 + length]
+        pos += length + 12
+    raw = np.frombuffer(zlib.decompress(idat), dtype=np.uint8).reshape(height, width * 4 + 1)
+    return raw[:, 1:].reshape(height, width, 4)
+
+
+def centre_tile(scenario, z):
+    n = 2 ** z
+    x = int((scenario.lon + 180.0) / 360.0 * n)
+    lat = np.radians(scenario.lat)
+    y = int((1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2 * n)
+    return x, y
+
+
+def test_render_centre_and_far_tiles():
+    scenario = DamageScenario(40.0, -75.0, crater_radius_km=1.0, blast_radius_km=10.0)
+    z = scenario.suggested_zoom()
+    x, y = centre_tile(scenario, z)
+    pixels = decode_png(scenario.render(z, x, y))
+    assert pixels.shape == (damage_tiles.TILE_SIZE, damage_tiles.TILE_SIZE, 4)
+    assert pixels[..., 3].max() > 200
+    # The opposite side of the world gets the shared transparent tile.
+    assert scenario.render(z, (x + 2 ** z // 2) % 2 ** z, y) is EMPTY_TILE
+
+
+def test_touches_never_drops_a_painted_tile():
+    scenario = DamageScenario(60.0, 10.0, crater_radius_km=2.0, blast_radius_km=30.0)
+    z = scenario.suggested_zoom() + 2
+    cx, cy = centre_tile(scenario, z)
+    for x in range(cx - 5, cx + 6):
+        for y in range(cy - 5, cy + 6):
+            if not scenario.touches(z, x, y):
+                lon, lat = damage_tiles.pixel_lonlat(z, x, y)
+                distance = damage_tiles.haversine_km(scenario.lat, scenario.lon, lat[:, None], lon[None, :])
+                assert scenario.intensity(distance).max() < damage_tiles.MIN_INTENSITY
+
+
+def test_tile_cache_hits_and_byte_bound():
+    scenario = DamageScenario(0.0, 0.0, 5.0, 50.0)
+    cache = TileCache(max_bytes=1)
+    z = scenario.suggested_zoom()
+    x, y = centre_tile(scenario, z)
+    first = cache.get(scenario, z, x, y)
+    assert cache.stats()["evictions"] == 1
+    cache = TileCache()
+    assert cache.get(scenario, z, x, y) == first
+    assert cache.get(scenario, z, x, y) is cache.get(scenario, z, x, y)
+    assert cache.stats()["hits"] == 2
+
+
+def test_tile_cache_does_not_keep_off_footprint_tiles():
+    scenario = DamageScenario(0.0, 0.0, 5.0, 50.0)
+    cache = TileCache()
+    z = 12
+    for x in range(2000):
+        assert cache.get(scenario, z, x, 0) is EMPTY_TILE
+    assert cache.stats()["tiles"] == 0 and cache.stats()["misses"] == 0
+
+
+def test_damage_endpoints(monkeypatch):
+    monkeypatch.setattr(backend, "tile_cache", TileCache())
+    client = backend.app.test_client()
+    res = client.post("/api/damage/scenario", json={"lat": 10, "lon": 20, "velocity_kms": 20, "diameter_m": 150})
+    data = res.get_json()
+    assert data["status"] == "ok" and data["zones"]["blast_radius_km"] > 0
+
+    x, y = centre_tile(DamageScenario(10, 20, 1, 1), data["suggested_zoom"])
+    url = data["tile_url"].format(z=data["suggested_zoom"], x=x, y=y)
+    tile = client.get(url)
+    assert tile.status_code == 200 and tile.mimetype == "image/png"
+    assert data["scenario"] in tile.headers["ETag"]
+    again = client.get(url, headers={"If-None-Match": tile.headers["ETag"]})
+    assert again.status_code == 304
+
+    assert client.get("/api/damage/tiles/30/0/0.png?lat=0&lon=0&velocity_kms=20&diameter_m=100").status_code == 400
+    assert client.get("/api/damage/tiles/2/4/0.png?lat=0&lon=0&velocity_kms=20&diameter_m=100").status_code == 400
+    assert client.get("/api/damage/tiles/2/1/1.png?lat=0&lon=0").status_code == 400
+    assert client.post("/api/damage/scenario", json={"lat": 95, "lon": 0, "velocity_kms": 20,
+                                                     "diameter_m": 100}).status_code == 400
+
+
+def test_damage_scenario_for_named_asteroid_uses_meters():
+    client = backend.app.test_client()
+    data = client.post("/api/damage/scenario", json={"lat": 10, "lon": 20, "asteroid_name": "Apophis"}).get_json()
+    assert data["status"] == "ok" and data["input"]["diameter_m"] == 120.0
+    direct = client.post("/api/damage/scenario", json={"lat": 10, "lon": 20, "velocity_kms": 7.32,
+                                                       "diameter_m": 120}).get_json()
+    assert data["scenario"] == direct["scenario"]
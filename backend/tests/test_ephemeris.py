@@ -0,0 +1,97 @@
+import datetime
+
+import numpy as np
+import pytest
+
+import app as backend
+import ephemeris
+
+
+def catalog(n=3):
+    return [{
+        "id": str(i), "label": f"NEO {i}",
+        "orbit": {"epoch_jd": ephemeris.J2000_JD, "a_au": 1.0 + 0.5 * i, "e": 0.1 * i, "i_deg": 10.0 * i,
+                  "node_deg": 30.0 * i, "peri_deg": 45.0, "M_deg": 0.0, "n_deg_day": None},
+    } for i in range(n)]
+
+
+def test_solve_kepler_matches_mean_anomaly():
+    rng = np.random.default_rng(0)
+    M = rng.uniform(0, 2 * np.pi, (200, 50))
+    e = rng.uniform(0, 0.97, (200, 1))
+    E = ephemeris.solve_kepler(M, e)
+    assert np.max(np.abs(E - e * np.sin(E) - M)) < 1e-10
+
+
+def test_earth_position_at_j2000():
+    pos = ephemeris.propagate(ephemeris.OrbitElements.earth(), [ephemeris.J2000_JD])[0, 0]
+    assert pos == pytest.approx([-0.1772, 0.9672, 0.0], abs=2e-3)
+
+
+def test_orbit_closes_after_one_period_and_keeps_distance_bounds():
+    elements = ephemeris.OrbitElements.from_catalog(catalog())
+    period = 2 * np.pi / elements.n
+    for k in range(len(elements)):
+        jd = ephemeris.J2000_JD + np.linspace(0, period[k], 400)
+        pos = ephemeris.propagate(elements.subset([k]), jd)[0]
+        assert pos[0] == pytest.approx(pos[-1], abs=1e-9)
+        r = np.linalg.norm(pos, axis=1)
+        a, e = elements.a[k], elements.e[k]
+        assert r.min() >= a * (1 - e) - 1e-9 and r.max() <= a * (1 + e) + 1e-9
+
+
+def test_from_catalog_skips_entries_without_bound_orbits():
+    rows = catalog(2) + [{"id": "x", "label": "no orbit"}, {"id": "h", "orbit": {**catalog(1)[0]["orbit"], "e": 1.2}}]
+    assert ephemeris.OrbitElements.from_catalog(rows).ids == ["0", "1"]
+
+
+def test_binary_roundtrip_is_chunked_float32():
+    elements = ephemeris.OrbitElements.from_catalog(catalog(5))
+    jd = ephemeris.time_grid(ephemeris.J2000_JD, 30, 7)
+    chunks = list(ephemeris.iter_binary(elements, jd, "geo", chunk_objects=2))
+    assert len(chunks) == 4  # header + 3 chunks
+    head, pos = ephemeris.decode_binary(b"".join(chunks))
+    assert head["ids"] == elements.ids and head["step_days"] == pytest.approx(5.0)
+    assert pos.dtype == np.float32 and pos.shape == (5, 7, 3)
+    np.testing.assert_allclose(pos, ephemeris.positions(elements, jd, "geo"), atol=1e-6)
+
+
+def test_ephemeris_endpoint(monkeypatch):
+    rows = catalog(4)
+    monkeypatch.setattr(backend, "load_asteroids", lambda: rows)
+    client = backend.app.test_client()
+    res = client.get("/api/ephemeris?start=2000-01-01&days=10&steps=11&frame=helio&ids=1,3")
+    assert res.status_code == 200 and res.mimetype == "application/octet-stream"
+    head, pos = ephemeris.decode_binary(res.data)
+    assert head["ids"] == ["1", "3"] and head["start_jd"] == ephemeris.date_to_jd(datetime.date(2000, 1, 1))
+    assert pos.shape == (2, 11, 3)
+
+    data = client.get("/api/ephemeris?format=json&steps=2&limit=1").get_json()
+    assert data["count"] == 1 and len(data["positions"][0]) == 2
+
+    assert client.get("/api/ephemeris?steps=0").status_code == 400
+    monkeypatch.setattr(backend, "EPHEMERIS_MAX_JSON_POINTS", 10)
+    assert client.get("/api/ephemeris?format=json&steps=5").status_code == 413
+    assert client.get("/api/ephemeris?steps=5").status_code == 200
+    monkeypatch.setattr(backend, "EPHEMERIS_MAX_POINTS", 10)
+    assert client.get("/api/ephemeris?steps=5").status_code == 413
+
+
+def test_ephemeris_bodies_are_cached_per_catalog(monkeypatch):
+    rows = catalog(3)
+    monkeypatch.setattr(backend, "load_asteroids", lambda: rows)
+    calls = []
+    real = ephemeris.propagate
+    monkeypatch.setattr(ephemeris, "propagate", lambda *a: calls.append(1) or real(*a))
+    client = backend.app.test_client()
+    url = "/api/ephemeris?start=2000-01-01&days=10&steps=11"
+    first = client.get(url)
+    propagated = len(calls)
+    again = client.get(url)
+    assert again.data == first.data and len(calls) == propagated
+    assert again.headers["ETag"] == first.headers["ETag"] and again.headers["Cache-Control"] == "no-cache"
+    assert client.get(url, headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    # A new catalog drops the cached bodies.
+    rows = catalog(2)
+    assert ephemeris.decode_binary(client.get(url).data)[0]["count"] == 2
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from app import app
+
+
+@pytest.fixture()
+def client():
+    app.config["TESTING"] = True
+    with app.test_client() as c:
+        yield c
+
+
+def post(client, payload, **kwargs):
+    return client.post("/api/impact/batch", data=json.dumps(payload), content_type="application/json", **kwargs)
+
+
+def test_batch_matches_single_scenario(client):
+    single = {"velocity_kms": 17.0, "mass_kg": 2e9, "diameter_m": 120}
+    expected = client.post("/api/impact-details", data=json.dumps(single), content_type="application/json").get_json()
+
+    r = post(client, {"scenarios": {"velocity_kms": [17.0, 20.0], "mass_kg": 2e9, "diameter_m": [120, 80]}})
+    assert r.status_code == 200
+    j = r.get_json()
+    assert j["count"] == 2
+    cols = j["columns"]
+    for key in ("impact_energy_j", "crater_depth_m", "seismic_magnitude_mw", "blast_radius_km", "crater_diameter_km"):
+        assert cols[key][0] == pytest.approx(expected[key])
+
+
+def test_grid_is_cartesian_product(client):
+    grid = {"velocity_kms": {"start": 10, "stop": 30, "num": 5}, "diameter_m": [50, 100, 150], "density_kg_m3": [2000, 3000]}
+    j = post(client, {"grid": grid}).get_json()
+    assert j["count"] == 30
+    assert j["columns"]["velocity_kms"][:6] == [10.0] * 6
+    assert j["columns"]["density_kg_m3"][:2] == [2000.0, 3000.0]
+
+
+def test_ndjson_stream(client):
+    r = post(client, {"grid": {"velocity_kms": [10, 20], "diameter_m": [100, 200]}, "format": "ndjson"})
+    assert r.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in r.get_data(as_text=True).splitlines()]
+    assert len(rows) == 4
+    assert rows[-1]["velocity_kms"] == 20.0 and rows[-1]["diameter_m"] == 200.0
+
+
+def test_batch_rejects_bad_input(client):
+    assert post(client, {"scenarios": {"velocity_kms": [1, 2, 3], "diameter_m": [1, 2]}}).status_code == 400
+    assert post(client, {"scenarios": {"velocity_kms": ["fast"], "diameter_m": [1]}}).status_code == 400
+    assert post(client, {"velocity_kms": 1}).status_code == 400
+
+
+@pytest.mark.parametrize("field,values", [
+    ("diameter_m", [-100, 0]), ("mass_kg", [-1, 1]), ("density_kg_m3", [0, 3000]), ("velocity_kms", [-20, 20]),
+])
+def test_batch_rejects_values_that_give_nan_metrics(client, field, values):
+    scenarios = {"velocity_kms": [20, 20], "diameter_m": [100, 100], field: values}
+    for fmt in ("columns", "ndjson"):
+        r = post(client, {"scenarios": scenarios, "format": fmt})
+        assert r.status_code == 400 and field in r.get_json()["message"]
+
+
+@pytest.mark.parametrize("num", [1e12, 3e7, 0])
+def test_grid_range_num_is_bounded_before_allocation(client, num):
+    grid = {"velocity_kms": {"start": 10, "stop": 30, "num": num}, "diameter_m": [50]}
+    r = post(client, {"grid": grid})
+    assert r.status_code == 400 and "num" in r.get_json()["message"]
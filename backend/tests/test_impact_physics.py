@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+import bench_physics
+import impact_physics as physics
+from app import app
+
+
+def test_scalar_and_array_entry_points_agree():
+    scalar = physics.impact_metrics(18.5, 3.2e10, 250.0)
+    arrays = physics.impact_metrics_array([18.5], [250.0], mass_kg=[3.2e10])
+    for key in physics.COLUMNS:
+        assert arrays[key][0] == pytest.approx(scalar[key])
+
+
+def test_memo_reuses_quantized_inputs():
+    physics.clear_memo()
+    first = physics.impact_metrics(20.0, 1e9, 100.0)
+    second = physics.impact_metrics(20.0000000001, 1e9, 100.0)
+    assert first == second
+    assert physics.memo_stats()["hits"] == 1
+    # Callers get their own copy of the cached result.
+    first["impact_energy_j"] = 0
+    assert physics.impact_metrics(20.0, 1e9, 100.0)["impact_energy_j"] > 0
+
+
+def test_zero_energy_does_not_raise():
+    assert physics.impact_metrics(0.0, 1e9, 100.0)["seismic_magnitude_mw"] == 0.0
+
+
+def test_impact_route_keeps_quick_crater_formula():
+    app.config["TESTING"] = True
+    with app.test_client() as c:
+        payload = {"velocity_kms": 20.0, "mass_kg": 1e9, "diameter_m": 100}
+        j = c.post("/api/impact", data=json.dumps(payload), content_type="application/json").get_json()
+    energy = 0.5 * 1e9 * 20000.0 ** 2
+    assert j["crater_depth_m"] == pytest.approx(0.1 * 100 ** 0.3 * (energy / 1e15) ** 0.1 * 10)
+    assert j["hiroshima_equivalent"] == pytest.approx(energy / 4.184e15 / 0.015)
+
+
+def test_benchmark_harness_writes_report(tmp_path):
+    out = tmp_path / "bench.json"
+    bench_physics.main(["--quick", "--out", str(out)])
+    report = json.loads(out.read_text())
+    assert report["results"]["array_1000"]["items_per_second"] > 0
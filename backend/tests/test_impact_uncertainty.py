@@ -0,0 +1,97 @@
+import json
+
+import numpy as np
+import pytest
+
+import app as backend
+import impact_uncertainty as mc
+
+
+def model(**overrides):
+    payload = {"diameter_min_m": 100, "diameter_max_m": 250, "velocity_kms": 20, **overrides}
+    return mc.UncertaintyModel.from_payload(payload)
+
+
+def test_histogram_percentiles_track_exact_percentiles():
+    m = model()
+    result = mc.run(m, 200_000, time_budget=30, seed=7, workers=1, chunk_samples=50_000)
+    assert result["complete"] and result["samples"] == 200_000
+
+    v, d, rho = m.sample(np.random.default_rng(7), 200_000)
+    energy = mc.physics.impact_metrics_array(v, d, density=rho)["impact_energy_mt"]
+    got = result["metrics"]["impact_energy_mt"]["percentiles"]
+    for q in (5, 50, 95):
+        assert got[f"p{q}"] == pytest.approx(np.percentile(energy, q), rel=0.03)
+    hist = result["metrics"]["seismic_magnitude_mw"]["histogram"]
+    assert sum(hist["counts"]) == 200_000 and len(hist["edges"]) == len(hist["counts"]) + 1
+
+
+def test_same_seed_is_reproducible():
+    a = mc.run(model(), 20_000, time_budget=30, seed=1, workers=1, chunk_samples=5_000)
+    b = mc.run(model(), 20_000, time_budget=30, seed=1, workers=1, chunk_samples=5_000)
+    assert a["metrics"]["blast_radius_km"]["mean"] == b["metrics"]["blast_radius_km"]["mean"]
+
+
+def test_time_budget_returns_partial_result():
+    result = mc.run(model(), 10_000_000, time_budget=0.05, seed=1, workers=1, chunk_samples=10_000)
+    assert not result["complete"] and 0 < result["samples"] < 10_000_000
+
+
+def test_process_pool_merges_worker_chunks():
+    try:
+        result = mc.run(model(), 40_000, time_budget=60, seed=3, workers=2, chunk_samples=10_000, inline_below=0)
+    finally:
+        mc.shutdown_pool()
+    assert result["complete"] and result["samples"] == 40_000
+    assert sum(result["metrics"]["impact_energy_mt"]["histogram"]["counts"]) == 40_000
+
+
+def test_model_requires_diameter_and_velocity():
+    with pytest.raises(mc.UncertaintyError):
+        mc.UncertaintyModel.from_payload({"velocity_kms": 20})
+    spread = mc.UncertaintyModel.from_payload({"diameter_m": 100, "velocity_kms": 20})
+    assert (spread.diameter_min_m, spread.diameter_max_m) == (75.0, 125.0)
+
+
+def test_uncertainty_endpoint_json_and_stream(monkeypatch):
+    client = backend.app.test_client()
+    body = {"diameter_m": 120, "velocity_kms": 18, "samples": 5000, "seed": 2}
+    data = client.post("/api/impact/uncertainty", json=body).get_json()
+    assert data["status"] == "ok" and data["samples"] == 5000
+    assert set(data["metrics"]) == set(mc.METRICS)
+
+    # The impact-details uncertainty mode is the same computation.
+    details = client.post("/api/impact-details", json={**body, "mode": "uncertainty"}).get_json()
+    assert details["metrics"]["impact_energy_mt"]["mean"] == data["metrics"]["impact_energy_mt"]["mean"]
+
+    monkeypatch.setattr(backend, "MC_PROGRESS_INTERVAL", 0.0)
+    res = client.post("/api/impact/uncertainty", json={**body, "stream": True})
+    lines = [json.loads(line) for line in res.data.decode().splitlines()]
+    assert res.mimetype == "application/x-ndjson"
+    assert lines[0]["partial"] and lines[-1]["samples"] == 5000 and lines[-1]["complete"]
+    assert backend.mc_bulkhead.stats()["active"] == 0
+
+    assert client.post("/api/impact/uncertainty", json={"velocity_kms": 18}).status_code == 400
+    assert client.post("/api/impact/uncertainty", json={**body, "samples": 10 ** 12}).status_code == 400
+
+
+def test_named_asteroid_diameter_is_in_meters():
+    # The fallback catalog only has `size` (km); Apophis is about 120 m across.
+    defaults = backend.catalog_uncertainty_defaults("Apophis")
+    assert defaults["diameter_m"] == pytest.approx(120.0)
+    client = backend.app.test_client()
+    data = client.post("/api/impact/uncertainty", json={"asteroid_name": "Apophis", "samples": 2000, "seed": 1}).get_json()
+    crater_km = data["metrics"]["crater_diameter_km"]["mean"]
+    direct = client.post("/api/impact/uncertainty",
+                         json={"diameter_m": 120, "velocity_kms": 7.32, "samples": 2000, "seed": 1}).get_json()
+    assert crater_km == pytest.approx(direct["metrics"]["crater_diameter_km"]["mean"])
+
+
+@pytest.mark.parametrize("seed", [-1, True, 1.5, "7"])
+def test_invalid_seed_is_rejected_before_running(seed):
+    client = backend.app.test_client()
+    body = {"diameter_m": 120, "velocity_kms": 18, "samples": 100, "seed": seed}
+    for stream in (False, True):
+        res = client.post("/api/impact/uncertainty", json={**body, "stream": stream})
+        assert res.status_code == 400 and "seed" in res.get_json()["message"]
+    assert backend.mc_bulkhead.stats()["active"] == 0
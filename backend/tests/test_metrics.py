@@ -0,0 +1,88 @@
+import time
+
+import app as backend
+import metrics
+from asteroid_cache import AsteroidCache
+from profiling import SlowRequestProfiler
+
+
+def sample(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_registry_renders_counters_histograms_and_stats():
+    registry = metrics.Registry("t")
+    hits = registry.counter("hits_total", "Hits.", ("route",))
+    hits.inc("/a")
+    hits.inc("/a", amount=2)
+    sizes = registry.histogram("size_bytes", "Sizes.", ("route",), buckets=(10, 100))
+    sizes.observe(50, "/a")
+    registry.collect_stats("cache", lambda: {"hits": 3, "persistent": True, "name": "x", "nested": {"n": 1.5}})
+
+    text = registry.render()
+    assert 't_hits_total{route="/a"} 3' in text
+    assert 't_size_bytes_bucket{route="/a",le="10"} 0' in text
+    assert 't_size_bytes_bucket{route="/a",le="+Inf"} 1' in text
+    assert "t_cache_hits 3" in text and "t_cache_persistent 1" in text and "t_cache_nested_n 1.5" in text
+    assert "t_cache_name" not in text
+
+
+def test_metrics_endpoint_counts_routes_and_fallbacks(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    client = backend.app.test_client()
+    before = backend.fallbacks.value("ai_explain")
+    client.post("/api/ai-explain", json={"term": "crater"})
+    client.post("/api/impact", json={"velocity_kms": 20})
+    client.post("/api/impact", json={"velocity_kms": "fast"})
+
+    res = client.get("/metrics")
+    assert res.status_code == 200 and res.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    text = res.get_data(as_text=True)
+    assert backend.fallbacks.value("ai_explain") == before + 1
+    assert sample(text, 'neotrack_http_requests_total{route="/api/impact",method="POST",status="400"}') >= 1
+    assert sample(text, 'neotrack_http_request_duration_seconds_count{route="/api/impact",method="POST"}') >= 2
+    assert 'neotrack_upstream_request_duration_seconds_count{upstream="nasa"}' in text
+    assert "neotrack_asteroid_cache_refresh_failures" in text
+
+
+def test_refresh_errors_are_counted_not_swallowed():
+    def fetch():
+        time.sleep(0.01)
+        raise RuntimeError("NeoWs timed out")
+
+    cache = AsteroidCache(fetch, fallback=lambda: [{"id": "local"}], ttl=60)
+    assert cache.get() == [{"id": "local"}]
+    stats = cache.stats()
+    assert stats["refresh_errors"] == 1 and stats["last_error"] == "RuntimeError: NeoWs timed out"
+    assert stats["last_refresh_seconds"] >= 0.01
+
+
+def test_profiler_keeps_only_slow_requests(tmp_path):
+    profiler = SlowRequestProfiler(threshold_s=0.01, sample_rate=1.0, directory=str(tmp_path))
+    fast = profiler.start()
+    assert profiler.finish(fast, 0.001, "GET /fast") is None
+
+    slow = profiler.start()
+    sum(i * i for i in range(20000))
+    assert profiler.start() is None  # one profiled request at a time
+    profile_id = profiler.finish(slow, 0.5, "GET /slow")
+    entry = profiler.get(profile_id)
+    assert "cumulative" in entry["report"] and entry["path"].endswith(".prof")
+    assert [p["label"] for p in profiler.list()] == ["GET /slow"]
+    assert profiler.stats()["sampled"] == 2 and profiler.stats()["captured"] == 1
+
+
+def test_profiles_endpoint(monkeypatch):
+    profiler = SlowRequestProfiler(threshold_s=0.0, sample_rate=1.0)
+    monkeypatch.setattr(backend, "profiler", profiler)
+    client = backend.app.test_client()
+    res = client.post("/api/impact", json={"velocity_kms": 20})
+    profile_id = int(res.headers["X-Profile-Id"])
+    listing = client.get("/debug/profiles").get_json()
+    assert listing["profiles"][0]["label"] == "POST /api/impact"
+    assert "api_impact" in client.get(f"/debug/profiles/{profile_id}").get_data(as_text=True)
+    monkeypatch.setattr(backend, "profiler", None)
+    assert client.get("/debug/profiles").status_code == 404
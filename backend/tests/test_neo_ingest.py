@@ -0,0 +1,184 @@
+import datetime
+import os
+
+import numpy as np
+import pytest
+
+import app as backend
+from neo_ingest import NeoWsClient, feed_windows, ingest_full, sync_recent
+from neo_store import NeoStore
+from stubs import StubResponse
+from upstream import Upstream, make_session
+
+
+def neo(i, miss_km=1e6, a_au=1.5):
+    return {
+        "id": str(1000 + i),
+        "neo_reference_id": str(1000 + i),
+        "name": f"({2000 + i} AB)",
+        "absolute_magnitude_h": 21.5,
+        "estimated_diameter": {"meters": {"estimated_diameter_min": 100.0, "estimated_diameter_max": 200.0}},
+        "is_potentially_hazardous_asteroid": i % 2 == 0,
+        "close_approach_data": [{
+            "close_approach_date": "2030-01-01",
+            "epoch_date_close_approach": 1893456000000,
+            "relative_velocity": {"kilometers_per_second": "12.5"},
+            "miss_distance": {"kilometers": str(miss_km)},
+            "orbiting_body": "Earth",
+        }],
+        "orbital_data": {
+            "epoch_osculation": "2460600.5", "semi_major_axis": str(a_au), "eccentricity": "0.2",
+            "inclination": "5", "ascending_node_longitude": "80", "perihelion_argument": "30",
+            "mean_anomaly": "10", "mean_motion": "0.5",
+        },
+    }
+
+
+class FakeNeoWs:
+    """NeoWs browse/feed/lookup routes over an in-memory catalog."""
+
+    def __init__(self, server, objects, page_size=20, fail_pages=()):
+        self.objects = {o["id"]: o for o in objects}
+        self.page_size = page_size
+        self.fail_pages = set(fail_pages)
+        self.feed = {}
+        server.routes["/neo/browse"] = self.browse
+        server.routes["/feed"] = self.feed_route
+        for neo_id in self.objects:
+            server.routes[f"/neo/{neo_id}"] = self.lookup
+
+    def browse(self, req):
+        page = int(req.query["page"][0])
+        if page in self.fail_pages:
+            return StubResponse(500)
+        items = list(self.objects.values())
+        total_pages = -(-len(items) // self.page_size)
+        chunk = items[page * self.page_size:(page + 1) * self.page_size]
+        return StubResponse(200, {"page": {"total_pages": total_pages, "number": page}, "near_earth_objects": chunk})
+
+    def feed_route(self, req):
+        return StubResponse(200, {"near_earth_objects": {req.query["start_date"][0]: [
+            {"id": i} for i in self.feed.get(req.query["start_date"][0], [])
+        ]}})
+
+    def lookup(self, req):
+        return StubResponse(200, self.objects[req.path.rsplit("/", 1)[1]])
+
+
+@pytest.fixture()
+def client(stub_server):
+    up = Upstream("neows-test", make_session(), retries=0, failure_threshold=1000)
+    return NeoWsClient(base_url=stub_server.url, api_key="test", upstream=up)
+
+
+@pytest.fixture()
+def store(tmp_path):
+    s = NeoStore(str(tmp_path / "neo.sqlite3"))
+    yield s
+    s.close()
+
+
+def test_full_ingest_pages_in_parallel(stub_server, client, store):
+    FakeNeoWs(stub_server, [neo(i) for i in range(95)])
+    result = ingest_full(store, client, workers=4)
+    assert result["complete"] and result["total_pages"] == 5
+    assert result["inserted"] == 95 and store.count() == 95
+    assert store.get_meta("full_run") is None
+
+    catalog = store.load_catalog()
+    first = catalog[0]
+    assert first["diameter_m"] == 150.0 and first["velocity_kms"] == 12.5
+    assert first["orbit"]["a_au"] == 1.5 and first["close_approach"] is True
+
+
+def test_full_ingest_resumes_from_checkpoints(stub_server, client, store):
+    fake = FakeNeoWs(stub_server, [neo(i) for i in range(100)], fail_pages={3})
+    first = ingest_full(store, client, workers=2)
+    assert not first["complete"] and first["failed_pages"] == [3]
+    assert store.count() == 80
+
+    fake.fail_pages.clear()
+    stub_server.calls.clear()
+    second = ingest_full(store, client, workers=2)
+    assert second["complete"] and second["run_id"] == first["run_id"]
+    # Only the missing page is fetched again.
+    assert [c.query["page"] for c in stub_server.calls] == [["3"]]
+    assert store.count() == 100
+
+
+def test_reingest_skips_unchanged_rows(stub_server, client, store):
+    fake = FakeNeoWs(stub_server, [neo(i) for i in range(10)])
+    ingest_full(store, client)
+    fake.objects["1003"] = neo(3, a_au=2.0)
+    result = ingest_full(store, client)
+    assert (result["inserted"], result["updated"], result["unchanged"]) == (0, 1, 9)
+
+
+def test_incremental_sync_refreshes_only_feed_objects(stub_server, client, store):
+    fake = FakeNeoWs(stub_server, [neo(i) for i in range(10)])
+    ingest_full(store, client)
+    today = datetime.date(2030, 1, 1)
+    store.set_meta("last_sync_date", today.isoformat())
+    fake.objects["1004"] = neo(4, miss_km=5e5)
+    fake.feed[today.isoformat()] = ["1004", "1005"]
+    stub_server.calls.clear()
+
+    result = sync_recent(store, client, today=today)
+    assert (result["checked"], result["updated"], result["unchanged"]) == (2, 1, 1)
+    looked_up = sorted(c.path for c in stub_server.calls if c.path.startswith("/neo/1"))
+    assert looked_up == ["/neo/1004", "/neo/1005"]
+    row = next(a for a in store.load_catalog() if a["id"] == "1004")
+    assert row["miss_distance_km"] == 5e5
+
+
+def test_feed_windows_respect_the_seven_day_limit():
+    windows = feed_windows(datetime.date(2030, 1, 1), datetime.date(2030, 1, 20))
+    assert windows[0] == (datetime.date(2030, 1, 1), datetime.date(2030, 1, 7))
+    assert windows[-1] == (datetime.date(2030, 1, 15), datetime.date(2030, 1, 20))
+
+
+def test_api_serves_the_ingested_catalog(stub_server, client, tmp_path, monkeypatch):
+    FakeNeoWs(stub_server, [neo(i) for i in range(30)])
+    path = str(tmp_path / "catalog.sqlite3")
+    ingest_full(NeoStore(path), client)
+    monkeypatch.setattr(backend, "NEO_DB_PATH", path)
+    monkeypatch.setattr(backend, "_neo_store", None)
+    monkeypatch.setattr(backend, "CATALOG_COLUMNS_FILE", str(tmp_path / "catalog.cols"))
+    backend.asteroid_cache.invalidate()
+    snapshot = tmp_path / "asteroids_cache.json"
+    monkeypatch.setattr(backend.asteroid_cache, "snapshot_path", str(snapshot))
+    try:
+        data = backend.app.test_client().get("/api/asteroids").get_json()
+        assert len(data["data"]) == 30
+        assert backend.get_asteroid_index().get("2004 AB")["id"] == "1004"
+        assert os.path.exists(tmp_path / "catalog.cols")
+        # The columns file is what other workers share; no JSON snapshot is kept.
+        assert not snapshot.exists()
+        index = backend.get_asteroid_index()
+        backend.asteroid_cache.refresh(force=True)
+        assert backend.get_asteroid_index() is index
+        assert isinstance(backend.load_asteroids().columns["r"].values.base, np.memmap)
+    finally:
+        backend.asteroid_cache.invalidate()
+
+
+def test_refresh_over_an_unchanged_store_keeps_derived_state(stub_server, client, tmp_path, monkeypatch):
+    FakeNeoWs(stub_server, [neo(i) for i in range(10)])
+    path = str(tmp_path / "catalog.sqlite3")
+    ingest_full(NeoStore(path), client)
+    monkeypatch.setattr(backend, "NEO_DB_PATH", path)
+    monkeypatch.setattr(backend, "_neo_store", None)
+    monkeypatch.setattr(backend, "CATALOG_COLUMNS_FILE", "")
+    monkeypatch.setattr(backend.asteroid_cache, "snapshot_path", None)
+    backend.asteroid_cache.invalidate()
+    try:
+        index = backend.get_asteroid_index()
+        version = backend.asteroid_cache.version
+        backend.asteroid_cache.refresh(force=True)
+        assert backend.get_asteroid_index() is index and backend.asteroid_cache.version == version
+
+        backend.get_neo_store().upsert([neo(10)])
+        backend.asteroid_cache.refresh(force=True)
+        assert backend.get_asteroid_index() is not index and len(backend.load_asteroids()) == 11
+    finally:
+        backend.asteroid_cache.invalidate()
@@ -0,0 +1,56 @@
+import json
+import time
+
+import app as backend
+from response_cache import ResponseCache, normalize_text
+from stubs import StubResponse
+from upstream import Upstream, make_session
+
+
+def test_normalize_text():
+    assert normalize_text("  What is   DART?! ") == "what is dart"
+
+
+def test_lru_eviction_and_ttl():
+    cache = ResponseCache(max_entries=2, ttl=0.05)
+    cache.set("ask", "en", "a", "1")
+    cache.set("ask", "en", "b", "2")
+    cache.get("ask", "en", "a")
+    cache.set("ask", "en", "c", "3")
+    assert cache.get("ask", "en", "b") is None
+    assert cache.get("ask", "en", "a") == "1"
+    time.sleep(0.06)
+    assert cache.get("ask", "en", "a") is None
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["hits"] == 2 and stats["misses"] == 2
+
+
+def test_language_is_part_of_the_key():
+    cache = ResponseCache()
+    cache.set("ask", "en", "dart", "english")
+    assert cache.get("ask", "es", "dart") is None
+
+
+def test_sqlite_persistence_shared_between_instances(tmp_path):
+    db = str(tmp_path / "ai_cache.sqlite")
+    ResponseCache(db_path=db).set("ask", "en", "What is DART?", "A planetary defense test.")
+    other = ResponseCache(db_path=db)
+    assert other.get("ask", "en", "what is dart") == "A planetary defense test."
+    assert other.stats()["disk_hits"] == 1
+
+
+def test_ai_explain_cached_and_precomputed(stub_server, monkeypatch):
+    stub_server.routes["/explain"] = lambda req: StubResponse(200, {"text": "explained"})
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(backend, "GROQ_EXPLAIN_URL", stub_server.url + "/explain")
+    monkeypatch.setattr(backend, "groq_explain_upstream", Upstream("groq_explain", make_session()))
+    monkeypatch.setattr(backend, "ai_cache", ResponseCache())
+
+    backend.precompute_explanations(["crater depth"])
+    assert len(stub_server.calls) == 1
+
+    backend.app.config["TESTING"] = True
+    with backend.app.test_client() as c:
+        r = c.post("/api/ai-explain", data=json.dumps({"term": "Crater depth"}), content_type="application/json")
+    assert r.get_json()["explanation"] == {"text": "explained"}
+    assert len(stub_server.calls) == 1
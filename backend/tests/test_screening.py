@@ -0,0 +1,99 @@
+import numpy as np
+
+import app as backend
+import ephemeris
+from screening import ScreeningCache, ScreeningWindow
+
+
+def synthetic_elements(n=400, near=40, seed=3):
+    # `near` objects share Earth's orbit closely; the rest are ordinary NEO orbits.
+    rng = np.random.default_rng(seed)
+    cols = {
+        "epoch_jd": [ephemeris.J2000_JD] * n,
+        "a_au": np.r_[rng.uniform(0.98, 1.02, near), rng.uniform(0.7, 3.0, n - near)],
+        "e": np.r_[rng.uniform(0, 0.05, near), rng.uniform(0, 0.8, n - near)],
+        "i_deg": np.r_[rng.uniform(0, 1, near), rng.uniform(0, 40, n - near)],
+        "node_deg": rng.uniform(0, 360, n),
+        "peri_deg": rng.uniform(0, 360, n),
+        "M_deg": rng.uniform(0, 360, n),
+        "n_deg_day": [None] * n,
+    }
+    ids = [str(i) for i in range(n)]
+    return ephemeris.OrbitElements(ids, ids, cols)
+
+
+def brute_force_min_distance(elements, start_jd, days):
+    jd = ephemeris.time_grid(start_jd, days, int(days * 20) + 1)
+    return np.linalg.norm(ephemeris.positions(elements, jd, "geo"), axis=2).min(axis=1)
+
+
+def test_screen_matches_brute_force_with_pruning():
+    elements = synthetic_elements()
+    window = ScreeningWindow(elements, ephemeris.J2000_JD, 120)
+    index, jd, dist, vrel = window.screen(0.08)
+
+    expected = brute_force_min_distance(elements, ephemeris.J2000_JD, 120)
+    assert set(index.tolist()) == set(np.nonzero(expected <= 0.08)[0].tolist())
+    np.testing.assert_allclose(dist, expected[index], atol=1e-5)
+    assert np.all(vrel > 0)
+    # The radial index must rule out most (object, bucket) pairs.
+    assert window.last_candidate_pairs < 0.25 * len(elements) * len(window.mids)
+
+
+def test_ranked_orders_by_distance_or_energy():
+    elements = synthetic_elements()
+    diameters = np.linspace(10, 1000, len(elements))
+    window = ScreeningWindow(elements, ephemeris.J2000_JD, 120, diameters)
+    by_distance = window.ranked(0.08)
+    assert [r["miss_distance_au"] for r in by_distance] == sorted(r["miss_distance_au"] for r in by_distance)
+    by_energy = window.ranked(0.08, sort="energy", limit=3)
+    energies = [r["impact_energy_mt"] for r in by_energy]
+    assert energies == sorted(energies, reverse=True) and len(by_energy) == 3
+    assert by_energy[0]["approach_time"].endswith("Z")
+
+
+def test_window_cache_reuses_windows_per_catalog():
+    elements = synthetic_elements(50, 5)
+    cache = ScreeningCache(max_windows=2)
+    built = []
+    factory = lambda: built.append(1) or ScreeningWindow(elements, ephemeris.J2000_JD, 10)  # noqa: E731
+    first = cache.get(elements, ephemeris.J2000_JD, 10, factory)
+    assert cache.get(elements, ephemeris.J2000_JD, 10, factory) is first
+    cache.get(synthetic_elements(50, 5), ephemeris.J2000_JD, 10, factory)
+    assert len(built) == 2 and cache.stats()["hits"] == 1
+
+
+def test_window_cache_is_bounded_by_bytes():
+    elements = synthetic_elements(50, 5)
+    window = ScreeningWindow(elements, ephemeris.J2000_JD, 10)
+    # float32 radii and int32 ordering: 8 bytes per object per bucket.
+    assert window.sorted_radius.dtype == np.float32 and window.order.dtype == np.int32
+    cache = ScreeningCache(max_windows=8, max_bytes=int(window.nbytes * 2.5))
+    for days in (10, 11, 12, 13):
+        cache.get(elements, ephemeris.J2000_JD, days, lambda d=days: ScreeningWindow(elements, ephemeris.J2000_JD, d))
+    stats = cache.stats()
+    assert stats["windows"] == 2 and stats["bytes"] <= stats["max_bytes"]
+
+
+def test_close_approaches_endpoint(monkeypatch):
+    elements = synthetic_elements()
+    rows = [{"id": i, "label": f"NEO {i}", "diameter_m": 120.0,
+             "orbit": {"epoch_jd": elements.epoch_jd[k], "a_au": elements.a[k], "e": elements.e[k],
+                       "i_deg": float(np.degrees(elements.i[k])), "node_deg": float(np.degrees(elements.node[k])),
+                       "peri_deg": float(np.degrees(elements.peri[k])), "M_deg": float(np.degrees(elements.M0[k])),
+                       "n_deg_day": None}}
+            for k, i in enumerate(elements.ids)]
+    monkeypatch.setattr(backend, "load_asteroids", lambda: rows)
+    backend.get_screening_cache().clear()
+    client = backend.app.test_client()
+
+    data = client.get("/api/close-approaches?start=2000-01-01&days=120&threshold_au=0.08&limit=5").get_json()
+    assert data["status"] == "ok" and data["screened"] == 400
+    assert data["count"] >= len(data["results"]) > 0
+    assert data["results"][0]["diameter_m"] == 120.0
+    assert data["results"][0]["miss_distance_au"] <= data["results"][-1]["miss_distance_au"]
+
+    client.get("/api/close-approaches?start=2000-01-01&days=120&threshold_ld=10&sort=energy")
+    assert backend.get_screening_cache().stats()["hits"] == 1
+    assert client.get("/api/close-approaches?sort=size").status_code == 400
+    assert client.get("/api/close-approaches?days=5000").status_code == 400
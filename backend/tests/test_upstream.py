@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+import app as backend
+from stubs import StubResponse, groq_completion
+from upstream import CircuitOpenError, Upstream, UpstreamUnavailable, make_session
+
+
+def sequence(*responses):
+    it = iter(responses)
+    last = responses[-1]
+    return lambda req: next(it, last)
+
+
+def make_upstream(**kwargs):
+    kwargs.setdefault("backoff", 0.001)
+    return Upstream("test", make_session(), **kwargs)
+
+
+def test_retries_transient_errors(stub_server):
+    stub_server.routes["/ok"] = sequence(StubResponse(503), StubResponse(200, {"ok": True}))
+    up = make_upstream(retries=2)
+    res = up.request("GET", stub_server.url + "/ok")
+    assert res.json() == {"ok": True}
+    stats = up.stats()
+    assert stats["retried"] == 1 and stats["latency_seconds"]["count"] == 2
+
+
+def test_client_errors_are_not_retried(stub_server):
+    stub_server.routes["/missing"] = sequence(StubResponse(404))
+    up = make_upstream(retries=2)
+    assert up.request("GET", stub_server.url + "/missing").status_code == 404
+    assert len(stub_server.calls) == 1
+
+
+def test_post_is_not_resent_after_read_timeout_or_500(stub_server):
+    stub_server.routes["/slow"] = sequence(StubResponse(200, {}, delay=0.5))
+    stub_server.routes["/err"] = sequence(StubResponse(500))
+    up = make_upstream(retries=2, failure_threshold=10)
+    with pytest.raises(UpstreamUnavailable):
+        up.request("POST", stub_server.url + "/slow", timeout=0.1, json={})
+    with pytest.raises(UpstreamUnavailable):
+        up.request("POST", stub_server.url + "/err", json={})
+    assert [c.path for c in stub_server.calls] == ["/slow", "/err"]
+    assert up.stats()["retried"] == 0
+
+
+def test_post_retries_429_and_503(stub_server):
+    stub_server.routes["/busy"] = sequence(StubResponse(429), StubResponse(503), StubResponse(200, {"ok": True}))
+    up = make_upstream(retries=2)
+    assert up.request("POST", stub_server.url + "/busy", json={}).json() == {"ok": True}
+    assert len(stub_server.calls) == 3
+
+
+def test_breaker_opens_and_fails_fast(stub_server):
+    stub_server.routes["/down"] = sequence(StubResponse(500))
+    up = make_upstream(retries=0, failure_threshold=2, reset_timeout=60)
+    for _ in range(2):
+        with pytest.raises(UpstreamUnavailable):
+            up.request("GET", stub_server.url + "/down")
+    with pytest.raises(CircuitOpenError):
+        up.request("GET", stub_server.url + "/down")
+    assert len(stub_server.calls) == 2
+    assert up.stats()["circuit"] == "open"
+
+
+def test_breaker_half_open_probe_closes_on_success(stub_server):
+    stub_server.routes["/flaky"] = sequence(StubResponse(500), StubResponse(200, {}))
+    up = make_upstream(retries=0, failure_threshold=1, reset_timeout=0)
+    with pytest.raises(UpstreamUnavailable):
+        up.request("GET", stub_server.url + "/flaky")
+    assert up.request("GET", stub_server.url + "/flaky").status_code == 200
+    assert up.breaker.state == "closed"
+
+
+def test_ask_ai_uses_offline_fallback_when_groq_fails(stub_server, monkeypatch):
+    stub_server.routes["/chat"] = sequence(StubResponse(503))
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(backend, "GROQ_CHAT_URL", stub_server.url + "/chat")
+    monkeypatch.setattr(backend, "groq_upstream", make_upstream(retries=1, failure_threshold=1))
+
+    backend.app.config["TESTING"] = True
+    with backend.app.test_client() as c:
+        r = c.post("/api/ask-ai", data=json.dumps({"query": "What was DART?"}), content_type="application/json")
+        assert r.get_json()["response"] == backend.OFFLINE_ANSWERS["dart"]
+        calls = len(stub_server.calls)
+        # Breaker is now open: no further upstream traffic.
+        c.post("/api/ask-ai", data=json.dumps({"query": "crater?"}), content_type="application/json")
+        assert len(stub_server.calls) == calls
+
+
+def test_ask_ai_through_stub(stub_server, monkeypatch):
+    stub_server.routes["/chat"] = sequence(StubResponse(200, groq_completion("Bennu is a carbonaceous asteroid.")))
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(backend, "GROQ_CHAT_URL", stub_server.url + "/chat")
+    monkeypatch.setattr(backend, "groq_upstream", make_upstream())
+
+    backend.app.config["TESTING"] = True
+    with backend.app.test_client() as c:
+        r = c.post("/api/ask-ai", data=json.dumps({"query": "What is Bennu?"}), content_type="application/json")
+    assert r.get_json()["response"] == "Bennu is a carbonaceous asteroid."
+    assert stub_server.calls[0].headers["Authorization"] == "Bearer test-key"
@@ -0,0 +1,238 @@
+"""Shared HTTP client for upstream APIs (Groq, NASA).
+
+All upstream calls go through one keep-alive `requests.Session` so TCP/TLS
+connections are reused. Each named upstream adds a concurrency limit, bounded
+retries with jittered exponential backoff, a circuit breaker, and a latency
+histogram. Non-idempotent requests (POST, e.g. paid Groq completions) are only
+retried when they certainly did not reach the upstream's handler: connection
+failures and 429/503. When the breaker is open calls fail fast with
+`UpstreamUnavailable` and callers switch to their offline fallbacks.
+"""
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# A 500/502/504 or a read timeout may come after a POST was already processed.
+UNSENT_RETRY_STATUSES = frozenset({429, 503})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class UpstreamUnavailable(Exception):
+    """Upstream failed after retries, or its circuit breaker is open."""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    pass
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        i = 0
+        while i < len(self.buckets) and seconds > self.buckets[i]:
+            i += 1
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def snapshot(self):
+        with self._lock:
+            cumulative, buckets = 0, {}
+            for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+                cumulative += n
+                buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+            return {"count": self.count, "sum": self.sum, "buckets": buckets}
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures; lets one probe through after `reset_timeout`."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    self.times_opened += 1
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+def make_session(pool_connections=4, pool_maxsize=16):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class Upstream:
+    def __init__(self, name, session, max_concurrency=16, retries=2, backoff=0.25, max_backoff=2.0,
+                 failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.session = session
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.errors = 0
+        self.retried = 0
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def available(self):
+        return self.breaker.state != "open"
+
+    def request(self, method, url, timeout=10, **kwargs):
+        """Send a request, retrying connection errors and 429/5xx responses.
+
+        For non-idempotent methods only connection errors and 429/503 are
+        retried; a read timeout or other 5xx fails without resending.
+
+        Returns the final `requests.Response` for any other status (including 4xx).
+        Raises UpstreamUnavailable when the breaker is open or retries are exhausted.
+        """
+        # Fail fast while the breaker is open, before waiting for a slot.
+        if not self.available():
+            self.rejected += 1
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        # Wait at most one timeout for a free slot rather than queueing forever.
+        if not self._slots.acquire(timeout=timeout):
+            self.rejected += 1
+            raise UpstreamUnavailable(f"{self.name} concurrency limit reached")
+        try:
+            if not self.breaker.allow():
+                self.rejected += 1
+                raise CircuitOpenError(f"{self.name} circuit is open")
+            return self._request_with_retries(method, url, timeout, kwargs)
+        finally:
+            self._slots.release()
+
+    def _request_with_retries(self, method, url, timeout, kwargs):
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        retry_statuses = RETRY_STATUSES if idempotent else UNSENT_RETRY_STATUSES
+        retry_errors = requests.RequestException if idempotent else (requests.ConnectionError, requests.ConnectTimeout)
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retried += 1
+                time.sleep(self._backoff_delay(attempt, last_error))
+            self.requests += 1
+            started = time.perf_counter()
+            try:
+                res = self.session.request(method, url, timeout=timeout, **kwargs)
+            except requests.RequestException as e:
+                self.latency.observe(time.perf_counter() - started)
+                self.errors += 1
+                last_error = e
+                if not isinstance(e, retry_errors):
+                    break
+                continue
+            self.latency.observe(time.perf_counter() - started)
+            if res.status_code in RETRY_STATUSES:
+                self.errors += 1
+                last_error = res
+                if res.status_code not in retry_statuses:
+                    break
+                if attempt < self.retries:
+                    res.close()
+                continue
+            self.breaker.record_success()
+            return res
+
+        self.breaker.record_failure()
+        if isinstance(last_error, requests.Response):
+            last_error.close()
+            raise UpstreamUnavailable(f"{self.name} returned HTTP {last_error.status_code}")
+        raise UpstreamUnavailable(f"{self.name} request failed: {last_error}")
+
+    def _backoff_delay(self, attempt, last_error):
+        # Honour a short Retry-After from a 429/503, otherwise full jitter.
+        if isinstance(last_error, requests.Response):
+            retry_after = last_error.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** (attempt - 1))))
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retried": self.retried,
+            "rejected": self.rejected,
+            "circuit": self.breaker.state,
+            "circuit_opened": self.breaker.times_opened,
+            "latency_seconds": self.latency.snapshot(),
+        }
+
+
+_session = make_session(
+    pool_connections=int(os.environ.get("UPSTREAM_POOL_HOSTS", 4)),
+    pool_maxsize=int(os.environ.get("UPSTREAM_POOL_SIZE", 16)),
+)
+_upstreams = {}
+_registry_lock = threading.Lock()
+
+
+def get_upstream(name, **options):
+    """Return the process-wide Upstream called `name`, creating it on first use."""
+    with _registry_lock:
+        if name not in _upstreams:
+            options.setdefault("retries", int(os.environ.get("UPSTREAM_RETRIES", 2)))
+            options.setdefault("failure_threshold", int(os.environ.get("UPSTREAM_BREAKER_FAILURES", 5)))
+            options.setdefault("reset_timeout", float(os.environ.get("UPSTREAM_BREAKER_RESET", 30)))
+            _upstreams[name] = Upstream(name, _session, **options)
+        return _upstreams[name]
+
+
+def upstream_stats():
+    with _registry_lock:
+        return {name: u.stats() for name, u in _upstreams.items()}
@@ -55,9 +55,13 @@ export function ChatPanel() {
     try {
       const res = await fetch(`${apiBase}/api/ask-ai`, {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ query: trimmed, language }),
+        headers: { "Content-Type": "application/json", Accept: "text/event-stream" },
+        body: JSON.stringify({ query: trimmed, language, stream: true }),
       })
+      if (res.body && (res.headers.get("content-type") || "").includes("text/event-stream")) {
+        await readAnswerStream(res.body)
+        return
+      }
       const data = await res.json()
       const answer = data?.response || "Sorry, I couldn't generate a response."
       setMessages((m) => [...m, { id: crypto.randomUUID(), role: "assistant", content: answer }])
@@ -71,6 +75,54 @@ export function ChatPanel() {
     }
   }
 
+  // Render server-sent `data: {delta}` events into one assistant message as they arrive;
+  // the closing `event: done` carries the full response.
+  async function readAnswerStream(body: ReadableStream<Uint8Array>) {
+    const id = crypto.randomUUID()
+    const reader = body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ""
+    let content = ""
+    let started = false
+
+    const render = (text: string) => {
+      if (!started) {
+        started = true
+        setLoading(false)
+        setMessages((m) => [...m, { id, role: "assistant", content: text }])
+      } else {
+        setMessages((m) => m.map((msg) => (msg.id === id ? { ...msg, content: text } : msg)))
+      }
+    }
+
+    while (true) {
+      const { done, value } = await reader.read()
+      if (done) break
+      buffer += decoder.decode(value, { stream: true })
+      let boundary = buffer.indexOf("\n\n")
+      while (boundary !== -1) {
+        const block = buffer.slice(0, boundary)
+        buffer = buffer.slice(boundary + 2)
+        boundary = buffer.indexOf("\n\n")
+        const event = block.match(/^event: (.*)$/m)?.[1] || "message"
+        const data = block.match(/^data: (.*)$/m)?.[1]
+        if (!data) continue
+        try {
+          const parsed = JSON.parse(data)
+          if (event === "done") {
+            content = parsed?.response || content
+          } else if (typeof parsed?.delta === "string") {
+            content += parsed.delta
+          }
+          render(content)
+        } catch {
+          // ignore malformed events
+        }
+      }
+    }
+    if (!started) render(content || "Sorry, I couldn't generate a response.")
+  }
+
   function onSubmit(e: React.FormEvent) {
     e.preventDefault()
     void sendQuery(input)
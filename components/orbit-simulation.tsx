@@ -5,6 +5,43 @@ import * as THREE from "three"
 
 type NamedObject3D = THREE.Mesh & { userData: { label?: string } }
 
+type Ephemeris = {
+  header: { count: number; steps: number; step_days: number; names: string[] }
+  positions: Float32Array
+}
+
+// Decode the backend's binary ephemeris: "EPH1", uint32 header length, JSON header, float32 positions.
+function parseEphemeris(buf: ArrayBuffer): Ephemeris | null {
+  if (buf.byteLength < 8 || new TextDecoder().decode(new Uint8Array(buf, 0, 4)) !== "EPH1") return null
+  const headerLength = new DataView(buf).getUint32(4, true)
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buf, 8, headerLength)))
+  const positions = new Float32Array(buf, 8 + headerLength, header.count * header.steps * 3)
+  return { header, positions }
+}
+
+// The ephemeris starts at today's date (UTC); remounts on the same day reuse the
+// buffer instead of downloading it again. Failed requests are not kept.
+let ephemerisRequest: { key: string; buf: Promise<ArrayBuffer> } | null = null
+
+function fetchEphemeris(url: string): Promise<ArrayBuffer> {
+  const key = `${url}|${new Date().toISOString().slice(0, 10)}`
+  if (!ephemerisRequest || ephemerisRequest.key !== key) {
+    const buf = fetch(url).then((r) => (r.ok ? r.arrayBuffer() : Promise.reject(r.status)))
+    buf.catch(() => {
+      if (ephemerisRequest?.buf === buf) ephemerisRequest = null
+    })
+    ephemerisRequest = { key, buf }
+  }
+  return ephemerisRequest.buf
+}
+
+// Geocentric AU -> scene units: log-compress distance so near and far objects both fit around Earth.
+function toScene(x: number, y: number, z: number, out: THREE.Vector3) {
+  const d = Math.sqrt(x * x + y * y + z * z)
+  const s = d > 0 ? (3.8 + 2.2 * Math.log1p(d * 4)) / d : 0
+  return out.set(x * s, z * s, -y * s)
+}
+
 export function OrbitSimulation() {
   const containerRef = useRef<HTMLDivElement | null>(null)
   const [hovered, setHovered] = useState<string | null>(null)
@@ -78,33 +115,49 @@ export function OrbitSimulation() {
       asteroids.push(mesh)
     }
 
-    // Fetch asteroids from backend
-    fetch((window as any).__NEOTRACK_API_BASE__ ? `${(window as any).__NEOTRACK_API_BASE__}/api/asteroids` : "/api/asteroids")
-      .then((r) => r.json())
-      .then((json) => {
-        const data = json?.data ?? []
-        if (data.length > 0) {
-          data.forEach((a: any) => {
-            createAsteroid({ r: a.r ?? beltRadius, theta: a.theta ?? Math.random() * Math.PI * 2, y: a.y ?? 0, size: a.size ?? 0.08, label: a.label })
-          })
-        } else {
-          // fallback generate
+    // Real orbits: one InstancedMesh played back from the backend ephemeris (geocentric, 1 step per day).
+    const apiBase = (window as any).__NEOTRACK_API_BASE__ ?? ""
+    let ephemeris: Ephemeris | null = null
+    let ephemerisMesh: THREE.InstancedMesh | null = null
+    const ephemerisGeo = new THREE.DodecahedronGeometry(0.06)
+
+    const loadLegacyAsteroids = () =>
+      fetch(`${apiBase}/api/asteroids`)
+        .then((r) => r.json())
+        .then((json) => {
+          const data = json?.data ?? []
+          if (data.length > 0) {
+            data.forEach((a: any) => {
+              createAsteroid({ r: a.r ?? beltRadius, theta: a.theta ?? Math.random() * Math.PI * 2, y: a.y ?? 0, size: a.size ?? 0.08, label: a.label })
+            })
+          } else {
+            // fallback generate
+            for (let i = 0; i < 60; i++) {
+              const r = beltRadius + (Math.random() - 0.5) * 0.6
+              const theta = Math.random() * Math.PI * 2
+              const size = 0.06 + Math.random() * 0.12
+              createAsteroid({ r, theta, size, label: `Asteroid ${i + 1}` })
+            }
+          }
+        })
+        .catch(() => {
           for (let i = 0; i < 60; i++) {
             const r = beltRadius + (Math.random() - 0.5) * 0.6
             const theta = Math.random() * Math.PI * 2
             const size = 0.06 + Math.random() * 0.12
             createAsteroid({ r, theta, size, label: `Asteroid ${i + 1}` })
           }
-        }
-      })
-      .catch(() => {
-        for (let i = 0; i < 60; i++) {
-          const r = beltRadius + (Math.random() - 0.5) * 0.6
-          const theta = Math.random() * Math.PI * 2
-          const size = 0.06 + Math.random() * 0.12
-          createAsteroid({ r, theta, size, label: `Asteroid ${i + 1}` })
-        }
+        })
+
+    fetchEphemeris(`${apiBase}/api/ephemeris?days=365&steps=366&frame=geo&limit=2000`)
+      .then((buf) => {
+        const parsed = parseEphemeris(buf)
+        if (!parsed || parsed.header.count === 0) return loadLegacyAsteroids()
+        ephemeris = parsed
+        ephemerisMesh = new THREE.InstancedMesh(ephemerisGeo, asteroidMat, parsed.header.count)
+        world.add(ephemerisMesh)
       })
+      .catch(() => loadLegacyAsteroids())
 
 
     // Asteroid belt path line (visual hint)
@@ -152,10 +205,16 @@ export function OrbitSimulation() {
         -((e.clientY - rect.top) / rect.height) * 2 + 1,
       )
       raycaster.setFromCamera(mouse, camera)
-      const intersects = raycaster.intersectObjects<THREE.Mesh>([earth, moon, ...asteroids], true)
+      const targets: THREE.Object3D[] = [earth, moon, ...asteroids]
+      if (ephemerisMesh) targets.push(ephemerisMesh)
+      const intersects = raycaster.intersectObjects(targets, true)
       if (intersects.length > 0) {
-        const obj = intersects[0].object as NamedObject3D
-        setHovered(obj.userData.label || null)
+        const hit = intersects[0]
+        const label =
+          hit.object === ephemerisMesh && hit.instanceId !== undefined
+            ? ephemeris?.header.names[hit.instanceId]
+            : (hit.object as NamedObject3D).userData.label
+        setHovered(label || null)
         renderer.domElement.style.cursor = "pointer"
       } else {
         setHovered(null)
@@ -190,8 +249,34 @@ export function OrbitSimulation() {
     // Animation loop
     let raf = 0
     let t = 0
+    let step = 0
+    const dummy = new THREE.Object3D()
+    const from = new THREE.Vector3()
+    const to = new THREE.Vector3()
+    const updateEphemeris = () => {
+      if (!ephemeris || !ephemerisMesh) return
+      const { count, steps } = ephemeris.header
+      const p = ephemeris.positions
+      step = (step + 0.25) % Math.max(1, steps - 1)
+      const i0 = Math.floor(step)
+      const i1 = Math.min(i0 + 1, steps - 1)
+      const f = step - i0
+      for (let k = 0; k < count; k++) {
+        const o0 = (k * steps + i0) * 3
+        const o1 = (k * steps + i1) * 3
+        toScene(p[o0], p[o0 + 1], p[o0 + 2], from)
+        toScene(p[o1], p[o1 + 1], p[o1 + 2], to)
+        dummy.position.copy(from.lerp(to, f))
+        dummy.updateMatrix()
+        ephemerisMesh.setMatrixAt(k, dummy.matrix)
+      }
+      ephemerisMesh.instanceMatrix.needsUpdate = true
+      // Instances moved: let the next hover raycast recompute the bounds.
+      ephemerisMesh.boundingSphere = null
+    }
     const animate = () => {
       t += 0.01
+      updateEphemeris()
       // Earth spin
       earth.rotation.y += 0.0025
       // Moon orbit
@@ -222,6 +307,8 @@ export function OrbitSimulation() {
       moonMat.dispose()
       asteroidMat.dispose()
       asteroids.forEach((a) => a.geometry.dispose())
+      ephemerisGeo.dispose()
+      ephemerisMesh?.dispose()
       ;(moonPath.geometry as THREE.BufferGeometry).dispose()
       ;(moonPath.material as THREE.Material).dispose()
       ;(belt.geometry as THREE.BufferGeometry).dispose()